@@ -1,1809 +1,3077 @@
-import streamlit as st
-import sqlite3
-import pandas as pd
-import json
-import os
-from datetime import datetime
-import hashlib
-import hmac
-import logging
-from functools import wraps
-import plotly.express as px
-import plotly.graph_objects as go
-import random
-import string
-import gzip
-import shutil
-from pathlib import Path
-# Al inicio de Ventas.py, después de los imports
-#import sys
-#st.write("Python version:", sys.version)
-#st.write("Current directory:", os.getcwd())
-#st.write("Files in directory:", os.listdir())
-
-# -------------------- CONFIGURACIÓN INICIAL --------------------
-st.set_page_config(
-    page_title="Equipo Locatel Restrepo", 
-    page_icon="🏥",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# -------------------- CONFIGURACIÓN DE LOGGING --------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# -------------------- FUNCIONES DE SEGURIDAD --------------------
-def hash_password(password):
-    """Hashea la contraseña usando SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def check_password(password, hashed):
-    """Verifica la contraseña de manera segura"""
-    return hmac.compare_digest(hash_password(password), hashed)
-
-# -------------------- DECORADOR PARA MANEJO DE ERRORES --------------------
-def safe_db_operation(func):
-    """Decorador para operaciones seguras de base de datos"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except sqlite3.Error as e:
-            logger.error(f"Error de base de datos: {e}")
-            st.error(f"❌ Error de base de datos: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Error inesperado: {e}")
-            st.error(f"❌ Error inesperado: {str(e)}")
-            return None
-    return wrapper
-
-# -------------------- VERIFICACIÓN DE ENTORNO --------------------
-def check_environment():
-    """Verifica el entorno de ejecución"""
-    issues = []
-    
-    # Verificar permisos de escritura
-    try:
-        test_file = 'test_write.tmp'
-        with open(test_file, 'w') as f:
-            f.write('test')
-        os.remove(test_file)
-        logger.info("✅ Permisos de escritura OK")
-    except Exception as e:
-        issues.append(f"Sin permisos de escritura: {e}")
-        logger.error(f"Error de permisos: {e}")
-    
-    return issues
-
-# -------------------- INICIALIZACIÓN DE BASE DE DATOS --------------------
-@st.cache_resource
-def init_database():
-    """Inicializa la base de datos con manejo de errores"""
-    db_path = "ventas.db"
-    
-    # Verificar si la base de datos existe y no está corrupta
-    try:
-        conn = sqlite3.connect(db_path)
-        conn.execute("SELECT 1")
-        conn.close()
-        logger.info("✅ Base de datos verificada correctamente")
-    except Exception as e:
-        logger.error(f"Error con base de datos: {e}")
-        # Si está corrupta, crear backup y nueva base
-        if os.path.exists(db_path):
-            backup_name = f"ventas_corrupta_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            os.rename(db_path, backup_name)
-            logger.info(f"Backup de BD corrupta creado: {backup_name}")
-    
-    return get_connection()
-
-# -------------------- FUNCIONES DE BASE DE DATOS --------------------
-def get_connection():
-    """Obtiene conexión a la base de datos"""
-    # Quita check_same_thread=False
-    return sqlite3.connect("ventas.db", timeout=30)
-
-@safe_db_operation
-def create_tables():
-    """Crea las tablas con mejor manejo de errores"""
-    conn = None
-    try:
-        conn = get_connection()
-        c = conn.cursor()
-        
-        # Tabla de ventas
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS registros_ventas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha DATE,
-                empleado TEXT,
-                autoliquidable INTEGER DEFAULT 0,
-                oferta INTEGER DEFAULT 0,
-                marca_propia INTEGER DEFAULT 0,
-                producto_adicional INTEGER DEFAULT 0,
-                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabla de empleados
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS empleados (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT UNIQUE,
-                activo INTEGER DEFAULT 1,
-                departamento TEXT DEFAULT 'Droguería',
-                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Tabla de usuarios con contraseñas hasheadas
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password_hash TEXT,
-                rol TEXT,
-                empleado_id INTEGER,
-                activo INTEGER DEFAULT 1,
-                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ultimo_acceso TIMESTAMP,
-                FOREIGN KEY (empleado_id) REFERENCES empleados (id)
-            )
-        """)
-        
-        conn.commit()
-        logger.info("✅ Tablas creadas/verificadas correctamente")
-        
-        # Insertar datos iniciales
-        insertar_datos_iniciales(conn)
-        
-    except sqlite3.Error as e:
-        logger.error(f"Error creando tablas: {e}")
-        if conn:
-            conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
-    
-    return True
-
-@safe_db_operation
-def insertar_datos_iniciales(conn):
-    """Inserta datos iniciales con manejo de errores"""
-    c = conn.cursor()
-    
-    # Empleados por defecto
-    empleados_default = [
-        ("Angel Bonilla", "Droguería"),
-        ("Claudia Parada", "Droguería"),
-        ("Cristina Gomez", "Equipos Médicos"),
-        ("Daniela Velasco", "Tienda"),
-        ("Darcy Tovar", "Cajas"),
-        ("Erika Salazar", "Droguería"),
-        ("Estheiry Cardozo", "Equipos Médicos"),
-        ("Janeth Jimenez", "Tienda"),
-        ("Jessica Sanabria", "Cajas"),
-        ("Johanna Cuervo", "Droguería"),
-        ("Leonardo Vera", "Equipos Médicos"),
-        ("Lucia Guerrero", "Tienda"),
-        ("Luna Galindez", "Cajas"),
-        ("Mariana Mejia", "Droguería"),
-        ("Niyireth Silva", "Equipos Médicos"),
-        ("Ruth Avila", "Tienda"),
-        ("Valeria Delgado", "Cajas")
-    ]
-    
-    for emp, depto in empleados_default:
-        try:
-            c.execute(
-                "INSERT OR IGNORE INTO empleados (nombre, departamento) VALUES (?, ?)", 
-                (emp, depto)
-            )
-        except Exception as e:
-            logger.warning(f"Error insertando empleado {emp}: {e}")
-    
-    # Usuario admin con contraseña hasheada
-    admin_hash = hash_password("admin123")
-    try:
-        c.execute(
-            "INSERT OR IGNORE INTO usuarios (username, password_hash, rol, activo) VALUES (?, ?, ?, ?)",
-            ("admin", admin_hash, "Administrador", 1)
-        )
-    except Exception as e:
-        logger.warning(f"Error insertando admin: {e}")
-    
-    # Usuario supervisor con contraseña hasheada
-    sup_hash = hash_password("super123")
-    try:
-        c.execute(
-            "INSERT OR IGNORE INTO usuarios (username, password_hash, rol, activo) VALUES (?, ?, ?, ?)",
-            ("supervisor", sup_hash, "Supervisor", 1)
-        )
-    except Exception as e:
-        logger.warning(f"Error insertando supervisor: {e}")
-    
-    conn.commit()
-    logger.info("✅ Datos iniciales insertados")
-
-# -------------------- FUNCIONES DE AUTENTICACIÓN --------------------
-@safe_db_operation
-def autenticar_usuario(username, password):
-    """Verifica las credenciales usando hash"""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    password_hash = hash_password(password)
-    
-    c.execute("""
-        SELECT username, rol, empleado_id, activo 
-        FROM usuarios 
-        WHERE username = ? AND password_hash = ? AND activo = 1
-    """, (username, password_hash))
-    
-    usuario = c.fetchone()
-    conn.close()
-    
-    if usuario:
-        logger.info(f"✅ Usuario autenticado: {username}")
-        return {
-            'username': usuario[0],
-            'rol': usuario[1],
-            'empleado_id': usuario[2],
-            'activo': usuario[3]
-        }
-    
-    logger.warning(f"❌ Intento fallido de login: {username}")
-    return None
-
-@safe_db_operation
-def crear_usuario_db(username, password, rol):
-    """Crea usuario con contraseña hasheada"""
-    conn = get_connection()
-    c = conn.cursor()
-    try:
-        password_hash = hash_password(password)
-        c.execute(
-            "INSERT INTO usuarios (username, password_hash, rol, activo) VALUES (?, ?, ?, 1)",
-            (username, password_hash, rol)
-        )
-        conn.commit()
-        logger.info(f"✅ Usuario creado: {username}")
-        return True
-    except sqlite3.IntegrityError:
-        logger.warning(f"⚠️ Usuario ya existe: {username}")
-        return False
-    finally:
-        conn.close()
-
-@safe_db_operation
-def actualizar_ultimo_acceso(username):
-    """Actualiza la fecha de último acceso"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute(
-        "UPDATE usuarios SET ultimo_acceso = ? WHERE username = ?",
-        (datetime.now(), username)
-    )
-    conn.commit()
-    conn.close()
-
-# -------------------- FUNCIONES DE EMPLEADOS --------------------
-@safe_db_operation
-@st.cache_data(ttl=300)  # Cache por 5 minutos
-def cargar_empleados_db():
-    """Carga los nombres de empleados desde la base de datos"""
-    conn = get_connection()
-    df = pd.read_sql("SELECT nombre FROM empleados WHERE activo = 1 ORDER BY nombre", conn)
-    conn.close()
-    return df['nombre'].tolist() if not df.empty else []
-
-@safe_db_operation
-def cargar_empleados_con_departamento():
-    """Carga los empleados con su departamento"""
-    conn = get_connection()
-    df = pd.read_sql("SELECT id, nombre, departamento FROM empleados WHERE activo = 1 ORDER BY nombre", conn)
-    conn.close()
-    return df
-
-@safe_db_operation
-def guardar_empleado_db(nombre, departamento):
-    """Guarda un nuevo empleado en la base de datos"""
-    conn = get_connection()
-    c = conn.cursor()
-    try:
-        c.execute("SELECT activo FROM empleados WHERE nombre = ?", (nombre,))
-        resultado = c.fetchone()
-        
-        if resultado:
-            if resultado[0] == 0:
-                c.execute("UPDATE empleados SET activo = 1, departamento = ? WHERE nombre = ?", (departamento, nombre))
-                conn.commit()
-                st.cache_data.clear()
-                return True
-            else:
-                return False
-        else:
-            c.execute("INSERT INTO empleados (nombre, departamento, activo) VALUES (?, ?, 1)", (nombre, departamento))
-            conn.commit()
-            st.cache_data.clear()
-            return True
-    except Exception as e:
-        logger.error(f"Error guardando empleado: {e}")
-        return False
-    finally:
-        conn.close()
-
-@safe_db_operation
-def eliminar_empleado_db(nombre):
-    """Elimina (desactiva) un empleado de la base de datos"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE empleados SET activo = 0 WHERE nombre = ?", (nombre,))
-    conn.commit()
-    conn.close()
-    st.cache_data.clear()
-
-@safe_db_operation
-def obtener_empleados_por_departamento():
-    """Obtiene el conteo de empleados por departamento"""
-    conn = get_connection()
-    df = pd.read_sql("""
-        SELECT departamento, COUNT(*) as cantidad 
-        FROM empleados 
-        WHERE activo = 1 
-        GROUP BY departamento 
-        ORDER BY departamento
-    """, conn)
-    conn.close()
-    return df
-
-# -------------------- FUNCIONES DE VENTAS --------------------
-@safe_db_operation
-@st.cache_data(ttl=60)  # Cache por 1 minuto
-def obtener_ventas_recientes(empleado=None, limite=100):
-    """Obtiene ventas recientes con caché"""
-    conn = get_connection()
-    if empleado:
-        df = pd.read_sql("""
-            SELECT * FROM registros_ventas 
-            WHERE empleado = ? 
-            ORDER BY fecha DESC, fecha_registro DESC 
-            LIMIT ?
-        """, conn, params=(empleado, limite))
-    else:
-        df = pd.read_sql("""
-            SELECT * FROM registros_ventas 
-            ORDER BY fecha DESC, fecha_registro DESC 
-            LIMIT ?
-        """, conn, params=(limite,))
-    conn.close()
-    return df
-
-@safe_db_operation
-def guardar_venta(fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional):
-    """Guarda un registro de venta"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO registros_ventas
-        (fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional))
-    conn.commit()
-    conn.close()
-    st.cache_data.clear()
-
-@safe_db_operation
-def obtener_resumen_hoy(empleado, fecha):
-    """Obtiene resumen de ventas del día"""
-    conn = get_connection()
-    df = pd.read_sql("""
-        SELECT autoliquidable, oferta, marca_propia, producto_adicional
-        FROM registros_ventas 
-        WHERE empleado = ? AND fecha = ?
-    """, conn, params=(empleado, fecha))
-    conn.close()
-    return df
-
-# -------------------- FUNCIONES DE USUARIOS --------------------
-@safe_db_operation
-def cargar_usuarios_db():
-    """Carga los usuarios desde la base de datos"""
-    conn = get_connection()
-    df = pd.read_sql("""
-        SELECT u.username, u.rol, u.activo, u.ultimo_acceso, e.nombre as empleado
-        FROM usuarios u
-        LEFT JOIN empleados e ON u.empleado_id = e.id
-        ORDER BY u.username
-    """, conn)
-    conn.close()
-    return df
-
-@safe_db_operation
-def crear_usuario_empleado(username, password, empleado_nombre):
-    """Crea un usuario asociado a un empleado existente"""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    try:
-        c.execute("SELECT id FROM empleados WHERE nombre = ? AND activo = 1", (empleado_nombre,))
-        empleado = c.fetchone()
-        
-        if not empleado:
-            return False, "El empleado no existe"
-        
-        c.execute("SELECT id FROM usuarios WHERE empleado_id = ?", (empleado[0],))
-        if c.fetchone():
-            return False, "El empleado ya tiene un usuario asignado"
-        
-        password_hash = hash_password(password)
-        c.execute("""
-            INSERT INTO usuarios (username, password_hash, rol, empleado_id, activo) 
-            VALUES (?, ?, ?, ?, 1)
-        """, (username, password_hash, 'Vendedor', empleado[0]))
-        
-        conn.commit()
-        st.cache_data.clear()
-        return True, "Usuario creado exitosamente"
-    except sqlite3.IntegrityError:
-        return False, "El nombre de usuario ya existe"
-    except Exception as e:
-        logger.error(f"Error creando usuario empleado: {e}")
-        return False, f"Error: {e}"
-    finally:
-        conn.close()
-
-@safe_db_operation
-def obtener_empleados_sin_usuario():
-    """Obtiene lista de empleados que no tienen usuario asignado"""
-    conn = get_connection()
-    df = pd.read_sql("""
-        SELECT e.nombre 
-        FROM empleados e 
-        WHERE e.activo = 1 
-        AND e.id NOT IN (
-            SELECT u.empleado_id 
-            FROM usuarios u 
-            WHERE u.empleado_id IS NOT NULL AND u.activo = 1
-        )
-        ORDER BY e.nombre
-    """, conn)
-    conn.close()
-    return df['nombre'].tolist() if not df.empty else []
-
-@safe_db_operation
-def toggle_usuario_activo(username, activo):
-    """Activa o desactiva un usuario"""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE usuarios SET activo = ? WHERE username = ?", (activo, username))
-    conn.commit()
-    conn.close()
-    st.cache_data.clear()
-
-@safe_db_operation
-def eliminar_usuario_db(username):
-    """Elimina permanentemente un usuario de la base de datos"""
-    if username == "admin":
-        return False, "No se puede eliminar el usuario admin"
-    
-    conn = get_connection()
-    c = conn.cursor()
-    try:
-        c.execute("DELETE FROM usuarios WHERE username = ?", (username,))
-        conn.commit()
-        st.cache_data.clear()
-        return True, "Usuario eliminado"
-    except Exception as e:
-        logger.error(f"Error eliminando usuario: {e}")
-        return False, f"Error: {e}"
-    finally:
-        conn.close()
-
-# -------------------- FUNCIONES DE CONFIGURACIÓN --------------------
-ARCHIVO_CONFIG = "config.json"
-
-def cargar_config():
-    """Carga la configuración desde el archivo JSON"""
-    try:
-        if os.path.exists(ARCHIVO_CONFIG):
-            with open(ARCHIVO_CONFIG, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception as e:
-        logger.error(f"Error cargando config: {e}")
-    
-    return {
-        "tema": "Claro",
-        "idioma": "Español",
-        "productos_adicionales": ["Producto 1", "Producto 2", "Producto 3", "Producto 4"],
-        "productos_seleccionados": []
-    }
-
-def guardar_config(config):
-    """Guarda la configuración en el archivo JSON"""
-    try:
-        with open(ARCHIVO_CONFIG, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logger.error(f"Error guardando config: {e}")
-        return False
-
-# -------------------- FUNCIONES DE BACKUP --------------------
-def crear_backup():
-    """Crea backup en memoria para descarga"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    try:
-        if os.path.exists("ventas.db"):
-            # Leer el archivo en memoria
-            with open("ventas.db", "rb") as f:
-                db_content = f.read()
-            
-            # Comprimir en memoria
-            compressed = gzip.compress(db_content)
-            
-            return compressed, f"backup_ventas_{timestamp}.db.gz"
-    except Exception as e:
-        logger.error(f"Error creando backup: {e}")
-        return None, None
-def restaurar_backup(archivo):
-    """Restaura un backup"""
-    try:
-        # Descomprimir si está comprimido
-        if archivo.name.endswith('.gz'):
-            with gzip.open(archivo, 'rb') as f_in:
-                with open("ventas.db", 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-        else:
-            with open("ventas.db", 'wb') as f_out:
-                f_out.write(archivo.getbuffer())
-        
-        st.cache_data.clear()
-        logger.info("✅ Backup restaurado correctamente")
-        return True
-    except Exception as e:
-        logger.error(f"Error restaurando backup: {e}")
-        return False
-
-# -------------------- FUNCIONES DE UTILIDAD --------------------
-def obtener_fecha_espanol(fecha):
-    """Convierte una fecha a formato español"""
-    dias_semana = {
-        'Monday': 'lunes', 'Tuesday': 'martes', 'Wednesday': 'miércoles',
-        'Thursday': 'jueves', 'Friday': 'viernes', 'Saturday': 'sábado',
-        'Sunday': 'domingo'
-    }
-    meses = {
-        'January': 'enero', 'February': 'febrero', 'March': 'marzo',
-        'April': 'abril', 'May': 'mayo', 'June': 'junio',
-        'July': 'julio', 'August': 'agosto', 'September': 'septiembre',
-        'October': 'octubre', 'November': 'noviembre', 'December': 'diciembre'
-    }
-    
-    dia_ingles = fecha.strftime('%A')
-    mes_ingles = fecha.strftime('%B')
-    
-    dia_espanol = dias_semana.get(dia_ingles, dia_ingles).capitalize()
-    mes_espanol = meses.get(mes_ingles, mes_ingles)
-    
-    return f"{dia_espanol}, {fecha.day} de {mes_espanol} de {fecha.year}"
-
-def verificar_permiso(rol_requerido):
-    """Verifica si el usuario tiene el rol requerido"""
-    if 'usuario_rol' not in st.session_state:
-        return False
-    
-    if rol_requerido == "Vendedor":
-        return st.session_state.usuario_rol in ["Vendedor", "Supervisor", "Administrador"]
-    elif rol_requerido == "Supervisor":
-        return st.session_state.usuario_rol in ["Supervisor", "Administrador"]
-    elif rol_requerido == "Administrador":
-        return st.session_state.usuario_rol == "Administrador"
-    return False
-
-def cerrar_sesion():
-    """Cierra la sesión del usuario actual"""
-    for key in ['usuario_actual', 'usuario_rol', 'usuario_empleado_id', 'autenticado']:
-        if key in st.session_state:
-            del st.session_state[key]
-    st.session_state.pagina_actual = "Login"
-    st.cache_data.clear()
-    st.rerun()
-
-def init_session_state():
-    """Inicializa el estado de sesión"""
-    defaults = {
-        'empleados': [],
-        'menu_visible': True,
-        'config': cargar_config(),
-        'pagina_actual': "Login",
-        'autenticado': False,
-        'usuario_actual': None,
-        'usuario_rol': None,
-        'usuario_empleado_id': None
-    }
-    
-    for key, value in defaults.items():
-        if key not in st.session_state:
-            st.session_state[key] = value
-
-# -------------------- PÁGINAS DE LA APLICACIÓN --------------------
-
-def pagina_login():
-    """Página de inicio de sesión"""
-    
-    # CSS específico solo para el login
-    st.markdown("""
-    <style>
-    /* Reset para el contenedor principal */
-    .main > div {
-        padding: 0 !important;
-    }
-    
-    /* Ocultar elementos de Streamlit que interfieren */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Estilos del login */
-    .login-container {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        height: 100vh;
-        width: 100vw;
-        position: fixed;
-        top: 0;
-        left: 0;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        margin: 0;
-        padding: 0;
-    }
-    
-    .login-box {
-        background: white;
-        padding: 2.5rem;
-        border-radius: 20px;
-        box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-        width: 90%;
-        max-width: 400px;
-        animation: slideUp 0.5s ease;
-    }
-    
-    @keyframes slideUp {
-        from {
-            opacity: 0;
-            transform: translateY(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    .login-header {
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    
-    .login-header h1 {
-        color: #667eea;
-        font-size: 1.8rem;
-        margin: 0.5rem 0 0 0;
-        font-weight: 600;
-    }
-    
-    .login-header p {
-        color: #666;
-        margin: 0.5rem 0 0 0;
-        font-size: 0.9rem;
-    }
-    
-    .login-icon {
-        font-size: 3.5rem;
-        margin-bottom: 0.5rem;
-    }
-    
-    /* Ocultar el texto de "Powered by Streamlit" */
-    .stApp [data-testid="stDecoration"] {
-        display: none;
-    }
-    
-    /* Asegurar que el formulario se vea bien */
-    .stForm {
-        background-color: transparent !important;
-        padding: 0 !important;
-        border: none !important;
-    }
-    
-    .stForm [data-testid="stForm"] {
-        border: none !important;
-        padding: 0 !important;
-        background-color: transparent !important;
-    }
-    
-    /* Estilos para los inputs */
-    .stTextInput input {
-        border-radius: 10px !important;
-        border: 1px solid #e0e0e0 !important;
-        padding: 0.75rem !important;
-    }
-    
-    .stTextInput input:focus {
-        border-color: #667eea !important;
-        box-shadow: 0 0 0 2px rgba(102, 126, 234, 0.1) !important;
-    }
-    
-    /* Estilo para el botón */
-    .stButton button {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 10px !important;
-        padding: 0.75rem 2rem !important;
-        font-weight: 600 !important;
-        font-size: 1rem !important;
-        transition: transform 0.2s !important;
-        width: 100% !important;
-    }
-    
-    .stButton button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3) !important;
-    }
-    
-    /* Ajustar el expander */
-    .streamlit-expanderHeader {
-        color: #666 !important;
-        background-color: #f8f9fa !important;
-        border-radius: 10px !important;
-        border: none !important;
-    }
-    
-    /* Ocultar elementos flotantes */
-    .stAlert {
-        margin-top: 1rem !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Contenedor principal del login
-    st.markdown('<div class="login-container">', unsafe_allow_html=True)
-    st.markdown('<div class="login-box">', unsafe_allow_html=True)
-    
-    # Header
-    st.markdown("""
-    <div class="login-header">
-        <div class="login-icon">🏥</div>
-        <h1>Locatel Restrepo</h1>
-        <p>Sistema de Gestión de Ventas</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Formulario de login
-    with st.form("login_form", clear_on_submit=False):
-        username = st.text_input(
-            "👤 Usuario",
-            placeholder="Ingresa tu usuario",
-            key="login_username"
-        )
-        
-        password = st.text_input(
-            "🔑 Contraseña",
-            type="password",
-            placeholder="Ingresa tu contraseña",
-            key="login_password"
-        )
-        
-        submitted = st.form_submit_button(
-            "Iniciar Sesión",
-            use_container_width=True,
-            type="primary"
-        )
-        
-        if submitted:
-            if username and password:
-                usuario = autenticar_usuario(username, password)
-                
-                if usuario:
-                    st.session_state.usuario_actual = usuario['username']
-                    st.session_state.usuario_rol = usuario['rol']
-                    st.session_state.usuario_empleado_id = usuario['empleado_id']
-                    st.session_state.autenticado = True
-                    
-                    actualizar_ultimo_acceso(username)
-                    
-                    if usuario['rol'] == 'Vendedor':
-                        st.session_state.pagina_actual = "Registro Ventas"
-                    else:
-                        st.session_state.pagina_actual = "Dashboard"
-                    
-                    st.rerun()
-                else:
-                    st.error("❌ Usuario o contraseña incorrectos")
-            else:
-                st.warning("⚠️ Por favor ingresa todos los campos")
-    
-    # Credenciales de prueba
-    with st.expander("ℹ️ Credenciales de prueba"):
-        st.markdown("""
-        **Administrador:** admin / admin123  
-        **Supervisor:** supervisor / super123  
-        """)
-    
-    st.markdown('</div></div>', unsafe_allow_html=True)
-
-def pagina_registro_ventas():
-    """Página para registro de ventas"""
-    if not verificar_permiso("Vendedor"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    # Obtener información del empleado
-    if st.session_state.usuario_empleado_id:
-        conn = get_connection()
-        df = pd.read_sql("""
-            SELECT nombre, departamento 
-            FROM empleados 
-            WHERE id = ? AND activo = 1
-        """, conn, params=(st.session_state.usuario_empleado_id,))
-        conn.close()
-        
-        if df.empty:
-            st.error("❌ No se encontró información del empleado")
-            return
-        
-        empleado = df.iloc[0]
-        empleado_nombre = empleado['nombre']
-        departamento = empleado['departamento']
-    else:
-        st.error("❌ Usuario no asociado a un empleado")
-        return
-    
-    # CSS personalizado
-    st.markdown("""
-    <style>
-    .welcome-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        color: white;
-        margin-bottom: 2rem;
-        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-        position: relative;
-        overflow: hidden;
-    }
-    .welcome-card::after {
-        content: '🏥';
-        position: absolute;
-        right: 20px;
-        bottom: 20px;
-        font-size: 5rem;
-        opacity: 0.2;
-    }
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.05);
-        text-align: center;
-        border: 1px solid #f0f0f0;
-        transition: transform 0.3s ease;
-    }
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
-    }
-    .metric-value {
-        font-size: 2rem;
-        font-weight: 700;
-        margin: 0;
-        background: linear-gradient(135deg, #667eea, #764ba2);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    .metric-label {
-        color: #666;
-        font-size: 0.9rem;
-        margin: 0;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    .form-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 20px;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.05);
-        border: 1px solid #f0f0f0;
-        margin-bottom: 1rem;
-    }
-    .history-card {
-        background: white;
-        padding: 1rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-        margin-bottom: 0.5rem;
-        border-left: 4px solid #667eea;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Bienvenida
-    fecha_espanol = obtener_fecha_espanol(datetime.now())
-    depto_emoji = {
-        "Droguería": "💊",
-        "Equipos Médicos": "🏥",
-        "Tienda": "🏪",
-        "Cajas": "💰"
-    }.get(departamento, "👤")
-    
-    st.markdown(f"""
-    <div class="welcome-card">
-        <h1>¡Hola, {empleado_nombre}! 👋</h1>
-        <p>{depto_emoji} {departamento} • {fecha_espanol}</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Layout principal
-    col_registro, col_resumen = st.columns([1.2, 0.8])
-    
-    with col_registro:
-        with st.container():
-            st.markdown('<div class="form-card">', unsafe_allow_html=True)
-            st.markdown("### 📝 Registrar Ventas del Día")
-            
-            fecha = st.date_input("📅 Fecha", value=datetime.now())
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                autoliquidable = st.number_input(
-                    "💊 Autoliquidable",
-                    min_value=0,
-                    step=1,
-                    value=0,
-                    help="Productos autoliquidables"
-                )
-                marca_propia = st.number_input(
-                    "⭐ Marca Propia",
-                    min_value=0,
-                    step=1,
-                    value=0,
-                    help="Productos de marca propia"
-                )
-            
-            with col2:
-                oferta = st.number_input(
-                    "🏷️ Oferta Semana",
-                    min_value=0,
-                    step=1,
-                    value=0,
-                    help="Productos en oferta"
-                )
-                producto_adicional = st.number_input(
-                    "➕ Producto Adicional",
-                    min_value=0,
-                    step=1,
-                    value=0,
-                    help="Productos adicionales"
-                )
-            
-            total = autoliquidable + oferta + marca_propia + producto_adicional
-            
-            st.markdown(f"""
-            <div style="
-                background: linear-gradient(135deg, #667eea20 0%, #764ba220 100%);
-                padding: 1rem;
-                border-radius: 10px;
-                margin: 1rem 0;
-                text-align: center;
-            ">
-                <h3 style="color: #667eea; margin: 0;">Total: {total} unidades</h3>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            if st.button("💾 Guardar Registro", use_container_width=True, type="primary"):
-                if total > 0:
-                    guardar_venta(
-                        fecha, empleado_nombre,
-                        autoliquidable, oferta,
-                        marca_propia, producto_adicional
-                    )
-                    st.success("✅ ¡Ventas registradas exitosamente!")
-                    st.balloons()
-                    st.rerun()
-                else:
-                    st.warning("⚠️ Debes registrar al menos una venta")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-    
-    with col_resumen:
-        # Resumen del día
-        st.markdown('<div class="form-card">', unsafe_allow_html=True)
-        st.markdown("### 📊 Resumen de Hoy")
-        
-        hoy = datetime.now().date()
-        df_hoy = obtener_resumen_hoy(empleado_nombre, hoy)
-        
-        if not df_hoy.empty:
-            total_auto = df_hoy['autoliquidable'].sum()
-            total_ofer = df_hoy['oferta'].sum()
-            total_marca = df_hoy['marca_propia'].sum()
-            total_prod = df_hoy['producto_adicional'].sum()
-            total_general = total_auto + total_ofer + total_marca + total_prod
-            
-            col_m1, col_m2 = st.columns(2)
-            
-            with col_m1:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-value">{int(total_auto)}</div>
-                    <div class="metric-label">💊 Auto</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{int(total_marca)}</div>
-                    <div class="metric-label">⭐ Marca</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col_m2:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-value">{int(total_ofer)}</div>
-                    <div class="metric-label">🏷️ Oferta</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{int(total_prod)}</div>
-                    <div class="metric-label">➕ Adic</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown(f"""
-            <div style="
-                background: linear-gradient(135deg, #00aa0020 0%, #00cc0020 100%);
-                padding: 1rem;
-                border-radius: 10px;
-                margin-top: 1rem;
-                text-align: center;
-            ">
-                <h3 style="color: #00aa00; margin: 0;">Total Día: {int(total_general)}</h3>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.info("📭 No hay registros hoy")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Últimos registros
-        st.markdown('<div class="form-card">', unsafe_allow_html=True)
-        st.markdown("### 📋 Últimos Registros")
-        
-        df_recientes = obtener_ventas_recientes(empleado_nombre, 5)
-        
-        if not df_recientes.empty:
-            for _, row in df_recientes.iterrows():
-                fecha_str = datetime.strptime(row['fecha'], '%Y-%m-%d').strftime('%d/%m')
-                st.markdown(f"""
-                <div class="history-card">
-                    <strong>{fecha_str}</strong><br>
-                    💊 {int(row['autoliquidable'])} | 🏷️ {int(row['oferta'])} | 
-                    ⭐ {int(row['marca_propia'])} | ➕ {int(row['producto_adicional'])}
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.info("No hay registros anteriores")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-
-def pagina_dashboard():
-    """Dashboard de ventas"""
-    if not verificar_permiso("Supervisor"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    st.title("📊 Dashboard de Ventas")
-    
-    # Filtros
-    col_filtro1, col_filtro2, col_filtro3 = st.columns(3)
-    
-    with col_filtro1:
-        fecha_inicio = st.date_input("Fecha inicio", value=datetime.now().replace(day=1))
-    
-    with col_filtro2:
-        fecha_fin = st.date_input("Fecha fin", value=datetime.now())
-    
-    with col_filtro3:
-        empleados = cargar_empleados_db()
-        empleados.insert(0, "Todos")
-        empleado_filtro = st.selectbox("Empleado", empleados)
-    
-    # Obtener datos
-    conn = get_connection()
-    if empleado_filtro == "Todos":
-        df = pd.read_sql("""
-            SELECT * FROM registros_ventas 
-            WHERE fecha BETWEEN ? AND ?
-            ORDER BY fecha DESC
-        """, conn, params=(fecha_inicio, fecha_fin))
-    else:
-        df = pd.read_sql("""
-            SELECT * FROM registros_ventas 
-            WHERE fecha BETWEEN ? AND ? AND empleado = ?
-            ORDER BY fecha DESC
-        """, conn, params=(fecha_inicio, fecha_fin, empleado_filtro))
-    conn.close()
-    
-    if not df.empty:
-        # Métricas principales
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        with col1:
-            st.metric("Total Ventas", len(df))
-        with col2:
-            st.metric("💊 Autoliquidable", int(df['autoliquidable'].sum()))
-        with col3:
-            st.metric("🏷️ Oferta", int(df['oferta'].sum()))
-        with col4:
-            st.metric("⭐ Marca Propia", int(df['marca_propia'].sum()))
-        with col5:
-            st.metric("➕ Adicional", int(df['producto_adicional'].sum()))
-        
-        # Gráficos
-        tab1, tab2, tab3 = st.tabs(["📊 Por Empleado", "📈 Tendencia", "📋 Detalle"])
-        
-        with tab1:
-            ventas_empleado = df.groupby("empleado")[["autoliquidable", "oferta", "marca_propia", "producto_adicional"]].sum().reset_index()
-            ventas_empleado['total'] = ventas_empleado[["autoliquidable", "oferta", "marca_propia", "producto_adicional"]].sum(axis=1)
-            ventas_empleado = ventas_empleado.sort_values('total', ascending=True)
-            
-            fig = px.bar(
-                ventas_empleado,
-                y='empleado',
-                x=['autoliquidable', 'oferta', 'marca_propia', 'producto_adicional'],
-                title="Ventas por Empleado",
-                labels={'value': 'Cantidad', 'empleado': 'Empleado', 'variable': 'Tipo'},
-                barmode='stack'
-            )
-            fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab2:
-            ventas_fecha = df.groupby("fecha")[["autoliquidable", "oferta", "marca_propia", "producto_adicional"]].sum().reset_index()
-            
-            fig = px.line(
-                ventas_fecha,
-                x='fecha',
-                y=['autoliquidable', 'oferta', 'marca_propia', 'producto_adicional'],
-                title="Tendencia de Ventas",
-                labels={'value': 'Cantidad', 'fecha': 'Fecha', 'variable': 'Tipo'}
-            )
-            fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab3:
-            st.dataframe(
-                df[['fecha', 'empleado', 'autoliquidable', 'oferta', 'marca_propia', 'producto_adicional']],
-                use_container_width=True,
-                hide_index=True
-            )
-    else:
-        st.info("📭 No hay datos para el período seleccionado")
-
-def pagina_empleados():
-    """Administración de empleados"""
-    if not verificar_permiso("Supervisor"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    st.title("👥 Administración de Empleados")
-    
-    tab1, tab2, tab3 = st.tabs(["📝 Registrar Ventas", "➕ Agregar Empleado", "📊 Estadísticas"])
-    
-    with tab1:
-        st.subheader("📝 Registro de Ventas para Empleados")
-        
-        col_fecha, col_emp = st.columns(2)
-        
-        with col_fecha:
-            fecha = st.date_input("📅 Fecha", key="fecha_admin")
-        
-        with col_emp:
-            empleados_df = cargar_empleados_con_departamento()
-            if not empleados_df.empty:
-                empleado = st.selectbox(
-                    "👤 Empleado",
-                    empleados_df['nombre'].tolist(),
-                    key="emp_admin"
-                )
-            else:
-                st.warning("No hay empleados registrados")
-                empleado = None
-        
-        if empleado:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                autoliquidable = st.number_input("💊 Autoliquidable", min_value=0, step=1, key="auto_admin")
-                oferta = st.number_input("🏷️ Oferta", min_value=0, step=1, key="ofer_admin")
-            
-            with col2:
-                marca_propia = st.number_input("⭐ Marca Propia", min_value=0, step=1, key="marca_admin")
-                producto = st.number_input("➕ Adicional", min_value=0, step=1, key="prod_admin")
-            
-            if st.button("💾 Guardar Registro", use_container_width=True, type="primary"):
-                if (autoliquidable + oferta + marca_propia + producto) > 0:
-                    guardar_venta(fecha, empleado, autoliquidable, oferta, marca_propia, producto)
-                    st.success("✅ Registro guardado")
-                    st.rerun()
-                else:
-                    st.warning("⚠️ Debe registrar al menos una venta")
-    
-    with tab2:
-        st.subheader("➕ Agregar Nuevo Empleado")
-        
-        with st.form("form_empleado"):
-            nuevo_empleado = st.text_input("Nombre completo", placeholder="Ej: Juan Pérez")
-            departamento = st.selectbox(
-                "Departamento",
-                ["Droguería", "Equipos Médicos", "Tienda", "Cajas"]
-            )
-            
-            if st.form_submit_button("Agregar Empleado", use_container_width=True):
-                if nuevo_empleado:
-                    if guardar_empleado_db(nuevo_empleado, departamento):
-                        st.success(f"✅ Empleado '{nuevo_empleado}' agregado")
-                        st.rerun()
-                    else:
-                        st.error("❌ El empleado ya existe")
-                else:
-                    st.warning("⚠️ Ingrese un nombre")
-        
-        st.markdown("---")
-        st.subheader("📋 Empleados Activos")
-        
-        empleados_df = cargar_empleados_con_departamento()
-        if not empleados_df.empty:
-            for _, row in empleados_df.iterrows():
-                col_emp, col_depto, col_btn = st.columns([3, 2, 1])
-                
-                with col_emp:
-                    st.write(f"• {row['nombre']}")
-                
-                with col_depto:
-                    color = {
-                        "Droguería": "🔵",
-                        "Equipos Médicos": "🟢",
-                        "Tienda": "🟠",
-                        "Cajas": "🟣"
-                    }.get(row['departamento'], "⚪")
-                    st.write(f"{color} {row['departamento']}")
-                
-                with col_btn:
-                    if st.button("🗑️", key=f"del_{row['nombre']}"):
-                        eliminar_empleado_db(row['nombre'])
-                        st.success(f"✅ Empleado eliminado")
-                        st.rerun()
-        else:
-            st.info("📭 No hay empleados activos")
-    
-    with tab3:
-        st.subheader("📊 Estadísticas por Departamento")
-        
-        deptos_df = obtener_empleados_por_departamento()
-        
-        if not deptos_df.empty:
-            col_graf, col_tabla = st.columns(2)
-            
-            with col_graf:
-                fig = px.pie(
-                    deptos_df,
-                    values='cantidad',
-                    names='departamento',
-                    title="Distribución por Departamento",
-                    color_discrete_sequence=px.colors.qualitative.Set3
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col_tabla:
-                st.dataframe(
-                    deptos_df,
-                    use_container_width=True,
-                    hide_index=True,
-                    column_config={
-                        "departamento": "Departamento",
-                        "cantidad": "Cantidad"
-                    }
-                )
-        else:
-            st.info("No hay datos de departamentos")
-
-def pagina_usuarios():
-    """Administración de usuarios"""
-    if not verificar_permiso("Administrador"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    st.title("👤 Administración de Usuarios")
-    
-    tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "👥 Gestión", "➕ Crear Usuario"])
-    
-    with tab1:
-        usuarios_df = cargar_usuarios_db()
-        
-        if not usuarios_df.empty:
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Usuarios", len(usuarios_df))
-            with col2:
-                admin_count = len(usuarios_df[usuarios_df['rol'] == 'Administrador'])
-                st.metric("Administradores", admin_count)
-            with col3:
-                sup_count = len(usuarios_df[usuarios_df['rol'] == 'Supervisor'])
-                st.metric("Supervisores", sup_count)
-            with col4:
-                ven_count = len(usuarios_df[usuarios_df['rol'] == 'Vendedor'])
-                st.metric("Vendedores", ven_count)
-            
-            col_graf1, col_graf2 = st.columns(2)
-            
-            with col_graf1:
-                roles_df = usuarios_df['rol'].value_counts().reset_index()
-                roles_df.columns = ['Rol', 'Cantidad']
-                
-                fig = px.pie(
-                    roles_df,
-                    values='Cantidad',
-                    names='Rol',
-                    title="Distribución por Rol",
-                    color='Rol',
-                    color_discrete_map={
-                        'Administrador': '#ff4444',
-                        'Supervisor': '#ffaa00',
-                        'Vendedor': '#00aa00'
-                    }
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col_graf2:
-                status_df = usuarios_df['activo'].value_counts().reset_index()
-                status_df.columns = ['Estado', 'Cantidad']
-                status_df['Estado'] = status_df['Estado'].map({1: 'Activos', 0: 'Inactivos'})
-                
-                fig = px.bar(
-                    status_df,
-                    x='Estado',
-                    y='Cantidad',
-                    title="Estado de Usuarios",
-                    color='Estado',
-                    color_discrete_map={'Activos': '#00aa00', 'Inactivos': '#ff4444'}
-                )
-                st.plotly_chart(fig, use_container_width=True)
-    
-    with tab2:
-        usuarios_df = cargar_usuarios_db()
-        
-        if not usuarios_df.empty:
-            for _, row in usuarios_df.iterrows():
-                with st.container():
-                    cols = st.columns([2, 1, 1, 1, 1])
-                    
-                    with cols[0]:
-                        st.write(f"**{row['username']}**")
-                        if row['empleado']:
-                            st.caption(f"👤 {row['empleado']}")
-                    
-                    with cols[1]:
-                        rol_color = {
-                            'Administrador': '🔴',
-                            'Supervisor': '🟡',
-                            'Vendedor': '🟢'
-                        }.get(row['rol'], '⚪')
-                        st.write(f"{rol_color} {row['rol']}")
-                    
-                    with cols[2]:
-                        estado = "✅ Activo" if row['activo'] else "❌ Inactivo"
-                        st.write(estado)
-                    
-                    with cols[3]:
-                        if row['ultimo_acceso']:
-                            fecha = row['ultimo_acceso'][:10]
-                            st.write(f"📅 {fecha}")
-                        else:
-                            st.write("📅 Nunca")
-                    
-                    with cols[4]:
-                        if row['username'] != 'admin':
-                            if row['activo']:
-                                if st.button("🔌", key=f"deact_{row['username']}", help="Desactivar"):
-                                    toggle_usuario_activo(row['username'], 0)
-                                    st.rerun()
-                            else:
-                                if st.button("🔓", key=f"act_{row['username']}", help="Activar"):
-                                    toggle_usuario_activo(row['username'], 1)
-                                    st.rerun()
-                            
-                            if st.button("🗑️", key=f"del_{row['username']}", help="Eliminar"):
-                                exito, msg = eliminar_usuario_db(row['username'])
-                                if exito:
-                                    st.success(msg)
-                                    st.rerun()
-                                else:
-                                    st.error(msg)
-                    
-                    st.divider()
-        else:
-            st.info("No hay usuarios registrados")
-    
-    with tab3:
-        opcion = st.radio(
-            "Tipo de usuario",
-            ["Vendedor (desde empleado)", "Administrador/Supervisor"],
-            horizontal=True
-        )
-        
-        if opcion == "Vendedor (desde empleado)":
-            empleados_sin_usuario = obtener_empleados_sin_usuario()
-            
-            if empleados_sin_usuario:
-                with st.form("form_vendedor"):
-                    empleado = st.selectbox("Seleccionar Empleado", empleados_sin_usuario)
-                    username = st.text_input("Nombre de Usuario", placeholder="ej: jperez")
-                    
-                    col_pass1, col_pass2 = st.columns([3, 1])
-                    with col_pass1:
-                        password = st.text_input("Contraseña", type="password")
-                    with col_pass2:
-                        if st.form_submit_button("🎲 Generar"):
-                            sugerida = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
-                            st.session_state['sugerida'] = sugerida
-                    
-                    if 'sugerida' in st.session_state:
-                        st.info(f"Contraseña sugerida: `{st.session_state['sugerida']}`")
-                    
-                    if st.form_submit_button("Crear Usuario", use_container_width=True):
-                        if username and password:
-                            if len(password) >= 6:
-                                exito, msg = crear_usuario_empleado(username, password, empleado)
-                                if exito:
-                                    st.success(msg)
-                                    st.balloons()
-                                    st.rerun()
-                                else:
-                                    st.error(msg)
-                            else:
-                                st.error("La contraseña debe tener al menos 6 caracteres")
-                        else:
-                            st.warning("Todos los campos son obligatorios")
-            else:
-                st.success("✅ Todos los empleados tienen usuario")
-        
-        else:
-            with st.form("form_admin"):
-                username = st.text_input("Usuario", placeholder="ej: admin2")
-                password = st.text_input("Contraseña", type="password")
-                rol = st.selectbox("Rol", ["Administrador", "Supervisor"])
-                
-                if st.form_submit_button("Crear Usuario", use_container_width=True):
-                    if username and password:
-                        if len(password) >= 6:
-                            if crear_usuario_db(username, password, rol):
-                                st.success(f"✅ Usuario {username} creado")
-                                st.balloons()
-                                st.rerun()
-                            else:
-                                st.error("❌ El usuario ya existe")
-                        else:
-                            st.error("La contraseña debe tener al menos 6 caracteres")
-                    else:
-                        st.warning("Todos los campos son obligatorios")
-
-def pagina_config():
-    """Configuración del sistema"""
-    if not verificar_permiso("Administrador"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    st.title("⚙️ Configuración del Sistema")
-    
-    tab1, tab2 = st.tabs(["🎨 Apariencia", "📦 Productos"])
-    
-    with tab1:
-        st.subheader("Configuración de Apariencia")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            tema = st.selectbox(
-                "Tema",
-                ["Claro", "Oscuro", "Sistema"],
-                index=["Claro", "Oscuro", "Sistema"].index(
-                    st.session_state.config.get("tema", "Claro")
-                )
-            )
-        
-        with col2:
-            idioma = st.selectbox(
-                "Idioma",
-                ["Español", "Inglés"],
-                index=["Español", "Inglés"].index(
-                    st.session_state.config.get("idioma", "Español")
-                )
-            )
-        
-        if st.button("Guardar configuración de apariencia", use_container_width=True):
-            st.session_state.config["tema"] = tema
-            st.session_state.config["idioma"] = idioma
-            if guardar_config(st.session_state.config):
-                st.success("✅ Configuración guardada")
-            else:
-                st.error("❌ Error al guardar")
-    
-    with tab2:
-        st.subheader("Productos Adicionales")
-        
-        productos = st.session_state.config.get("productos_adicionales", [])
-        
-        with st.form("form_productos"):
-            nuevos_productos = st.text_area(
-                "Lista de productos (uno por línea)",
-                value="\n".join(productos),
-                height=150,
-                help="Ingresa un producto por línea"
-            )
-            
-            if st.form_submit_button("Guardar productos", use_container_width=True):
-                lista_productos = [p.strip() for p in nuevos_productos.split("\n") if p.strip()]
-                st.session_state.config["productos_adicionales"] = lista_productos
-                if guardar_config(st.session_state.config):
-                    st.success(f"✅ {len(lista_productos)} productos guardados")
-                else:
-                    st.error("❌ Error al guardar")
-
-def pagina_backup():
-    """Backup y restauración"""
-    if not verificar_permiso("Administrador"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    st.title("💾 Backup y Restauración")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📀 Crear Backup")
-        st.write("Crea una copia de seguridad de la base de datos")
-        
-        if st.button("Crear Backup ahora", use_container_width=True, type="primary"):
-            with st.spinner("Creando backup..."):
-                backup_file = crear_backup()
-                
-                if backup_file and os.path.exists(backup_file):
-                    with open(backup_file, "rb") as f:
-                        btn = st.download_button(
-                            label="📥 Descargar Backup",
-                            data=f,
-                            file_name=backup_file,
-                            mime="application/gzip",
-                            use_container_width=True
-                        )
-                    st.success(f"✅ Backup creado: {backup_file}")
-                else:
-                    st.error("❌ Error al crear backup")
-    
-    with col2:
-        st.subheader("🔄 Restaurar Backup")
-        st.write("Restaura una copia de seguridad existente")
-        
-        archivo = st.file_uploader(
-            "Seleccionar archivo de backup",
-            type=['db', 'gz'],
-            help="Archivos .db o .gz"
-        )
-        
-        if archivo is not None:
-            if st.button("Restaurar", use_container_width=True, type="primary"):
-                with st.spinner("Restaurando backup..."):
-                    if restaurar_backup(archivo):
-                        st.success("✅ Backup restaurado correctamente")
-                        st.info("🔄 La aplicación se reiniciará")
-                        st.rerun()
-                    else:
-                        st.error("❌ Error al restaurar backup")
-
-def pagina_sistema():
-    """Información del sistema"""
-    if not verificar_permiso("Administrador"):
-        st.error("❌ No tienes permisos para acceder a esta página")
-        return
-    
-    st.title("🖥️ Información del Sistema")
-    
-    # Obtener estadísticas
-    conn = get_connection()
-    total_ventas = pd.read_sql("SELECT COUNT(*) as total FROM registros_ventas", conn)['total'].iloc[0]
-    total_empleados = pd.read_sql("SELECT COUNT(*) as total FROM empleados WHERE activo = 1", conn)['total'].iloc[0]
-    total_usuarios = pd.read_sql("SELECT COUNT(*) as total FROM usuarios", conn)['total'].iloc[0]
-    conn.close()
-    
-    # Métricas
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Versión", "2.0.0")
-        st.metric("Python", "3.9+")
-    
-    with col2:
-        st.metric("Streamlit", "1.28.1")
-        st.metric("Base de datos", "SQLite 3")
-    
-    with col3:
-        st.metric("Registros ventas", total_ventas)
-        st.metric("Empleados activos", total_empleados)
-    
-    with col4:
-        st.metric("Usuarios", total_usuarios)
-        st.metric("Usuario actual", st.session_state.usuario_actual)
-    
-    # Información de archivos
-    st.subheader("📁 Archivos del Sistema")
-    
-    col_files1, col_files2 = st.columns(2)
-    
-    with col_files1:
-        if os.path.exists("ventas.db"):
-            size_db = os.path.getsize("ventas.db") / 1024
-            st.metric("Base de datos", f"{size_db:.1f} KB")
-        
-        if os.path.exists("app.log"):
-            size_log = os.path.getsize("app.log") / 1024
-            st.metric("Archivo de log", f"{size_log:.1f} KB")
-    
-    with col_files2:
-        if os.path.exists("config.json"):
-            size_config = os.path.getsize("config.json") / 1024
-            st.metric("Configuración", f"{size_config:.1f} KB")
-        
-        backups = list(Path(".").glob("backup_*.gz"))
-        st.metric("Backups disponibles", len(backups))
-    
-    # Ver logs
-    with st.expander("📋 Ver logs del sistema"):
-        if os.path.exists("app.log"):
-            with open("app.log", "r") as f:
-                lines = f.readlines()[-50:]  # Últimas 50 líneas
-                st.code("".join(lines), language="text")
-        else:
-            st.info("No hay logs disponibles")
-
-# -------------------- MENÚ LATERAL --------------------
-def sidebar_menu():
-    """Muestra el menú lateral"""
-    with st.sidebar:
-        # Información del usuario
-        if st.session_state.autenticado:
-            color_rol = {
-                "Administrador": "#ff4444",
-                "Supervisor": "#ffaa00",
-                "Vendedor": "#00aa00"
-            }.get(st.session_state.usuario_rol, "#666")
-            
-            st.markdown(f"""
-            <div style="
-                background: linear-gradient(135deg, {color_rol}20 0%, {color_rol}10 100%);
-                padding: 15px;
-                border-radius: 10px;
-                margin-bottom: 20px;
-                border-left: 5px solid {color_rol};
-            ">
-                <strong style="color: {color_rol};">👤 {st.session_state.usuario_actual}</strong><br>
-                <span style="color: {color_rol};">{st.session_state.usuario_rol}</span><br>
-                <small>{datetime.now().strftime('%H:%M')} - {datetime.now().strftime('%d/%m/%Y')}</small>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.markdown("### 📋 Menú")
-            st.markdown("---")
-            
-            # Definir menú según rol
-            if st.session_state.usuario_rol == "Vendedor":
-                menu_items = {
-                    "Registro Ventas": "📝",
-                }
-            elif st.session_state.usuario_rol == "Supervisor":
-                menu_items = {
-                    "Registro Ventas": "📝",
-                    "Dashboard": "📊",
-                    "Empleados": "👥"
-                }
-            else:  # Administrador
-                menu_items = {
-                    "Dashboard": "📊",
-                    "Empleados": "👥",
-                    "Usuarios": "👤",
-                    "Configuración": "⚙️",
-                    "Backup": "💾",
-                    "Sistema": "🖥️"
-                }
-            
-            # Botones del menú
-            for page, icon in menu_items.items():
-                if st.button(
-                    f"{icon} {page}",
-                    key=f"menu_{page}",
-                    use_container_width=True,
-                    type="primary" if st.session_state.pagina_actual == page else "secondary"
-                ):
-                    st.session_state.pagina_actual = page
-                    st.rerun()
-            
-            st.markdown("---")
-            
-            # Botón de reinicio (solo admin)
-            if st.session_state.usuario_rol == "Administrador":
-                if st.button("🔄 Reiniciar App", use_container_width=True):
-                    st.cache_data.clear()
-                    st.cache_resource.clear()
-                    st.rerun()
-            
-            # Cerrar sesión
-            if st.button("🚪 Cerrar Sesión", use_container_width=True):
-                cerrar_sesion()
-            
-            st.caption("© 2024 Locatel Restrepo")
-
-# -------------------- MAIN --------------------
-def main():
-    """Función principal de la aplicación"""
-    
-    # Verificar entorno
-    issues = check_environment()
-    if issues:
-        for issue in issues:
-            st.warning(f"⚠️ {issue}")
-    
-    # Inicializar estado
-    init_session_state()
-    
-    # Inicializar base de datos
-    create_tables()
-    
-    # Mostrar menú lateral si está autenticado
-    if st.session_state.autenticado:
-        sidebar_menu()
-    
-    # Navegación
-    if not st.session_state.autenticado:
-        pagina_login()
-    else:
-        if st.session_state.pagina_actual == "Login":
-            pagina_login()
-        elif st.session_state.pagina_actual == "Registro Ventas":
-            pagina_registro_ventas()
-        elif st.session_state.pagina_actual == "Dashboard":
-            pagina_dashboard()
-        elif st.session_state.pagina_actual == "Empleados":
-            pagina_empleados()
-        elif st.session_state.pagina_actual == "Usuarios":
-            pagina_usuarios()
-        elif st.session_state.pagina_actual == "Configuración":
-            pagina_config()
-        elif st.session_state.pagina_actual == "Backup":
-            pagina_backup()
-        elif st.session_state.pagina_actual == "Sistema":
-            pagina_sistema()
-
-if __name__ == "__main__":
+import time
+_INICIO_SCRIPT = time.perf_counter()
+
+import streamlit as st
+import json
+import os
+from datetime import datetime, date, timedelta
+import logging
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+import importlib
+import sys
+import threading
+import random
+import string
+from pathlib import Path
+from types import MappingProxyType
+
+import repositorio
+import reportes
+import trabajos
+from repositorio import (
+    CATEGORIAS, COSTO_SCRYPT, RETENCION_CAMBIOS_DIAS, SCRYPT_P, SCRYPT_R,
+    actualizar_ultimo_acceso, autenticar_usuario, benchmark_costos_hash, check_environment,
+    crear_backup, crear_sesion_persistente, crear_usuario_db, crear_usuario_empleado,
+    cursor_cambios_vigente, descongelar_config, eliminar_empleado_db, eliminar_usuario_db,
+    get_connection, guardar_config, guardar_empleado_db, guardar_venta, init_database,
+    obtener_config, obtener_empleados_sin_usuario, obtener_estadisticas, obtener_limitador_login,
+    purgar_sesiones_vencidas, reconciliar_estadisticas, revocar_sesion, revocar_sesiones_usuario,
+    toggle_usuario_activo, validar_sesion_persistente, verificar_base_datos
+)
+# Al inicio de Ventas.py, después de los imports
+#import sys
+#st.write("Python version:", sys.version)
+#st.write("Current directory:", os.getcwd())
+#st.write("Files in directory:", os.listdir())
+
+# -------------------- CONFIGURACIÓN INICIAL --------------------
+st.set_page_config(
+    page_title="Equipo Locatel Restrepo", 
+    page_icon="🏥",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# -------------------- CONFIGURACIÓN DE LOGGING --------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('app.log'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# -------------------- CARGA DIFERIDA DE MÓDULOS --------------------
+class MetricasArranque:
+    """Tiempos de arranque del proceso: importaciones y primer render"""
+
+    def __init__(self, inicio):
+        self._lock = threading.Lock()
+        self.inicio = inicio
+        self.importaciones = {}
+        self.hitos = {}
+
+    def registrar_importacion(self, nombre, ms):
+        """Guarda cuánto tardó la primera importación de un módulo"""
+        with self._lock:
+            self.importaciones.setdefault(nombre, ms)
+        logger.info(f"📦 Módulo {nombre} importado en {ms:.0f} ms")
+
+    def marcar(self, hito):
+        """Registra la primera vez que se alcanza un hito desde el arranque"""
+        with self._lock:
+            if hito in self.hitos:
+                return
+            ms = (time.perf_counter() - self.inicio) * 1000
+            self.hitos[hito] = ms
+        logger.info(f"⏱️ {hito}: {ms:.0f} ms desde el arranque")
+
+@st.cache_resource
+def obtener_metricas_arranque(_inicio=None):
+    """Instancia única creada en la primera ejecución del script"""
+    return MetricasArranque(_inicio if _inicio is not None else time.perf_counter())
+
+obtener_metricas_arranque(_INICIO_SCRIPT)
+
+def cargar_modulo(nombre):
+    """Importa un módulo y registra el tiempo si es la primera vez en el proceso"""
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nombre)
+    obtener_metricas_arranque().registrar_importacion(nombre, (time.perf_counter() - inicio) * 1000)
+    return modulo
+
+class ModuloDiferido:
+    """Sustituto de un módulo pesado que lo importa en el primer acceso"""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = cargar_modulo(self._nombre)
+        return getattr(self._modulo, atributo)
+
+# Solo las páginas con datos y gráficos pagan estas importaciones
+pd = ModuloDiferido("pandas")
+np = ModuloDiferido("numpy")
+px = ModuloDiferido("plotly.express")
+go = ModuloDiferido("plotly.graph_objects")
+
+# -------------------- FUNCIONES DE SEGURIDAD --------------------
+def obtener_ip_cliente():
+    """IP del cliente si Streamlit la expone (directa o vía proxy)"""
+    try:
+        ip = getattr(st.context, "ip_address", None)
+        if ip:
+            return ip
+        reenviada = st.context.headers.get("X-Forwarded-For")
+        return reenviada.split(",")[0].strip() if reenviada else None
+    except Exception:
+        return None
+
+# -------------------- DECORADOR PARA MANEJO DE ERRORES --------------------
+# Los errores de la capa de datos se muestran en la interfaz con st.error
+safe_db_operation = repositorio.operacion_segura
+repositorio.registrar_callback("error", "streamlit", st.error)
+
+# Operaciones del repositorio que informan sus errores en la interfaz
+create_tables = safe_db_operation(repositorio.create_tables)
+purgar_cambios = safe_db_operation(repositorio.purgar_cambios)
+resumir_cambios = safe_db_operation(repositorio.resumir_cambios)
+purgar_idempotencia = safe_db_operation(repositorio.purgar_idempotencia)
+
+# -------------------- VERIFICACIÓN DE ENTORNO --------------------
+# Segundos entre verificaciones periódicas del entorno
+INTERVALO_SONDEO = 15 * 60
+
+class SondeoArranque:
+    """Verificaciones de entorno y base de datos, una vez por proceso.
+
+    El resultado se reutiliza en cada rerun y solo se repite tras
+    INTERVALO_SONDEO segundos o cuando un administrador lo solicita.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.issues = []
+        self.ultima_ejecucion = None
+        self._vencimiento = 0.0
+
+    def ejecutar(self):
+        """Corre todas las verificaciones y guarda el resultado"""
+        issues = check_environment()
+        init_database()
+        create_tables()
+        issues += verificar_base_datos()
+        purgar_sesiones_vencidas()
+        purgar_cambios()
+        purgar_idempotencia()
+        
+        self.issues = issues
+        self.ultima_ejecucion = datetime.now()
+        self._vencimiento = time.monotonic() + INTERVALO_SONDEO
+        logger.info(f"🔍 Sondeo de arranque completado: {len(issues)} problemas")
+
+    def obtener(self, forzar=False):
+        """Devuelve los problemas detectados, verificando de nuevo si venció"""
+        if forzar or time.monotonic() >= self._vencimiento:
+            with self._lock:
+                if forzar or time.monotonic() >= self._vencimiento:
+                    self.ejecutar()
+        return self.issues
+
+    def invalidar(self):
+        """Obliga a repetir las verificaciones en el próximo rerun"""
+        self._vencimiento = 0.0
+
+@st.cache_resource
+def obtener_sondeo_arranque():
+    """Instancia única del sondeo para todo el proceso"""
+    return SondeoArranque()
+
+@st.cache_resource
+def obtener_cola_trabajos():
+    """Pool de procesos único para los trabajos pesados (reportes, mediciones)"""
+    return trabajos.ColaTrabajos()
+
+@st.cache_resource
+def obtener_programador_reportes():
+    """Hilo único por proceso que genera los reportes Excel pendientes"""
+    return reportes.ProgramadorReportes(cola=obtener_cola_trabajos()).iniciar()
+
+# Segundos entre consultas al estado de un trabajo en segundo plano
+INTERVALO_SONDEO_TRABAJOS = 1
+
+def enviar_trabajo(clave, funcion, *args):
+    """Encola un trabajo pesado y guarda su futuro en la sesión"""
+    st.session_state[clave] = obtener_cola_trabajos().enviar(funcion, *args)
+
+@st.fragment(run_every=INTERVALO_SONDEO_TRABAJOS)
+def fragmento_esperar_trabajo(clave):
+    """Se repite cada segundo mientras el trabajo corre; al terminar recarga la página"""
+    futuro = st.session_state.get(clave)
+    if futuro is None or futuro.done():
+        st.rerun()
+    st.info("⏳ Procesando en segundo plano; puedes seguir usando la aplicación")
+
+def resultado_trabajo(clave):
+    """Futuro terminado de un trabajo de la sesión, o None si no hay o sigue en curso"""
+    futuro = st.session_state.get(clave)
+    if futuro is None:
+        return None
+    if not futuro.done():
+        fragmento_esperar_trabajo(clave)
+        return None
+    del st.session_state[clave]
+    return futuro
+
+# -------------------- TENDENCIA --------------------
+# Expresión SQL que agrupa cada fecha en su periodo
+GRANULARIDADES = {
+    "Diaria": "fecha",
+    "Semanal": "date(fecha, 'weekday 0', '-6 days')",
+    "Mensual": "strftime('%Y-%m-01', fecha)"
+}
+
+# Máximo de puntos que se envían al navegador en la tendencia
+MAX_PUNTOS_TENDENCIA = 400
+
+# Reportes que se listan para descarga en la página de reportes
+MAX_REPORTES_LISTADOS = 30
+
+# Empleados que se grafican en la vista consolidada de la cadena
+MAX_EMPLEADOS_CADENA = 40
+
+# Cambios recientes que resume la página de sistema
+VENTANA_CAMBIOS_SISTEMA = 10000
+
+def puntos_tendencia(fecha_inicio, fecha_fin, granularidad):
+    """Cantidad máxima de periodos que produce un rango con una granularidad"""
+    dias = (fecha_fin - fecha_inicio).days + 1
+    if granularidad == "Diaria":
+        return dias
+    if granularidad == "Semanal":
+        return dias // 7 + 2
+    return (fecha_fin.year - fecha_inicio.year) * 12 + fecha_fin.month - fecha_inicio.month + 1
+
+def elegir_granularidad(fecha_inicio, fecha_fin, preferida="Automática"):
+    """Elige la granularidad según la longitud del rango, respetando el tope de puntos"""
+    niveles = list(GRANULARIDADES)
+    if preferida in GRANULARIDADES:
+        granularidad = preferida
+    else:
+        dias = (fecha_fin - fecha_inicio).days + 1
+        if dias <= 92:
+            granularidad = "Diaria"
+        elif dias <= 731:
+            granularidad = "Semanal"
+        else:
+            granularidad = "Mensual"
+    
+    # Si la elección manual excede el tope, subir al siguiente nivel
+    while (puntos_tendencia(fecha_inicio, fecha_fin, granularidad) > MAX_PUNTOS_TENDENCIA
+           and granularidad != niveles[-1]):
+        granularidad = niveles[niveles.index(granularidad) + 1]
+    return granularidad
+
+@safe_db_operation
+def obtener_tendencia(fecha_inicio, fecha_fin, empleado=None, granularidad="Diaria"):
+    """Agrega el rollup diario por periodo directamente en SQL"""
+    periodo = GRANULARIDADES[granularidad]
+    filtro_empleado = "AND empleado = ?" if empleado else ""
+    params = (fecha_inicio, fecha_fin) + ((empleado,) if empleado else ()) + (MAX_PUNTOS_TENDENCIA,)
+    
+    conn = get_connection()
+    df = pd.read_sql(f"""
+        SELECT * FROM (
+            SELECT
+                {periodo} AS fecha,
+                SUM(autoliquidable) AS autoliquidable,
+                SUM(oferta) AS oferta,
+                SUM(marca_propia) AS marca_propia,
+                SUM(producto_adicional) AS producto_adicional
+            FROM ventas_diarias
+            WHERE fecha BETWEEN ? AND ? {filtro_empleado}
+            GROUP BY 1
+            ORDER BY 1 DESC
+            LIMIT ?
+        ) ORDER BY fecha
+    """, conn, params=params)
+    conn.close()
+    return df
+
+# -------------------- RANKINGS --------------------
+ETIQUETAS_METRICAS = {
+    "total": "📦 Total",
+    "autoliquidable": "💊 Autoliquidable",
+    "oferta": "🏷️ Oferta",
+    "marca_propia": "⭐ Marca Propia",
+    "producto_adicional": "➕ Adicional"
+}
+
+obtener_ranking = safe_db_operation(repositorio.obtener_ranking)
+obtener_puesto = safe_db_operation(repositorio.obtener_puesto)
+
+def cambio_puesto(puesto, puesto_anterior):
+    """Indicador de cambio de puesto frente al periodo anterior"""
+    if puesto_anterior is None or puesto_anterior != puesto_anterior:
+        return "🆕"
+    diferencia = int(puesto_anterior) - int(puesto)
+    if diferencia > 0:
+        return f"▲ {diferencia}"
+    if diferencia < 0:
+        return f"▼ {-diferencia}"
+    return "="
+
+# -------------------- METAS --------------------
+DEPARTAMENTOS = ["Droguería", "Equipos Médicos", "Tienda", "Cajas"]
+
+ETIQUETAS_PERIODOS = {"diario": "Diaria", "semanal": "Semanal", "mensual": "Mensual"}
+
+guardar_meta = safe_db_operation(repositorio.guardar_meta)
+eliminar_meta = safe_db_operation(repositorio.eliminar_meta)
+listar_metas = safe_db_operation(repositorio.listar_metas)
+metas_empleado = safe_db_operation(repositorio.metas_empleado)
+
+def describir_meta(meta):
+    """Texto corto de una meta: métrica, periodo y a quién aplica"""
+    quien = meta["objetivo"] if meta["alcance"] == "empleado" else f"Depto. {meta['objetivo']}"
+    return f"{ETIQUETAS_METRICAS[meta['metrica']]} · {ETIQUETAS_PERIODOS[meta['tipo']]} · {quien}"
+
+def fraccion_meta(meta):
+    """Avance de la meta entre 0 y 1 para st.progress (las correcciones pueden dejarlo negativo)"""
+    return max(0.0, min(meta["avance"] / meta["meta"], 1.0))
+
+# -------------------- COMPARACIÓN DE PERIODOS --------------------
+ETIQUETAS_COMPARACION = {
+    "anterior": "Periodo anterior",
+    "anio_anterior": "Mismo periodo del año anterior"
+}
+
+comparar_periodos = safe_db_operation(repositorio.comparar_periodos)
+
+@safe_db_operation
+@st.cache_data(ttl=600)  # Se invalida además con cada escritura (limpiar_caches)
+def comparar_periodo_estandar(tipo, referencia, contra, empleado=None):
+    """Comparación de un periodo estándar contra el anterior o el del año previo, en caché"""
+    periodo_a, periodo_b = repositorio.periodos_comparacion(tipo, referencia, contra)
+    # Sin operacion_segura: un error debe propagarse para que st.cache_data no lo guarde;
+    # el safe_db_operation externo lo muestra una sola vez
+    comparacion = repositorio.comparar_periodos.__wrapped__(
+        periodo_a[0], periodo_a[1], periodo_b[0], periodo_b[1], empleado
+    )
+    if comparacion is None:
+        raise RuntimeError("No se pudo calcular la comparación de periodos")
+    return periodo_a, periodo_b, comparacion
+
+# -------------------- FUNCIONES DE AUTENTICACIÓN --------------------
+# -------------------- SESIONES PERSISTENTES --------------------
+# Parámetro de la URL que guarda el token
+PARAMETRO_SESION = "sesion"
+
+# Segundos entre revalidaciones del token en una sesión abierta
+INTERVALO_REVALIDACION = 60
+
+@safe_db_operation
+def cargar_sesiones_activas():
+    """Lista las sesiones vigentes y no revocadas"""
+    conn = get_connection()
+    df = pd.read_sql("""
+        SELECT token_hash, username, creada, expira, ultimo_uso
+        FROM sesiones
+        WHERE revocada = 0 AND expira > ?
+        ORDER BY username, creada DESC
+    """, conn, params=(datetime.now(),))
+    conn.close()
+    return df
+
+def iniciar_sesion_usuario(usuario, token):
+    """Carga la identidad del usuario en session_state"""
+    st.session_state.usuario_actual = usuario['username']
+    st.session_state.usuario_rol = usuario['rol']
+    st.session_state.usuario_empleado_id = usuario['empleado_id']
+    st.session_state.autenticado = True
+    st.session_state.sesion_token = token
+    st.session_state.sesion_verificada = time.monotonic()
+
+def restaurar_o_revalidar_sesion():
+    """Restaura la identidad desde el token de la URL o revalida la sesión abierta"""
+    if not st.session_state.autenticado:
+        token = st.query_params.get(PARAMETRO_SESION)
+        if token:
+            usuario = validar_sesion_persistente(token, registrar_uso=True)
+            if usuario:
+                iniciar_sesion_usuario(usuario, token)
+                if st.session_state.pagina_actual == "Login":
+                    st.session_state.pagina_actual = (
+                        "Registro Ventas" if usuario['rol'] == 'Vendedor' else "Dashboard"
+                    )
+                logger.info(f"🔑 Sesión restaurada: {usuario['username']}")
+            else:
+                del st.query_params[PARAMETRO_SESION]
+        return
+    
+    # Una revocación en el servidor cierra también las sesiones abiertas
+    token = st.session_state.get("sesion_token")
+    if token and time.monotonic() - st.session_state.get("sesion_verificada", 0) > INTERVALO_REVALIDACION:
+        if validar_sesion_persistente(token):
+            st.session_state.sesion_verificada = time.monotonic()
+        else:
+            logger.info(f"🔒 Sesión revocada o vencida: {st.session_state.usuario_actual}")
+            cerrar_sesion()
+
+# -------------------- FUNCIONES DE EMPLEADOS --------------------
+@st.cache_resource(ttl=300)  # Cache por 5 minutos
+def obtener_roster_empleados():
+    """Nombres de empleados activos; una sola copia inmutable por proceso"""
+    return repositorio.listar_empleados_activos()
+
+@safe_db_operation
+def cargar_empleados_db():
+    """Carga los nombres de empleados desde la base de datos"""
+    return obtener_roster_empleados()
+
+def limpiar_caches():
+    """Invalida los cachés de datos después de una escritura"""
+    st.cache_data.clear()
+    obtener_roster_empleados.clear()
+
+def al_cambiar_datos(entidad):
+    """Callback del repositorio: invalida los cachés de la interfaz tras una escritura"""
+    if entidad == "config":
+        return
+    limpiar_caches()
+    if entidad == "backup":
+        obtener_cache_ventas().reiniciar()
+        obtener_sondeo_arranque().invalidar()
+
+repositorio.registrar_callback("cambio", "streamlit", al_cambiar_datos)
+
+@safe_db_operation
+@st.cache_data(ttl=300)  # Cache por 5 minutos
+def obtener_empleado_por_id(empleado_id):
+    """Obtiene nombre y departamento de un empleado activo"""
+    return repositorio.obtener_empleado_por_id(empleado_id)
+
+@safe_db_operation
+def cargar_empleados_con_departamento():
+    """Carga los empleados con su departamento"""
+    conn = get_connection()
+    df = pd.read_sql("SELECT id, nombre, departamento FROM empleados WHERE activo = 1 ORDER BY nombre", conn)
+    conn.close()
+    return df
+
+@safe_db_operation
+def obtener_empleados_por_departamento():
+    """Obtiene el conteo de empleados por departamento"""
+    conn = get_connection()
+    df = pd.read_sql("""
+        SELECT departamento, COUNT(*) as cantidad 
+        FROM empleados 
+        WHERE activo = 1 
+        GROUP BY departamento 
+        ORDER BY departamento
+    """, conn)
+    conn.close()
+    return df
+
+# -------------------- FUNCIONES DE VENTAS --------------------
+@safe_db_operation
+@st.cache_data(ttl=60)  # Cache por 1 minuto
+def obtener_ventas_recientes(empleado=None, limite=100):
+    """Obtiene ventas recientes con caché"""
+    conn = get_connection()
+    if empleado:
+        df = pd.read_sql("""
+            SELECT * FROM registros_ventas 
+            WHERE empleado = ? 
+            ORDER BY fecha DESC, fecha_registro DESC 
+            LIMIT ?
+        """, conn, params=(empleado, limite))
+    else:
+        df = pd.read_sql("""
+            SELECT * FROM registros_ventas 
+            ORDER BY fecha DESC, fecha_registro DESC 
+            LIMIT ?
+        """, conn, params=(limite,))
+    conn.close()
+    return df
+
+@safe_db_operation
+def obtener_resumen_hoy(empleado, fecha):
+    """Obtiene resumen de ventas del día desde el rollup diario"""
+    conn = get_connection()
+    df = pd.read_sql("""
+        SELECT autoliquidable, oferta, marca_propia, producto_adicional
+        FROM ventas_diarias 
+        WHERE fecha = ? AND empleado = ?
+    """, conn, params=(fecha, empleado))
+    conn.close()
+    return df
+
+# Órdenes del detalle: cláusula ORDER BY, columnas de la llave y comparación
+ORDENES_DETALLE = {
+    "Fecha (recientes primero)": ("fecha DESC, id DESC", ("fecha", "id"), "<"),
+    "Fecha (antiguas primero)": ("fecha ASC, id ASC", ("fecha", "id"), ">"),
+    "Empleado": ("empleado ASC, fecha ASC, id ASC", ("empleado", "fecha", "id"), ">")
+}
+
+@safe_db_operation
+def obtener_pagina_ventas(fecha_inicio, fecha_fin, empleado=None, orden="Fecha (recientes primero)",
+                          cursor=None, tamano=50):
+    """Obtiene una página del detalle con paginación por llave (keyset)"""
+    order_by, llave, comparacion = ORDENES_DETALLE[orden]
+    condiciones = ["fecha BETWEEN ? AND ?"]
+    params = [fecha_inicio, fecha_fin]
+    if empleado:
+        condiciones.append("empleado = ?")
+        params.append(empleado)
+    if cursor:
+        condiciones.append(f"({', '.join(llave)}) {comparacion} ({', '.join('?' * len(llave))})")
+        params.extend(cursor)
+    params.append(tamano + 1)
+    
+    conn = get_connection()
+    df = pd.read_sql(f"""
+        SELECT id, fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional
+        FROM registros_ventas
+        WHERE {' AND '.join(condiciones)}
+        ORDER BY {order_by}
+        LIMIT ?
+    """, conn, params=params)
+    conn.close()
+    
+    # La fila extra solo indica si existe una página siguiente
+    siguiente = None
+    if len(df) > tamano:
+        df = df.iloc[:tamano]
+        ultima = df.iloc[-1]
+        siguiente = tuple(int(ultima[col]) if col == "id" else str(ultima[col]) for col in llave)
+    return df, siguiente
+
+@safe_db_operation
+def contar_ventas(fecha_inicio, fecha_fin, empleado=None):
+    """Cuenta registros de un rango desde el rollup diario"""
+    conn = get_connection()
+    c = conn.cursor()
+    if empleado:
+        c.execute("""
+            SELECT COALESCE(SUM(registros), 0) FROM ventas_diarias
+            WHERE fecha BETWEEN ? AND ? AND empleado = ?
+        """, (fecha_inicio, fecha_fin, empleado))
+    else:
+        c.execute("""
+            SELECT COALESCE(SUM(registros), 0) FROM ventas_diarias
+            WHERE fecha BETWEEN ? AND ?
+        """, (fecha_inicio, fecha_fin))
+    total = c.fetchone()[0]
+    conn.close()
+    return total
+
+# -------------------- CACHÉ COLUMNAR DE VENTAS --------------------
+# Ordinal (date.toordinal) de 1970-01-01, origen de numpy datetime64[D]
+_ORDINAL_EPOCH = date(1970, 1, 1).toordinal()
+
+class CacheVentasColumnar:
+    """Copia columnar en memoria de registros_ventas compartida por todo el proceso.
+
+    Se carga una sola vez y luego solo agrega las filas con id > ultimo_id,
+    de modo que los filtros del dashboard se resuelven con máscaras NumPy.
+    Las modificaciones y bajas se detectan en change_log y provocan una recarga.
+    """
+
+    def __init__(self, lote=50000):
+        self._lock = threading.RLock()
+        self._lote = lote
+        self.generacion = 0
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta todo el contenido; la próxima actualización recarga desde cero"""
+        with self._lock:
+            self._n = 0
+            self._ids = np.empty(0, dtype=np.int64)
+            self._fechas = np.empty(0, dtype=np.int32)
+            self._empleados = np.empty(0, dtype=np.int32)
+            self._cantidades = np.empty((0, len(CATEGORIAS)), dtype=np.int64)
+            self.nombres = []
+            self._codigos = {}
+            self.ultimo_id = 0
+            self.ultima_seq = 0
+            self.generacion += 1
+
+    @property
+    def version(self):
+        """Identifica el contenido actual para claves de caché derivadas"""
+        return (self.generacion, self.ultimo_id)
+
+    def _reservar(self, extra):
+        """Crece los arreglos por duplicación para que agregar sea O(1) amortizado"""
+        necesario = self._n + extra
+        capacidad = len(self._ids)
+        if necesario <= capacidad:
+            return
+        nueva = max(necesario, capacidad * 2, 1024)
+        for nombre in ("_ids", "_fechas", "_empleados", "_cantidades"):
+            viejo = getattr(self, nombre)
+            nuevo = np.zeros((nueva,) + viejo.shape[1:], dtype=viejo.dtype)
+            nuevo[:self._n] = viejo[:self._n]
+            setattr(self, nombre, nuevo)
+
+    def _codificar(self, nombres):
+        """Convierte nombres de empleado en códigos enteros estables"""
+        codigos = np.empty(len(nombres), dtype=np.int32)
+        for i, nombre in enumerate(nombres):
+            codigo = self._codigos.get(nombre)
+            if codigo is None:
+                codigo = len(self.nombres)
+                self._codigos[nombre] = codigo
+                self.nombres.append(nombre)
+            codigos[i] = codigo
+        return codigos
+
+    def _agregar(self, filas):
+        """Agrega un lote de filas (id, fecha, empleado, categorías...) al final"""
+        ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+        fechas = np.array([str(f[1])[:10] if f[1] else "NaT" for f in filas], dtype="datetime64[D]")
+        ordinales = np.where(
+            np.isnat(fechas), 0, fechas.astype(np.int64) + _ORDINAL_EPOCH
+        ).astype(np.int32)
+        cantidades = np.array([f[3:] for f in filas], dtype=np.int64).reshape(len(filas), len(CATEGORIAS))
+
+        self._reservar(len(filas))
+        fin = self._n + len(filas)
+        self._ids[self._n:fin] = ids
+        self._fechas[self._n:fin] = ordinales
+        self._empleados[self._n:fin] = self._codificar([f[2] for f in filas])
+        self._cantidades[self._n:fin] = cantidades
+        self._n = fin
+        self.ultimo_id = int(ids[-1])
+
+    def actualizar(self):
+        """Trae solo los registros nuevos desde la base de datos"""
+        with self._lock:
+            conn = get_connection()
+            try:
+                c = conn.cursor()
+                ultima_seq = c.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+                max_id = c.execute("SELECT MAX(id) FROM registros_ventas").fetchone()[0] or 0
+                modificados = c.execute("""
+                    SELECT 1 FROM change_log
+                    WHERE seq > ? AND tabla = 'registros_ventas' AND op != 'I'
+                    LIMIT 1
+                """, (self.ultima_seq,)).fetchone()
+                if max_id < self.ultimo_id or ultima_seq < self.ultima_seq:
+                    # La base fue reemplazada (p. ej. restauración de backup)
+                    logger.info("🔄 Caché columnar reiniciado: la base de datos cambió")
+                    self.reiniciar()
+                elif self.ultimo_id and (modificados or not cursor_cambios_vigente(self.ultima_seq)):
+                    logger.info("🔄 Caché columnar reiniciado: registros modificados o eliminados")
+                    self.reiniciar()
+                self.ultima_seq = ultima_seq
+                if max_id == self.ultimo_id:
+                    return 0
+
+                c.execute(f"""
+                    SELECT id, fecha, empleado, {', '.join(f'COALESCE({cat}, 0)' for cat in CATEGORIAS)}
+                    FROM registros_ventas
+                    WHERE id > ?
+                    ORDER BY id
+                """, (self.ultimo_id,))
+                nuevas = 0
+                while True:
+                    filas = c.fetchmany(self._lote)
+                    if not filas:
+                        break
+                    self._agregar(filas)
+                    nuevas += len(filas)
+            finally:
+                conn.close()
+
+        if nuevas:
+            logger.info(f"📥 Caché columnar: {nuevas} registros nuevos (total {self._n})")
+        return nuevas
+
+    def _instantanea(self):
+        """Vistas consistentes de los arreglos; las filas existentes nunca se modifican"""
+        with self._lock:
+            n = self._n
+            return (
+                self._ids[:n], self._fechas[:n], self._empleados[:n],
+                self._cantidades[:n], list(self.nombres)
+            )
+
+    def consultar(self, fecha_inicio, fecha_fin, empleado=None):
+        """Aplica los filtros del dashboard y devuelve los agregados vectorizados"""
+        ids, fechas, empleados, cantidades, nombres = self._instantanea()
+
+        mascara = (fechas >= fecha_inicio.toordinal()) & (fechas <= fecha_fin.toordinal())
+        if empleado is not None:
+            codigo = self._codigos.get(empleado)
+            if codigo is None:
+                mascara[:] = False
+            else:
+                mascara &= empleados == codigo
+
+        return ResultadoVentas(
+            ids[mascara], fechas[mascara], empleados[mascara],
+            cantidades[mascara], nombres
+        )
+
+class ResultadoVentas:
+    """Subconjunto filtrado del caché columnar con sus agregaciones"""
+
+    def __init__(self, ids, fechas, empleados, cantidades, nombres):
+        self.ids = ids
+        self.fechas = fechas
+        self.empleados = empleados
+        self.cantidades = cantidades
+        self.nombres = nombres
+
+    def __len__(self):
+        return len(self.ids)
+
+    def totales(self):
+        """Suma por categoría"""
+        return dict(zip(CATEGORIAS, self.cantidades.sum(axis=0).tolist()))
+
+    def por_empleado(self):
+        """Suma por empleado y categoría usando bincount"""
+        presentes = np.unique(self.empleados)
+        datos = {"empleado": [self.nombres[i] for i in presentes]}
+        for k, cat in enumerate(CATEGORIAS):
+            sumas = np.bincount(self.empleados, weights=self.cantidades[:, k], minlength=len(self.nombres))
+            datos[cat] = sumas[presentes].astype(np.int64)
+        return pd.DataFrame(datos)
+
+    def por_fecha(self):
+        """Suma por fecha y categoría usando bincount sobre los días presentes"""
+        dias, inverso = np.unique(self.fechas, return_inverse=True)
+        datos = {"fecha": [date.fromordinal(int(d)) for d in dias]}
+        for k, cat in enumerate(CATEGORIAS):
+            datos[cat] = np.bincount(inverso, weights=self.cantidades[:, k], minlength=len(dias)).astype(np.int64)
+        return pd.DataFrame(datos)
+
+@st.cache_resource
+def obtener_cache_ventas():
+    """Instancia única del caché columnar para todas las sesiones"""
+    return CacheVentasColumnar()
+
+# -------------------- CACHÉ DE FIGURAS --------------------
+class CacheFiguras:
+    """Caché LRU de figuras Plotly serializadas, compartido entre sesiones.
+
+    Guarda el JSON ya construido de cada figura y expulsa las menos usadas
+    cuando se supera el número de entradas o el tope de memoria.
+    """
+
+    def __init__(self, max_entradas=256, max_bytes=64 * 1024 * 1024):
+        self._lock = threading.Lock()
+        self._figuras = OrderedDict()
+        self._bytes = 0
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        """Devuelve el JSON de la figura o None si no está en caché"""
+        with self._lock:
+            spec = self._figuras.get(clave)
+            if spec is None:
+                self.fallos += 1
+                return None
+            self._figuras.move_to_end(clave)
+            self.aciertos += 1
+            return spec
+
+    def guardar(self, clave, spec):
+        """Guarda el JSON de una figura respetando los límites"""
+        tamano = len(spec)
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._figuras.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._figuras[clave] = spec
+            self._bytes += tamano
+            while len(self._figuras) > self.max_entradas or self._bytes > self.max_bytes:
+                _, expulsada = self._figuras.popitem(last=False)
+                self._bytes -= len(expulsada)
+
+    def limpiar(self):
+        """Vacía el caché"""
+        with self._lock:
+            self._figuras.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        """Resumen de uso del caché"""
+        with self._lock:
+            return {
+                "entradas": len(self._figuras),
+                "bytes": self._bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos
+            }
+
+@st.cache_resource
+def obtener_cache_figuras():
+    """Instancia única del caché de figuras para todas las sesiones"""
+    return CacheFiguras()
+
+def mostrar_figura_cacheada(clave, construir):
+    """Muestra una figura desde el caché o la construye y la guarda"""
+    cache = obtener_cache_figuras()
+    spec = cache.obtener(clave)
+    if spec is None:
+        spec = construir().to_json()
+        cache.guardar(clave, spec)
+    st.plotly_chart(json.loads(spec), use_container_width=True)
+
+# -------------------- MEDICIÓN DE RENDER --------------------
+class MetricasRender:
+    """Duraciones recientes de render por sección, compartidas por el proceso"""
+
+    def __init__(self, muestras=200):
+        self._lock = threading.Lock()
+        self._muestras = muestras
+        self._tiempos = {}
+
+    def registrar(self, nombre, ms):
+        """Agrega una medición en milisegundos"""
+        with self._lock:
+            self._tiempos.setdefault(nombre, deque(maxlen=self._muestras)).append(ms)
+
+    def resumen(self, prefijo=""):
+        """Tabla con último valor y percentiles por sección"""
+        with self._lock:
+            copia = {k: list(v) for k, v in self._tiempos.items() if k.startswith(prefijo)}
+        filas = []
+        for nombre, valores in sorted(copia.items()):
+            ordenados = sorted(valores)
+            filas.append({
+                "sección": nombre,
+                "ejecuciones": len(valores),
+                "último (ms)": round(valores[-1], 1),
+                "p50 (ms)": round(ordenados[len(ordenados) // 2], 1),
+                "p95 (ms)": round(ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))], 1)
+            })
+        return filas
+
+@st.cache_resource
+def obtener_metricas_render():
+    """Instancia única de métricas de render"""
+    return MetricasRender()
+
+@contextmanager
+def medir_render(nombre):
+    """Mide el tiempo de render de una sección o fragmento"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        obtener_metricas_render().registrar(nombre, (time.perf_counter() - inicio) * 1000)
+
+def mostrar_tiempos_render(prefijo=""):
+    """Expander con los tiempos de render medidos"""
+    with st.expander("⏱️ Tiempos de render"):
+        filas = obtener_metricas_render().resumen(prefijo)
+        if filas:
+            st.dataframe(filas, use_container_width=True, hide_index=True)
+        else:
+            st.caption("Sin mediciones todavía")
+
+# -------------------- MEMORIA DE SESIONES --------------------
+def tamano_aproximado(obj, vistos=None):
+    """Tamaño aproximado en bytes de un objeto y lo que referencia"""
+    if vistos is None:
+        vistos = set()
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    
+    # DataFrames y arreglos reportan su propio uso de memoria
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, "nbytes") and hasattr(obj, "dtype"):
+        return int(obj.nbytes)
+    
+    tamano = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        tamano += sum(tamano_aproximado(k, vistos) + tamano_aproximado(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        tamano += sum(tamano_aproximado(v, vistos) for v in obj)
+    return tamano
+
+def memoria_proceso_mb():
+    """RSS actual del proceso en MB (o el pico si /proc no está disponible)"""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), "actual"
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "pico"
+
+def medir_estado_sesion(estado):
+    """Tamaño por clave de un session_state"""
+    vistos = set()
+    # Los objetos compartidos por el proceso no se cuentan en cada sesión
+    for compartido in (obtener_config(), cargar_empleados_db()):
+        vistos.add(id(compartido))
+    return {clave: tamano_aproximado(valor, vistos) for clave, valor in estado.items()}
+
+def medir_sesiones_activas():
+    """Tamaño de cada sesión activa del servidor (usa la API interna de Streamlit)"""
+    try:
+        from streamlit.runtime import Runtime
+        gestor = Runtime.instance()._session_mgr
+        sesiones = gestor.list_active_sessions()
+    except Exception as e:
+        logger.warning(f"No se pudieron listar las sesiones activas: {e}")
+        return None
+    
+    filas = []
+    for info in sesiones:
+        try:
+            estado = info.session.session_state.filtered_state
+        except Exception:
+            continue
+        tamanos = medir_estado_sesion(estado)
+        mayor = max(tamanos, key=tamanos.get) if tamanos else "-"
+        filas.append({
+            "sesión": info.session.id[:8],
+            "usuario": estado.get("usuario_actual") or "-",
+            "claves": len(tamanos),
+            "tamaño (KB)": round(sum(tamanos.values()) / 1024, 1),
+            "clave más pesada": mayor
+        })
+    return filas
+
+# -------------------- FUNCIONES DE USUARIOS --------------------
+@safe_db_operation
+def cargar_usuarios_db():
+    """Carga los usuarios desde la base de datos"""
+    conn = get_connection()
+    df = pd.read_sql("""
+        SELECT u.username, u.rol, u.activo, u.ultimo_acceso, e.nombre as empleado
+        FROM usuarios u
+        LEFT JOIN empleados e ON u.empleado_id = e.id
+        ORDER BY u.username
+    """, conn)
+    conn.close()
+    return df
+
+# -------------------- FUNCIONES DE CONFIGURACIÓN --------------------
+# -------------------- FUNCIONES DE BACKUP --------------------
+def restaurar_backup(archivo):
+    """Restaura un backup"""
+    try:
+        repositorio.restaurar_backup(archivo)
+        return True
+    except Exception as e:
+        logger.error(f"Error restaurando backup: {e}")
+        return False
+
+fusionar_backup = safe_db_operation(repositorio.fusionar_backup)
+
+# -------------------- FUNCIONES DE UTILIDAD --------------------
+def obtener_fecha_espanol(fecha):
+    """Convierte una fecha a formato español"""
+    dias_semana = {
+        'Monday': 'lunes', 'Tuesday': 'martes', 'Wednesday': 'miércoles',
+        'Thursday': 'jueves', 'Friday': 'viernes', 'Saturday': 'sábado',
+        'Sunday': 'domingo'
+    }
+    meses = {
+        'January': 'enero', 'February': 'febrero', 'March': 'marzo',
+        'April': 'abril', 'May': 'mayo', 'June': 'junio',
+        'July': 'julio', 'August': 'agosto', 'September': 'septiembre',
+        'October': 'octubre', 'November': 'noviembre', 'December': 'diciembre'
+    }
+    
+    dia_ingles = fecha.strftime('%A')
+    mes_ingles = fecha.strftime('%B')
+    
+    dia_espanol = dias_semana.get(dia_ingles, dia_ingles).capitalize()
+    mes_espanol = meses.get(mes_ingles, mes_ingles)
+    
+    return f"{dia_espanol}, {fecha.day} de {mes_espanol} de {fecha.year}"
+
+def verificar_permiso(rol_requerido):
+    """Verifica si el usuario tiene el rol requerido"""
+    if 'usuario_rol' not in st.session_state:
+        return False
+    
+    if rol_requerido == "Vendedor":
+        return st.session_state.usuario_rol in ["Vendedor", "Supervisor", "Administrador"]
+    elif rol_requerido == "Supervisor":
+        return st.session_state.usuario_rol in ["Supervisor", "Administrador"]
+    elif rol_requerido == "Administrador":
+        return st.session_state.usuario_rol == "Administrador"
+    return False
+
+def cerrar_sesion():
+    """Cierra la sesión del usuario actual"""
+    token = st.session_state.get("sesion_token")
+    if token:
+        revocar_sesion(token)
+    if PARAMETRO_SESION in st.query_params:
+        del st.query_params[PARAMETRO_SESION]
+    
+    for key in ['usuario_actual', 'usuario_rol', 'usuario_empleado_id', 'autenticado',
+                'sesion_token', 'sesion_verificada']:
+        if key in st.session_state:
+            del st.session_state[key]
+    st.session_state.autenticado = False
+    st.session_state.pagina_actual = "Login"
+    limpiar_caches()
+    st.rerun()
+
+def init_session_state():
+    """Inicializa el estado de sesión"""
+    defaults = {
+        'menu_visible': True,
+        'pagina_actual': "Login",
+        'autenticado': False,
+        'usuario_actual': None,
+        'usuario_rol': None,
+        'usuario_empleado_id': None
+    }
+    
+    for key, value in defaults.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+
+# -------------------- PÁGINAS DE LA APLICACIÓN --------------------
+
+def pagina_login():
+    """Página de inicio de sesión"""
+    
+    # CSS específico solo para el login
+    st.markdown("""
+    <style>
+    /* Reset para el contenedor principal */
+    .main > div {
+        padding: 0 !important;
+    }
+    
+    /* Ocultar elementos de Streamlit que interfieren */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+    
+    /* Estilos del login */
+    .login-container {
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        height: 100vh;
+        width: 100vw;
+        position: fixed;
+        top: 0;
+        left: 0;
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        margin: 0;
+        padding: 0;
+    }
+    
+    .login-box {
+        background: white;
+        padding: 2.5rem;
+        border-radius: 20px;
+        box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+        width: 90%;
+        max-width: 400px;
+        animation: slideUp 0.5s ease;
+    }
+    
+    @keyframes slideUp {
+        from {
+            opacity: 0;
+            transform: translateY(20px);
+        }
+        to {
+            opacity: 1;
+            transform: translateY(0);
+        }
+    }
+    
+    .login-header {
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    
+    .login-header h1 {
+        color: #667eea;
+        font-size: 1.8rem;
+        margin: 0.5rem 0 0 0;
+        font-weight: 600;
+    }
+    
+    .login-header p {
+        color: #666;
+        margin: 0.5rem 0 0 0;
+        font-size: 0.9rem;
+    }
+    
+    .login-icon {
+        font-size: 3.5rem;
+        margin-bottom: 0.5rem;
+    }
+    
+    /* Ocultar el texto de "Powered by Streamlit" */
+    .stApp [data-testid="stDecoration"] {
+        display: none;
+    }
+    
+    /* Asegurar que el formulario se vea bien */
+    .stForm {
+        background-color: transparent !important;
+        padding: 0 !important;
+        border: none !important;
+    }
+    
+    .stForm [data-testid="stForm"] {
+        border: none !important;
+        padding: 0 !important;
+        background-color: transparent !important;
+    }
+    
+    /* Estilos para los inputs */
+    .stTextInput input {
+        border-radius: 10px !important;
+        border: 1px solid #e0e0e0 !important;
+        padding: 0.75rem !important;
+    }
+    
+    .stTextInput input:focus {
+        border-color: #667eea !important;
+        box-shadow: 0 0 0 2px rgba(102, 126, 234, 0.1) !important;
+    }
+    
+    /* Estilo para el botón */
+    .stButton button {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%) !important;
+        color: white !important;
+        border: none !important;
+        border-radius: 10px !important;
+        padding: 0.75rem 2rem !important;
+        font-weight: 600 !important;
+        font-size: 1rem !important;
+        transition: transform 0.2s !important;
+        width: 100% !important;
+    }
+    
+    .stButton button:hover {
+        transform: translateY(-2px) !important;
+        box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3) !important;
+    }
+    
+    /* Ajustar el expander */
+    .streamlit-expanderHeader {
+        color: #666 !important;
+        background-color: #f8f9fa !important;
+        border-radius: 10px !important;
+        border: none !important;
+    }
+    
+    /* Ocultar elementos flotantes */
+    .stAlert {
+        margin-top: 1rem !important;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # Contenedor principal del login
+    st.markdown('<div class="login-container">', unsafe_allow_html=True)
+    st.markdown('<div class="login-box">', unsafe_allow_html=True)
+    
+    # Header
+    st.markdown("""
+    <div class="login-header">
+        <div class="login-icon">🏥</div>
+        <h1>Locatel Restrepo</h1>
+        <p>Sistema de Gestión de Ventas</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Formulario de login
+    with st.form("login_form", clear_on_submit=False):
+        username = st.text_input(
+            "👤 Usuario",
+            placeholder="Ingresa tu usuario",
+            key="login_username"
+        )
+        
+        password = st.text_input(
+            "🔑 Contraseña",
+            type="password",
+            placeholder="Ingresa tu contraseña",
+            key="login_password"
+        )
+        
+        submitted = st.form_submit_button(
+            "Iniciar Sesión",
+            use_container_width=True,
+            type="primary"
+        )
+        
+        if submitted:
+            ip = obtener_ip_cliente()
+            espera = obtener_limitador_login().espera(username, ip) if username else 0
+            if espera:
+                st.error(f"🔒 Demasiados intentos fallidos. Intenta de nuevo en {espera} segundos")
+            elif username and password:
+                usuario = autenticar_usuario(username, password, ip)
+                
+                if usuario:
+                    # El token en la URL permite recargar sin volver a iniciar sesión
+                    token = crear_sesion_persistente(usuario['username'])
+                    iniciar_sesion_usuario(usuario, token)
+                    if token:
+                        st.query_params[PARAMETRO_SESION] = token
+                    
+                    actualizar_ultimo_acceso(username)
+                    
+                    if usuario['rol'] == 'Vendedor':
+                        st.session_state.pagina_actual = "Registro Ventas"
+                    else:
+                        st.session_state.pagina_actual = "Dashboard"
+                    
+                    st.rerun()
+                else:
+                    st.error("❌ Usuario o contraseña incorrectos")
+            else:
+                st.warning("⚠️ Por favor ingresa todos los campos")
+    
+    # Credenciales de prueba
+    with st.expander("ℹ️ Credenciales de prueba"):
+        st.markdown("""
+        **Administrador:** admin / admin123  
+        **Supervisor:** supervisor / super123  
+        """)
+    
+    st.markdown('</div></div>', unsafe_allow_html=True)
+    
+    obtener_metricas_arranque().marcar("Primer render de login")
+
+def pagina_registro_ventas():
+    """Página para registro de ventas"""
+    if not verificar_permiso("Vendedor"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    # Obtener información del empleado
+    if st.session_state.usuario_empleado_id:
+        empleado = obtener_empleado_por_id(st.session_state.usuario_empleado_id)
+        
+        if not empleado:
+            st.error("❌ No se encontró información del empleado")
+            return
+        
+        empleado_nombre = empleado['nombre']
+        departamento = empleado['departamento']
+    else:
+        st.error("❌ Usuario no asociado a un empleado")
+        return
+    
+    # CSS personalizado
+    st.markdown("""
+    <style>
+    .welcome-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 2rem;
+        border-radius: 20px;
+        color: white;
+        margin-bottom: 2rem;
+        box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
+        position: relative;
+        overflow: hidden;
+    }
+    .welcome-card::after {
+        content: '🏥';
+        position: absolute;
+        right: 20px;
+        bottom: 20px;
+        font-size: 5rem;
+        opacity: 0.2;
+    }
+    .metric-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 15px;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.05);
+        text-align: center;
+        border: 1px solid #f0f0f0;
+        transition: transform 0.3s ease;
+    }
+    .metric-card:hover {
+        transform: translateY(-5px);
+        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
+    }
+    .metric-value {
+        font-size: 2rem;
+        font-weight: 700;
+        margin: 0;
+        background: linear-gradient(135deg, #667eea, #764ba2);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+    }
+    .metric-label {
+        color: #666;
+        font-size: 0.9rem;
+        margin: 0;
+        text-transform: uppercase;
+        letter-spacing: 1px;
+    }
+    .form-card {
+        background: white;
+        padding: 2rem;
+        border-radius: 20px;
+        box-shadow: 0 10px 30px rgba(0,0,0,0.05);
+        border: 1px solid #f0f0f0;
+        margin-bottom: 1rem;
+    }
+    .history-card {
+        background: white;
+        padding: 1rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
+        margin-bottom: 0.5rem;
+        border-left: 4px solid #667eea;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # Bienvenida
+    fecha_espanol = obtener_fecha_espanol(datetime.now())
+    depto_emoji = {
+        "Droguería": "💊",
+        "Equipos Médicos": "🏥",
+        "Tienda": "🏪",
+        "Cajas": "💰"
+    }.get(departamento, "👤")
+    
+    st.markdown(f"""
+    <div class="welcome-card">
+        <h1>¡Hola, {empleado_nombre}! 👋</h1>
+        <p>{depto_emoji} {departamento} • {fecha_espanol}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Formulario y resúmenes se actualizan por fragmentos, sin rerun de toda la app
+    fragmento_panel_registro(empleado_nombre)
+
+CAMPOS_REGISTRO = {
+    "registro_auto": "autoliquidable",
+    "registro_oferta": "oferta",
+    "registro_marca": "marca_propia",
+    "registro_adicional": "producto_adicional"
+}
+
+def guardar_registro_formulario(empleado_nombre):
+    """Callback del botón Guardar: registra la venta y limpia el formulario"""
+    conteos = {campo: st.session_state.get(key, 0) for key, campo in CAMPOS_REGISTRO.items()}
+    
+    if sum(conteos.values()) > 0:
+        guardar_venta(
+            st.session_state.registro_fecha, empleado_nombre,
+            conteos['autoliquidable'], conteos['oferta'],
+            conteos['marca_propia'], conteos['producto_adicional']
+        )
+        for key in CAMPOS_REGISTRO:
+            st.session_state[key] = 0
+        st.session_state.registro_mensaje = ("success", "✅ ¡Ventas registradas exitosamente!")
+    else:
+        st.session_state.registro_mensaje = ("warning", "⚠️ Debes registrar al menos una venta")
+
+@st.fragment
+def fragmento_panel_registro(empleado_nombre):
+    """Panel de registro; al guardar solo se vuelve a ejecutar este panel"""
+    col_registro, col_resumen = st.columns([1.2, 0.8])
+    
+    with col_registro:
+        with st.container():
+            st.markdown('<div class="form-card">', unsafe_allow_html=True)
+            st.markdown("### 📝 Registrar Ventas del Día")
+            
+            fragmento_conteos_venta()
+            
+            st.button(
+                "💾 Guardar Registro",
+                use_container_width=True,
+                type="primary",
+                on_click=guardar_registro_formulario,
+                args=(empleado_nombre,)
+            )
+            
+            mensaje = st.session_state.pop("registro_mensaje", None)
+            if mensaje:
+                tipo, texto = mensaje
+                if tipo == "success":
+                    st.success(texto)
+                    st.balloons()
+                else:
+                    st.warning(texto)
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col_resumen:
+        fragmento_resumen_hoy(empleado_nombre)
+        fragmento_ranking_compacto(empleado_nombre)
+        fragmento_ultimos_registros(empleado_nombre)
+
+@st.fragment
+def fragmento_conteos_venta():
+    """Campos del formulario; escribir un conteo solo recalcula el total"""
+    st.session_state.setdefault("registro_fecha", datetime.now().date())
+    for key in CAMPOS_REGISTRO:
+        st.session_state.setdefault(key, 0)
+    
+    st.date_input("📅 Fecha", key="registro_fecha")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        autoliquidable = st.number_input(
+            "💊 Autoliquidable",
+            min_value=0,
+            step=1,
+            key="registro_auto",
+            help="Productos autoliquidables"
+        )
+        marca_propia = st.number_input(
+            "⭐ Marca Propia",
+            min_value=0,
+            step=1,
+            key="registro_marca",
+            help="Productos de marca propia"
+        )
+    
+    with col2:
+        oferta = st.number_input(
+            "🏷️ Oferta Semana",
+            min_value=0,
+            step=1,
+            key="registro_oferta",
+            help="Productos en oferta"
+        )
+        producto_adicional = st.number_input(
+            "➕ Producto Adicional",
+            min_value=0,
+            step=1,
+            key="registro_adicional",
+            help="Productos adicionales"
+        )
+    
+    total = autoliquidable + oferta + marca_propia + producto_adicional
+    
+    st.markdown(f"""
+    <div style="
+        background: linear-gradient(135deg, #667eea20 0%, #764ba220 100%);
+        padding: 1rem;
+        border-radius: 10px;
+        margin: 1rem 0;
+        text-align: center;
+    ">
+        <h3 style="color: #667eea; margin: 0;">Total: {total} unidades</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
+@st.fragment
+def fragmento_resumen_hoy(empleado_nombre):
+    """Panel "Resumen de Hoy" servido desde el rollup diario"""
+    st.markdown('<div class="form-card">', unsafe_allow_html=True)
+    st.markdown("### 📊 Resumen de Hoy")
+    
+    hoy = datetime.now().date()
+    df_hoy = obtener_resumen_hoy(empleado_nombre, hoy)
+    
+    if not df_hoy.empty:
+        total_auto = df_hoy['autoliquidable'].sum()
+        total_ofer = df_hoy['oferta'].sum()
+        total_marca = df_hoy['marca_propia'].sum()
+        total_prod = df_hoy['producto_adicional'].sum()
+        total_general = total_auto + total_ofer + total_marca + total_prod
+        
+        col_m1, col_m2 = st.columns(2)
+        
+        with col_m1:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{int(total_auto)}</div>
+                <div class="metric-label">💊 Auto</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-value">{int(total_marca)}</div>
+                <div class="metric-label">⭐ Marca</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col_m2:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{int(total_ofer)}</div>
+                <div class="metric-label">🏷️ Oferta</div>
+            </div>
+            <div class="metric-card">
+                <div class="metric-value">{int(total_prod)}</div>
+                <div class="metric-label">➕ Adic</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        st.markdown(f"""
+        <div style="
+            background: linear-gradient(135deg, #00aa0020 0%, #00cc0020 100%);
+            padding: 1rem;
+            border-radius: 10px;
+            margin-top: 1rem;
+            text-align: center;
+        ">
+            <h3 style="color: #00aa00; margin: 0;">Total Día: {int(total_general)}</h3>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.info("📭 No hay registros hoy")
+    
+    # Avance de metas: una sola consulta por índice a la tabla de progreso
+    metas = metas_empleado(empleado_nombre, hoy) or []
+    if metas:
+        st.markdown("#### 🎯 Metas")
+        for meta in metas:
+            st.progress(
+                fraccion_meta(meta),
+                text=f"{describir_meta(meta)}: {meta['avance']}/{meta['meta']}"
+            )
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def fragmento_ranking_compacto(empleado_nombre):
+    """Puesto del empleado y podio del día, desde el ranking materializado"""
+    podio = obtener_ranking("diario", limite=3)
+    if not podio:
+        return
+    
+    st.markdown("### 🏆 Ranking de Hoy")
+    medallas = ["🥇", "🥈", "🥉"]
+    for fila in podio:
+        st.markdown(
+            f"{medallas[fila['puesto'] - 1] if fila['puesto'] <= 3 else fila['puesto']} "
+            f"**{fila['empleado']}** · {fila['valor']} "
+            f"<small>({cambio_puesto(fila['puesto'], fila['puesto_anterior'])})</small>",
+            unsafe_allow_html=True
+        )
+    
+    puesto = obtener_puesto(empleado_nombre, "diario")
+    if puesto:
+        st.caption(
+            f"Tu puesto: {puesto['puesto']} de {puesto['participantes']} "
+            f"({cambio_puesto(puesto['puesto'], puesto['puesto_anterior'])} vs. ayer) · "
+            f"{puesto['puesto_departamento']}° en tu departamento"
+        )
+
+@st.fragment
+def fragmento_ultimos_registros(empleado_nombre):
+    """Panel "Últimos Registros" del empleado"""
+    st.markdown('<div class="form-card">', unsafe_allow_html=True)
+    st.markdown("### 📋 Últimos Registros")
+    
+    df_recientes = obtener_ventas_recientes(empleado_nombre, 5)
+    
+    if not df_recientes.empty:
+        for _, row in df_recientes.iterrows():
+            fecha_str = datetime.strptime(row['fecha'], '%Y-%m-%d').strftime('%d/%m')
+            st.markdown(f"""
+            <div class="history-card">
+                <strong>{fecha_str}</strong><br>
+                💊 {int(row['autoliquidable'])} | 🏷️ {int(row['oferta'])} | 
+                ⭐ {int(row['marca_propia'])} | ➕ {int(row['producto_adicional'])}
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        st.info("No hay registros anteriores")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def pagina_dashboard():
+    """Dashboard de ventas"""
+    if not verificar_permiso("Supervisor"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("📊 Dashboard de Ventas")
+    
+    # Cambiar un filtro solo vuelve a ejecutar el fragmento del dashboard
+    fragmento_filtros_dashboard()
+
+def version_datos_dashboard():
+    """Refresca el caché columnar y devuelve su versión, para las claves de figuras cacheadas"""
+    cache = obtener_cache_ventas()
+    cache.actualizar()
+    return cache.version
+
+def consultar_dashboard(fecha_inicio, fecha_fin, empleado_filtro):
+    """Actualiza el caché columnar y aplica los filtros del dashboard"""
+    cache = obtener_cache_ventas()
+    cache.actualizar()
+    resultado = cache.consultar(
+        fecha_inicio, fecha_fin,
+        None if empleado_filtro == "Todos" else empleado_filtro
+    )
+    return resultado, cache.version
+
+@st.fragment
+def fragmento_filtros_dashboard():
+    """Barra de filtros; contiene los fragmentos que dependen de ella"""
+    with medir_render("dashboard.filtros"):
+        # El selector de tiendas solo aparece si el registro tiene más de una
+        tiendas = repositorio.cargar_tiendas()
+        local = repositorio.tienda_local(tiendas)
+        seleccion = [local] if local else list(tiendas)
+        if len(tiendas) > 1:
+            seleccion = st.multiselect(
+                "Tiendas",
+                list(tiendas),
+                default=seleccion,
+                format_func=repositorio.etiquetas_tiendas(tiendas).get,
+                key="tiendas_dashboard"
+            )
+        vista_cadena = seleccion != [local]
+        
+        col_filtro1, col_filtro2, col_filtro3 = st.columns(3)
+        
+        with col_filtro1:
+            fecha_inicio = st.date_input("Fecha inicio", value=datetime.now().replace(day=1))
+        
+        with col_filtro2:
+            fecha_fin = st.date_input("Fecha fin", value=datetime.now())
+        
+        with col_filtro3:
+            # Los empleados son propios de cada tienda: el filtro aplica solo a la local
+            empleados = ["Todos", *(cargar_empleados_db() or ())]
+            empleado_filtro = st.selectbox("Empleado", empleados, disabled=vista_cadena)
+        
+        comparar = not vista_cadena and st.toggle("🔀 Comparar periodos", key="comparar_dashboard")
+        
+        if vista_cadena:
+            if seleccion:
+                mostrar_dashboard_cadena(tuple(seleccion), fecha_inicio, fecha_fin)
+            else:
+                st.info("Selecciona al menos una tienda")
+            mostrar_tiempos_render(("app.", "dashboard."))
+            return
+        
+        if comparar:
+            fragmento_comparacion(fecha_inicio, fecha_fin, None if empleado_filtro == "Todos" else empleado_filtro)
+            mostrar_tiempos_render(("app.", "dashboard."))
+            return
+        
+        resultado, _ = consultar_dashboard(fecha_inicio, fecha_fin, empleado_filtro)
+        
+        if len(resultado) > 0:
+            fragmento_metricas_dashboard(fecha_inicio, fecha_fin, empleado_filtro)
+            
+            # Gráficos
+            tab1, tab2, tab3, tab4 = st.tabs(["📊 Por Empleado", "📈 Tendencia", "🏆 Ranking", "📋 Detalle"])
+            
+            with tab1:
+                fragmento_ventas_por_empleado(fecha_inicio, fecha_fin, empleado_filtro)
+            
+            with tab2:
+                fragmento_tendencia(fecha_inicio, fecha_fin, empleado_filtro)
+            
+            with tab3:
+                fragmento_ranking(fecha_fin)
+            
+            with tab4:
+                fragmento_detalle_ventas(
+                    fecha_inicio, fecha_fin,
+                    None if empleado_filtro == "Todos" else empleado_filtro
+                )
+        else:
+            st.info("📭 No hay datos para el período seleccionado")
+    
+    mostrar_tiempos_render(("app.", "dashboard."))
+
+def mostrar_dashboard_cadena(tienda_ids, fecha_inicio, fecha_fin):
+    """Vista consolidada de varias tiendas a partir de sus rollups, consultados en paralelo"""
+    with medir_render("dashboard.cadena"):
+        resultado = repositorio.consultar_cadena(tienda_ids, fecha_inicio, fecha_fin)
+        columnas = ["registros", *CATEGORIAS]
+        
+        # Tiendas lentas o caídas no bloquean la vista: se muestran las que respondieron
+        etiquetas = repositorio.etiquetas_tiendas(repositorio.cargar_tiendas())
+        for tienda_id, error in resultado["errores"].items():
+            st.warning(f"⚠️ {etiquetas[tienda_id]}: {error}. Los totales la excluyen.")
+        if resultado["tiempos"]:
+            st.caption(" · ".join(
+                f"{etiquetas[tienda_id]}: {ms:.0f} ms"
+                for tienda_id, ms in sorted(resultado["tiempos"].items(), key=lambda t: t[1])
+            ))
+        
+        if not resultado["por_tienda"]:
+            st.info("📭 No hay datos para el período seleccionado")
+            return
+        
+        por_tienda = pd.DataFrame(
+            [[etiquetas[tienda_id], *valores] for tienda_id, valores in resultado["por_tienda"].items()],
+            columns=["tienda", *columnas]
+        )
+        totales = por_tienda[columnas].sum()
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Total Ventas", int(totales['registros']))
+        with col2:
+            st.metric("💊 Autoliquidable", int(totales['autoliquidable']))
+        with col3:
+            st.metric("🏷️ Oferta", int(totales['oferta']))
+        with col4:
+            st.metric("⭐ Marca Propia", int(totales['marca_propia']))
+        with col5:
+            st.metric("➕ Adicional", int(totales['producto_adicional']))
+        
+        tab1, tab2, tab3 = st.tabs(["🏪 Por Tienda", "📊 Por Empleado", "📈 Tendencia"])
+        
+        with tab1:
+            fig = px.bar(
+                por_tienda.sort_values('registros'),
+                y='tienda',
+                x=CATEGORIAS,
+                title="Ventas por Tienda",
+                labels={'value': 'Cantidad', 'tienda': 'Tienda', 'variable': 'Tipo'},
+                barmode='stack'
+            )
+            fig.update_layout(height=max(300, 60 * len(por_tienda)))
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with tab2:
+            por_empleado = pd.DataFrame(
+                [[f"{empleado} ({etiquetas[tienda_id]})", *valores]
+                 for (tienda_id, empleado), valores in resultado["por_empleado"].items()],
+                columns=["empleado", *columnas]
+            ).sort_values('registros').tail(MAX_EMPLEADOS_CADENA)
+            fig = px.bar(
+                por_empleado,
+                y='empleado',
+                x=CATEGORIAS,
+                title=f"Ventas por Empleado (top {MAX_EMPLEADOS_CADENA})",
+                labels={'value': 'Cantidad', 'empleado': 'Empleado', 'variable': 'Tipo'},
+                barmode='stack'
+            )
+            fig.update_layout(height=max(500, 22 * len(por_empleado)))
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with tab3:
+            granularidad = elegir_granularidad(fecha_inicio, fecha_fin)
+            st.caption(f"Agrupación {granularidad.lower()}")
+            por_fecha = pd.DataFrame(
+                [[fecha, *valores] for fecha, valores in resultado["por_fecha"].items()],
+                columns=["fecha", *columnas]
+            )
+            por_fecha['fecha'] = pd.to_datetime(por_fecha['fecha'])
+            # Mismos periodos que GRANULARIDADES, pero sobre los parciales ya fusionados
+            if granularidad == "Semanal":
+                por_fecha['fecha'] = por_fecha['fecha'] - pd.to_timedelta(por_fecha['fecha'].dt.weekday, unit='D')
+            elif granularidad == "Mensual":
+                por_fecha['fecha'] = por_fecha['fecha'].dt.to_period('M').dt.start_time
+            por_fecha = por_fecha.groupby('fecha', as_index=False)[CATEGORIAS].sum()
+            fig = px.line(
+                por_fecha,
+                x='fecha',
+                y=CATEGORIAS,
+                title="Tendencia de Ventas (cadena)",
+                labels={'value': 'Cantidad', 'fecha': 'Fecha', 'variable': 'Tipo'}
+            )
+            fig.update_layout(height=500)
+            st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def fragmento_metricas_dashboard(fecha_inicio, fecha_fin, empleado_filtro):
+    """Fila de métricas principales"""
+    with medir_render("dashboard.metricas"):
+        resultado, _ = consultar_dashboard(fecha_inicio, fecha_fin, empleado_filtro)
+        totales = resultado.totales()
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            st.metric("Total Ventas", len(resultado))
+        with col2:
+            st.metric("💊 Autoliquidable", int(totales['autoliquidable']))
+        with col3:
+            st.metric("🏷️ Oferta", int(totales['oferta']))
+        with col4:
+            st.metric("⭐ Marca Propia", int(totales['marca_propia']))
+        with col5:
+            st.metric("➕ Adicional", int(totales['producto_adicional']))
+
+@st.fragment
+def fragmento_ventas_por_empleado(fecha_inicio, fecha_fin, empleado_filtro):
+    """Pestaña de ventas por empleado"""
+    with medir_render("dashboard.por_empleado"):
+        # La versión se lee después de refrescar: la clave describe los datos con que se construye
+        version = version_datos_dashboard()
+        
+        def construir_por_empleado():
+            resultado, _ = consultar_dashboard(fecha_inicio, fecha_fin, empleado_filtro)
+            ventas_empleado = resultado.por_empleado()
+            ventas_empleado['total'] = ventas_empleado[CATEGORIAS].sum(axis=1)
+            ventas_empleado = ventas_empleado.sort_values('total', ascending=True)
+            
+            fig = px.bar(
+                ventas_empleado,
+                y='empleado',
+                x=CATEGORIAS,
+                title="Ventas por Empleado",
+                labels={'value': 'Cantidad', 'empleado': 'Empleado', 'variable': 'Tipo'},
+                barmode='stack'
+            )
+            fig.update_layout(height=500)
+            return fig
+        
+        # Las figuras se reutilizan mientras no cambien filtros ni datos
+        mostrar_figura_cacheada(
+            ("por_empleado", fecha_inicio, fecha_fin, empleado_filtro, version),
+            construir_por_empleado
+        )
+
+@st.fragment
+def fragmento_tendencia(fecha_inicio, fecha_fin, empleado_filtro):
+    """Pestaña de tendencia; cambiar la agrupación solo vuelve a ejecutar esta pestaña"""
+    with medir_render("dashboard.tendencia"):
+        # La versión se lee después de refrescar: la clave describe los datos con que se construye
+        version = version_datos_dashboard()
+        
+        preferida = st.radio(
+            "Agrupación",
+            ["Automática"] + list(GRANULARIDADES),
+            horizontal=True,
+            key="granularidad_tendencia"
+        )
+        granularidad = elegir_granularidad(fecha_inicio, fecha_fin, preferida)
+        if preferida != "Automática" and granularidad != preferida:
+            st.caption(f"⚠️ Rango demasiado largo para vista {preferida.lower()}: se muestra {granularidad.lower()}")
+        else:
+            st.caption(f"Agrupación {granularidad.lower()}")
+        
+        def construir_tendencia():
+            ventas_fecha = obtener_tendencia(
+                fecha_inicio, fecha_fin,
+                None if empleado_filtro == "Todos" else empleado_filtro,
+                granularidad
+            )
+            
+            fig = px.line(
+                ventas_fecha,
+                x='fecha',
+                y=CATEGORIAS,
+                title="Tendencia de Ventas",
+                labels={'value': 'Cantidad', 'fecha': 'Fecha', 'variable': 'Tipo'}
+            )
+            fig.update_layout(height=500)
+            return fig
+        
+        mostrar_figura_cacheada(
+            ("tendencia", granularidad, fecha_inicio, fecha_fin, empleado_filtro, version),
+            construir_tendencia
+        )
+
+@st.fragment
+def fragmento_comparacion(fecha_inicio, fecha_fin, empleado):
+    """Variación entre dos periodos por categoría, empleado y departamento, desde el rollup"""
+    with medir_render("dashboard.comparacion"):
+        modo = st.radio("Comparar", ["estandar", "personalizado"], horizontal=True, key="comparacion_modo",
+                        format_func={"estandar": "📅 Periodo estándar", "personalizado": "✏️ Rangos libres"}.get)
+        
+        if modo == "estandar":
+            col_tipo, col_contra = st.columns(2)
+            with col_tipo:
+                tipo = st.radio("Periodo", repositorio.TIPOS_PERIODO, format_func=str.capitalize,
+                                horizontal=True, index=2, key="comparacion_tipo")
+            with col_contra:
+                contra = st.selectbox("Contra", list(ETIQUETAS_COMPARACION), format_func=ETIQUETAS_COMPARACION.get,
+                                      key="comparacion_contra")
+            resultado = comparar_periodo_estandar(tipo, fecha_fin, contra, empleado)
+            if not resultado:
+                return
+            (inicio_a, fin_a, etiqueta_a), (inicio_b, fin_b, etiqueta_b), comparacion = resultado
+        else:
+            # El periodo A es el del filtro; el B se elige aquí (por defecto, el año anterior)
+            col_b1, col_b2 = st.columns(2)
+            with col_b1:
+                inicio_b = st.date_input("Inicio periodo B", value=fecha_inicio - timedelta(weeks=52),
+                                         key="comparacion_inicio_b")
+            with col_b2:
+                fin_b = st.date_input("Fin periodo B", value=fecha_fin - timedelta(weeks=52),
+                                      key="comparacion_fin_b")
+            inicio_a, fin_a = fecha_inicio, fecha_fin
+            etiqueta_a, etiqueta_b = "A", "B"
+            comparacion = comparar_periodos(inicio_a, fin_a, inicio_b, fin_b, empleado)
+        
+        if comparacion is None:
+            # safe_db_operation ya mostró el error de base de datos
+            return
+        
+        st.caption(f"**{etiqueta_a}** ({inicio_a} a {fin_a}) frente a **{etiqueta_b}** ({inicio_b} a {fin_b})")
+        
+        columnas = st.columns(len(comparacion["por_categoria"]))
+        for columna, fila in zip(columnas, comparacion["por_categoria"]):
+            with columna:
+                st.metric(
+                    ETIQUETAS_METRICAS[fila["categoria"]],
+                    int(fila["a"]),
+                    f"{fila['delta']:+d}" + (f" ({fila['pct']:+.1f}%)" if fila["pct"] is not None else "")
+                )
+        
+        if not comparacion["por_empleado"]:
+            st.info("📭 No hay ventas en ninguno de los dos periodos")
+            return
+        
+        config_variacion = {
+            "a": st.column_config.NumberColumn(etiqueta_a, format="%d"),
+            "b": st.column_config.NumberColumn(etiqueta_b, format="%d"),
+            "delta": st.column_config.NumberColumn("Diferencia", format="%+d"),
+            "pct": st.column_config.NumberColumn("Variación", format="%+.1f%%")
+        }
+        tab_empleado, tab_departamento = st.tabs(["👤 Por Empleado", "🏢 Por Departamento"])
+        
+        with tab_empleado:
+            por_empleado = pd.DataFrame(comparacion["por_empleado"])
+            fig = px.bar(
+                por_empleado.sort_values("delta"),
+                y="empleado",
+                x="delta",
+                color="departamento",
+                orientation="h",
+                title="Diferencia por Empleado",
+                labels={"delta": "Diferencia", "empleado": "Empleado", "departamento": "Departamento"}
+            )
+            fig.update_layout(height=max(300, 25 * len(por_empleado)))
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(
+                por_empleado,
+                column_config={"empleado": "Empleado", "departamento": "Departamento", **config_variacion},
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        with tab_departamento:
+            st.dataframe(
+                pd.DataFrame(comparacion["por_departamento"]),
+                column_config={"departamento": "Departamento", **config_variacion},
+                hide_index=True,
+                use_container_width=True
+            )
+
+@st.fragment
+def fragmento_ranking(referencia):
+    """Pestaña de rankings materializados; cambiar periodo o métrica solo ejecuta esta pestaña"""
+    with medir_render("dashboard.ranking"):
+        col_tipo, col_metrica = st.columns(2)
+        with col_tipo:
+            tipo = st.radio(
+                "Periodo",
+                repositorio.TIPOS_PERIODO,
+                format_func=str.capitalize,
+                horizontal=True,
+                key="ranking_tipo"
+            )
+        with col_metrica:
+            metrica = st.selectbox(
+                "Métrica",
+                list(ETIQUETAS_METRICAS),
+                format_func=ETIQUETAS_METRICAS.get,
+                key="ranking_metrica"
+            )
+        
+        inicio, fin, etiqueta = repositorio.rango_periodo(tipo, referencia)
+        st.caption(f"Periodo {etiqueta} ({inicio} a {fin}, según la fecha fin del filtro), comparado con el anterior")
+        
+        filas = obtener_ranking(tipo, referencia, metrica)
+        if not filas:
+            st.info("📭 No hay ventas en este periodo")
+            return
+        
+        ranking = pd.DataFrame(filas)
+        ranking["cambio"] = [cambio_puesto(p, a) for p, a in zip(ranking["puesto"], ranking["puesto_anterior"])]
+        st.dataframe(
+            ranking[["puesto", "cambio", "empleado", "departamento", "puesto_departamento", "valor"]],
+            column_config={
+                "puesto": st.column_config.NumberColumn("Puesto", format="%d"),
+                "cambio": "Cambio",
+                "empleado": "Empleado",
+                "departamento": "Departamento",
+                "puesto_departamento": st.column_config.NumberColumn("Puesto en depto.", format="%d"),
+                "valor": st.column_config.NumberColumn(ETIQUETAS_METRICAS[metrica], format="%d")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+@st.fragment
+def fragmento_detalle_ventas(fecha_inicio, fecha_fin, empleado):
+    """Tabla de detalle paginada por llave; solo viaja una página por rerun"""
+    with medir_render("dashboard.detalle"):
+        mostrar_detalle_paginado(fecha_inicio, fecha_fin, empleado)
+
+def mostrar_detalle_paginado(fecha_inicio, fecha_fin, empleado):
+    """Controles y página actual del detalle de ventas"""
+    col_orden, col_tamano = st.columns([3, 1])
+    with col_orden:
+        orden = st.selectbox("Ordenar por", list(ORDENES_DETALLE), key="detalle_orden")
+    with col_tamano:
+        tamano = st.selectbox("Filas por página", [25, 50, 100, 200], index=1, key="detalle_tamano")
+    
+    # Reiniciar la paginación si cambian filtros, orden o tamaño
+    firma = (fecha_inicio, fecha_fin, empleado, orden, tamano)
+    estado = st.session_state.get("detalle_paginacion")
+    if not estado or estado["firma"] != firma:
+        estado = {"firma": firma, "cursores": [None], "siguiente": None}
+        st.session_state.detalle_paginacion = estado
+    
+    pagina = len(estado["cursores"]) - 1
+    resultado = obtener_pagina_ventas(
+        fecha_inicio, fecha_fin, empleado, orden, estado["cursores"][-1], tamano
+    )
+    total = contar_ventas(fecha_inicio, fecha_fin, empleado)
+    if resultado is None or total is None:
+        # safe_db_operation ya mostró el error de base de datos
+        return
+    df, estado["siguiente"] = resultado
+    total_paginas = max(1, -(-total // tamano))
+    
+    st.dataframe(
+        df[['fecha', 'empleado'] + CATEGORIAS],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    def ir_anterior():
+        estado["cursores"].pop()
+    
+    def ir_siguiente():
+        estado["cursores"].append(estado["siguiente"])
+    
+    col_ant, col_info, col_sig = st.columns([1, 2, 1])
+    with col_ant:
+        st.button("◀ Anterior", key="detalle_anterior", disabled=pagina == 0,
+                  on_click=ir_anterior, use_container_width=True)
+    with col_info:
+        st.caption(f"Página {pagina + 1} de {total_paginas} • {total} registros")
+    with col_sig:
+        st.button("Siguiente ▶", key="detalle_siguiente", disabled=estado["siguiente"] is None,
+                  on_click=ir_siguiente, use_container_width=True)
+
+def pagina_empleados():
+    """Administración de empleados"""
+    if not verificar_permiso("Supervisor"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("👥 Administración de Empleados")
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 Registrar Ventas", "➕ Agregar Empleado", "📊 Estadísticas", "🎯 Metas"])
+    
+    with tab1:
+        st.subheader("📝 Registro de Ventas para Empleados")
+        
+        col_fecha, col_emp = st.columns(2)
+        
+        with col_fecha:
+            fecha = st.date_input("📅 Fecha", key="fecha_admin")
+        
+        with col_emp:
+            empleados_df = cargar_empleados_con_departamento()
+            if not empleados_df.empty:
+                empleado = st.selectbox(
+                    "👤 Empleado",
+                    empleados_df['nombre'].tolist(),
+                    key="emp_admin"
+                )
+            else:
+                st.warning("No hay empleados registrados")
+                empleado = None
+        
+        if empleado:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                autoliquidable = st.number_input("💊 Autoliquidable", min_value=0, step=1, key="auto_admin")
+                oferta = st.number_input("🏷️ Oferta", min_value=0, step=1, key="ofer_admin")
+            
+            with col2:
+                marca_propia = st.number_input("⭐ Marca Propia", min_value=0, step=1, key="marca_admin")
+                producto = st.number_input("➕ Adicional", min_value=0, step=1, key="prod_admin")
+            
+            if st.button("💾 Guardar Registro", use_container_width=True, type="primary"):
+                if (autoliquidable + oferta + marca_propia + producto) > 0:
+                    guardar_venta(fecha, empleado, autoliquidable, oferta, marca_propia, producto)
+                    st.success("✅ Registro guardado")
+                    st.rerun()
+                else:
+                    st.warning("⚠️ Debe registrar al menos una venta")
+    
+    with tab2:
+        st.subheader("➕ Agregar Nuevo Empleado")
+        
+        with st.form("form_empleado"):
+            nuevo_empleado = st.text_input("Nombre completo", placeholder="Ej: Juan Pérez")
+            departamento = st.selectbox(
+                "Departamento",
+                DEPARTAMENTOS
+            )
+            
+            if st.form_submit_button("Agregar Empleado", use_container_width=True):
+                if nuevo_empleado:
+                    if guardar_empleado_db(nuevo_empleado, departamento):
+                        st.success(f"✅ Empleado '{nuevo_empleado}' agregado")
+                        st.rerun()
+                    else:
+                        st.error("❌ El empleado ya existe")
+                else:
+                    st.warning("⚠️ Ingrese un nombre")
+        
+        st.markdown("---")
+        st.subheader("📋 Empleados Activos")
+        
+        empleados_df = cargar_empleados_con_departamento()
+        if not empleados_df.empty:
+            for _, row in empleados_df.iterrows():
+                col_emp, col_depto, col_btn = st.columns([3, 2, 1])
+                
+                with col_emp:
+                    st.write(f"• {row['nombre']}")
+                
+                with col_depto:
+                    color = {
+                        "Droguería": "🔵",
+                        "Equipos Médicos": "🟢",
+                        "Tienda": "🟠",
+                        "Cajas": "🟣"
+                    }.get(row['departamento'], "⚪")
+                    st.write(f"{color} {row['departamento']}")
+                
+                with col_btn:
+                    if st.button("🗑️", key=f"del_{row['nombre']}"):
+                        eliminar_empleado_db(row['nombre'])
+                        st.success(f"✅ Empleado eliminado")
+                        st.rerun()
+        else:
+            st.info("📭 No hay empleados activos")
+    
+    with tab3:
+        st.subheader("📊 Estadísticas por Departamento")
+        
+        deptos_df = obtener_empleados_por_departamento()
+        
+        if not deptos_df.empty:
+            col_graf, col_tabla = st.columns(2)
+            
+            with col_graf:
+                fig = px.pie(
+                    deptos_df,
+                    values='cantidad',
+                    names='departamento',
+                    title="Distribución por Departamento",
+                    color_discrete_sequence=px.colors.qualitative.Set3
+                )
+                fig.update_traces(textposition='inside', textinfo='percent+label')
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col_tabla:
+                st.dataframe(
+                    deptos_df,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "departamento": "Departamento",
+                        "cantidad": "Cantidad"
+                    }
+                )
+        else:
+            st.info("No hay datos de departamentos")
+    
+    with tab4:
+        st.subheader("🎯 Metas de Ventas")
+        
+        col_alcance, col_objetivo = st.columns(2)
+        with col_alcance:
+            alcance = st.radio(
+                "Aplica a", ["empleado", "departamento"],
+                format_func={"empleado": "👤 Empleado", "departamento": "🏢 Departamento"}.get,
+                horizontal=True, key="meta_alcance"
+            )
+        with col_objetivo:
+            if alcance == "empleado":
+                opciones = cargar_empleados_con_departamento()
+                opciones = opciones['nombre'].tolist() if not opciones.empty else []
+            else:
+                opciones = DEPARTAMENTOS
+            objetivo = st.selectbox("Objetivo", opciones, key="meta_objetivo")
+        
+        col_metrica, col_periodo, col_valor = st.columns(3)
+        with col_metrica:
+            metrica = st.selectbox("Métrica", list(ETIQUETAS_METRICAS), format_func=ETIQUETAS_METRICAS.get, key="meta_metrica")
+        with col_periodo:
+            tipo = st.selectbox("Periodo", list(ETIQUETAS_PERIODOS), format_func=ETIQUETAS_PERIODOS.get, key="meta_tipo")
+        with col_valor:
+            valor = st.number_input("Meta (unidades)", min_value=1, step=1, value=10, key="meta_valor")
+        
+        if st.button("💾 Guardar Meta", use_container_width=True, type="primary", disabled=not objetivo):
+            if guardar_meta(alcance, objetivo, metrica, tipo, valor):
+                st.success("✅ Meta guardada")
+                st.rerun()
+        
+        st.markdown("---")
+        st.subheader("📋 Metas Vigentes")
+        
+        metas = listar_metas() or []
+        if metas:
+            for meta in metas:
+                col_meta, col_btn = st.columns([6, 1])
+                with col_meta:
+                    st.progress(
+                        fraccion_meta(meta),
+                        text=f"{describir_meta(meta)}: {meta['avance']}/{meta['meta']}"
+                    )
+                with col_btn:
+                    if st.button("🗑️", key=f"del_meta_{meta['id']}"):
+                        eliminar_meta(meta["id"])
+                        st.rerun()
+        else:
+            st.info("📭 No hay metas definidas")
+
+def pagina_usuarios():
+    """Administración de usuarios"""
+    if not verificar_permiso("Administrador"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("👤 Administración de Usuarios")
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Dashboard", "👥 Gestión", "➕ Crear Usuario", "🔑 Sesiones"])
+    
+    with tab1:
+        usuarios_df = cargar_usuarios_db()
+        
+        if not usuarios_df.empty:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Total Usuarios", len(usuarios_df))
+            with col2:
+                admin_count = len(usuarios_df[usuarios_df['rol'] == 'Administrador'])
+                st.metric("Administradores", admin_count)
+            with col3:
+                sup_count = len(usuarios_df[usuarios_df['rol'] == 'Supervisor'])
+                st.metric("Supervisores", sup_count)
+            with col4:
+                ven_count = len(usuarios_df[usuarios_df['rol'] == 'Vendedor'])
+                st.metric("Vendedores", ven_count)
+            
+            col_graf1, col_graf2 = st.columns(2)
+            
+            with col_graf1:
+                roles_df = usuarios_df['rol'].value_counts().reset_index()
+                roles_df.columns = ['Rol', 'Cantidad']
+                
+                fig = px.pie(
+                    roles_df,
+                    values='Cantidad',
+                    names='Rol',
+                    title="Distribución por Rol",
+                    color='Rol',
+                    color_discrete_map={
+                        'Administrador': '#ff4444',
+                        'Supervisor': '#ffaa00',
+                        'Vendedor': '#00aa00'
+                    }
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col_graf2:
+                status_df = usuarios_df['activo'].value_counts().reset_index()
+                status_df.columns = ['Estado', 'Cantidad']
+                status_df['Estado'] = status_df['Estado'].map({1: 'Activos', 0: 'Inactivos'})
+                
+                fig = px.bar(
+                    status_df,
+                    x='Estado',
+                    y='Cantidad',
+                    title="Estado de Usuarios",
+                    color='Estado',
+                    color_discrete_map={'Activos': '#00aa00', 'Inactivos': '#ff4444'}
+                )
+                st.plotly_chart(fig, use_container_width=True)
+    
+    with tab2:
+        usuarios_df = cargar_usuarios_db()
+        
+        if not usuarios_df.empty:
+            for _, row in usuarios_df.iterrows():
+                with st.container():
+                    cols = st.columns([2, 1, 1, 1, 1])
+                    
+                    with cols[0]:
+                        st.write(f"**{row['username']}**")
+                        if pd.notna(row['empleado']) and row['empleado']:
+                            st.caption(f"👤 {row['empleado']}")
+                    
+                    with cols[1]:
+                        rol_color = {
+                            'Administrador': '🔴',
+                            'Supervisor': '🟡',
+                            'Vendedor': '🟢'
+                        }.get(row['rol'], '⚪')
+                        st.write(f"{rol_color} {row['rol']}")
+                    
+                    with cols[2]:
+                        estado = "✅ Activo" if row['activo'] else "❌ Inactivo"
+                        st.write(estado)
+                    
+                    with cols[3]:
+                        if pd.notna(row['ultimo_acceso']) and row['ultimo_acceso']:
+                            fecha = str(row['ultimo_acceso'])[:10]
+                            st.write(f"📅 {fecha}")
+                        else:
+                            st.write("📅 Nunca")
+                    
+                    with cols[4]:
+                        if row['username'] != 'admin':
+                            if row['activo']:
+                                if st.button("🔌", key=f"deact_{row['username']}", help="Desactivar"):
+                                    toggle_usuario_activo(row['username'], 0)
+                                    st.rerun()
+                            else:
+                                if st.button("🔓", key=f"act_{row['username']}", help="Activar"):
+                                    toggle_usuario_activo(row['username'], 1)
+                                    st.rerun()
+                            
+                            if st.button("🗑️", key=f"del_{row['username']}", help="Eliminar"):
+                                exito, msg = eliminar_usuario_db(row['username'])
+                                if exito:
+                                    st.success(msg)
+                                    st.rerun()
+                                else:
+                                    st.error(msg)
+                    
+                    st.divider()
+        else:
+            st.info("No hay usuarios registrados")
+    
+    with tab3:
+        opcion = st.radio(
+            "Tipo de usuario",
+            ["Vendedor (desde empleado)", "Administrador/Supervisor"],
+            horizontal=True
+        )
+        
+        if opcion == "Vendedor (desde empleado)":
+            empleados_sin_usuario = obtener_empleados_sin_usuario()
+            
+            if empleados_sin_usuario:
+                with st.form("form_vendedor"):
+                    empleado = st.selectbox("Seleccionar Empleado", empleados_sin_usuario)
+                    username = st.text_input("Nombre de Usuario", placeholder="ej: jperez")
+                    
+                    col_pass1, col_pass2 = st.columns([3, 1])
+                    with col_pass1:
+                        password = st.text_input("Contraseña", type="password")
+                    with col_pass2:
+                        if st.form_submit_button("🎲 Generar"):
+                            sugerida = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+                            st.session_state['sugerida'] = sugerida
+                    
+                    if 'sugerida' in st.session_state:
+                        st.info(f"Contraseña sugerida: `{st.session_state['sugerida']}`")
+                    
+                    if st.form_submit_button("Crear Usuario", use_container_width=True):
+                        if username and password:
+                            if len(password) >= 6:
+                                exito, msg = crear_usuario_empleado(username, password, empleado)
+                                if exito:
+                                    st.success(msg)
+                                    st.balloons()
+                                    st.rerun()
+                                else:
+                                    st.error(msg)
+                            else:
+                                st.error("La contraseña debe tener al menos 6 caracteres")
+                        else:
+                            st.warning("Todos los campos son obligatorios")
+            else:
+                st.success("✅ Todos los empleados tienen usuario")
+        
+        else:
+            with st.form("form_admin"):
+                username = st.text_input("Usuario", placeholder="ej: admin2")
+                password = st.text_input("Contraseña", type="password")
+                rol = st.selectbox("Rol", ["Administrador", "Supervisor"])
+                
+                if st.form_submit_button("Crear Usuario", use_container_width=True):
+                    if username and password:
+                        if len(password) >= 6:
+                            if crear_usuario_db(username, password, rol):
+                                st.success(f"✅ Usuario {username} creado")
+                                st.balloons()
+                                st.rerun()
+                            else:
+                                st.error("❌ El usuario ya existe")
+                        else:
+                            st.error("La contraseña debe tener al menos 6 caracteres")
+                    else:
+                        st.warning("Todos los campos son obligatorios")
+    
+    with tab4:
+        st.subheader("🔑 Sesiones activas")
+        sesiones_df = cargar_sesiones_activas()
+        
+        if sesiones_df is not None and not sesiones_df.empty:
+            for username, grupo in sesiones_df.groupby("username", sort=True):
+                col_user, col_todas = st.columns([3, 1])
+                with col_user:
+                    st.write(f"**{username}** • {len(grupo)} sesión(es)")
+                with col_todas:
+                    if st.button("Revocar todas", key=f"rev_todas_{username}", use_container_width=True):
+                        revocar_sesiones_usuario(username)
+                        st.rerun()
+                
+                for _, row in grupo.iterrows():
+                    cols = st.columns([2, 2, 2, 1])
+                    with cols[0]:
+                        st.caption(f"Creada: {str(row['creada'])[:16]}")
+                    with cols[1]:
+                        st.caption(f"Expira: {str(row['expira'])[:16]}")
+                    with cols[2]:
+                        ultimo = str(row['ultimo_uso'])[:16] if pd.notna(row['ultimo_uso']) else "—"
+                        st.caption(f"Último uso: {ultimo}")
+                    with cols[3]:
+                        if st.button("🔒", key=f"rev_{row['token_hash']}", help="Revocar sesión"):
+                            revocar_sesion(token_hash=row['token_hash'])
+                            st.rerun()
+                st.divider()
+        else:
+            st.info("No hay sesiones activas")
+
+def pagina_reportes():
+    """Reportes Excel generados en segundo plano"""
+    if not verificar_permiso("Supervisor"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("📑 Reportes")
+    
+    programador = obtener_programador_reportes()
+    if programador.ultima_ejecucion:
+        st.caption(
+            f"🕒 Última revisión automática: {programador.ultima_ejecucion.strftime('%H:%M:%S')} "
+            f"({programador.ultimos_generados} generados) · próxima: "
+            f"{programador.proxima_ejecucion().strftime('%H:%M:%S')}"
+        )
+    if programador.ultimo_error:
+        st.warning(f"⚠️ La última generación automática falló: {programador.ultimo_error}")
+    
+    with st.expander("➕ Generar un reporte"):
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            tipo = st.selectbox("Tipo", reportes.TIPOS_REPORTE, format_func=str.capitalize)
+        with col2:
+            referencia = st.date_input("Fecha dentro del periodo", value=date.today())
+        with col3:
+            forzar = st.checkbox("Forzar", help="Regenerar aunque los datos no hayan cambiado")
+        
+        if st.button("Generar reporte", use_container_width=True, type="primary"):
+            enviar_trabajo("trabajo_reporte", reportes.generar_reporte, tipo, referencia, forzar)
+        
+        futuro = resultado_trabajo("trabajo_reporte")
+        if futuro is not None:
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                logger.error(f"Error generando reporte: {e}")
+                st.error(f"❌ Error al generar el reporte: {e}")
+                resultado = None
+            if resultado and resultado["estado"] == "vigente":
+                st.info(f"ℹ️ {resultado['archivo']} ya está al día: los datos no cambiaron")
+            elif resultado:
+                st.success(f"✅ {resultado['archivo']} generado en {resultado['segundos']:.2f} s")
+    
+    filtro = st.radio(
+        "Mostrar",
+        ["Todos", *reportes.TIPOS_REPORTE],
+        horizontal=True,
+        format_func=str.capitalize
+    )
+    disponibles = reportes.listar_reportes(None if filtro == "Todos" else filtro)
+    if not disponibles:
+        st.info("📭 Aún no hay reportes generados")
+        return
+    
+    for metadatos in disponibles[:MAX_REPORTES_LISTADOS]:
+        col1, col2, col3 = st.columns([3, 3, 2])
+        with col1:
+            st.write(f"**{metadatos['tipo'].capitalize()} {metadatos['etiqueta']}**")
+            st.caption(f"{metadatos['desde']} a {metadatos['hasta']}")
+        with col2:
+            st.caption(
+                f"Generado {metadatos['generado'].replace('T', ' ')} · "
+                f"{metadatos['empleados']} empleados · {metadatos['bytes'] / 1024:.0f} KB"
+            )
+        with col3:
+            ruta = reportes.ruta_reporte(metadatos)
+            if not ruta.exists():
+                continue
+            # Solo el reporte elegido se lee y viaja al navegador; los demás muestran un botón liviano
+            if st.session_state.get("reporte_descarga") != metadatos["archivo"]:
+                if st.button("📄 Preparar descarga", key=f"preparar_{metadatos['archivo']}",
+                             use_container_width=True):
+                    st.session_state.reporte_descarga = metadatos["archivo"]
+                    st.rerun()
+                continue
+            st.download_button(
+                "📥 Descargar",
+                data=ruta.read_bytes(),
+                file_name=metadatos["archivo"],
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"descargar_{metadatos['archivo']}",
+                use_container_width=True
+            )
+    if len(disponibles) > MAX_REPORTES_LISTADOS:
+        st.caption(f"Se muestran los {MAX_REPORTES_LISTADOS} más recientes de {len(disponibles)}")
+
+def pagina_config():
+    """Configuración del sistema"""
+    if not verificar_permiso("Administrador"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("⚙️ Configuración del Sistema")
+    
+    tab1, tab2 = st.tabs(["🎨 Apariencia", "📦 Productos"])
+    
+    config = obtener_config()
+    
+    with tab1:
+        st.subheader("Configuración de Apariencia")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            tema = st.selectbox(
+                "Tema",
+                ["Claro", "Oscuro", "Sistema"],
+                index=["Claro", "Oscuro", "Sistema"].index(
+                    config.get("tema", "Claro")
+                )
+            )
+        
+        with col2:
+            idioma = st.selectbox(
+                "Idioma",
+                ["Español", "Inglés"],
+                index=["Español", "Inglés"].index(
+                    config.get("idioma", "Español")
+                )
+            )
+        
+        if st.button("Guardar configuración de apariencia", use_container_width=True):
+            nueva_config = descongelar_config(config)
+            nueva_config["tema"] = tema
+            nueva_config["idioma"] = idioma
+            if guardar_config(nueva_config):
+                st.success("✅ Configuración guardada")
+            else:
+                st.error("❌ Error al guardar")
+    
+    with tab2:
+        st.subheader("Productos Adicionales")
+        
+        productos = config.get("productos_adicionales", [])
+        
+        with st.form("form_productos"):
+            nuevos_productos = st.text_area(
+                "Lista de productos (uno por línea)",
+                value="\n".join(productos),
+                height=150,
+                help="Ingresa un producto por línea"
+            )
+            
+            if st.form_submit_button("Guardar productos", use_container_width=True):
+                lista_productos = [p.strip() for p in nuevos_productos.split("\n") if p.strip()]
+                nueva_config = descongelar_config(config)
+                nueva_config["productos_adicionales"] = lista_productos
+                if guardar_config(nueva_config):
+                    st.success(f"✅ {len(lista_productos)} productos guardados")
+                else:
+                    st.error("❌ Error al guardar")
+
+def pagina_backup():
+    """Backup y restauración"""
+    if not verificar_permiso("Administrador"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("💾 Backup y Restauración")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📀 Crear Backup")
+        st.write("Crea una copia de seguridad de la base de datos")
+        
+        config = obtener_config()
+        nivel_guardado = config.get("nivel_compresion", repositorio.NIVEL_COMPRESION)
+        nivel = st.select_slider(
+            "Nivel de compresión",
+            options=list(range(1, 10)),
+            value=nivel_guardado,
+            help="1 = más rápido, 9 = archivo más pequeño"
+        )
+        
+        if st.button("Crear Backup ahora", use_container_width=True, type="primary"):
+            if nivel != nivel_guardado:
+                nueva_config = descongelar_config(config)
+                nueva_config["nivel_compresion"] = nivel
+                guardar_config(nueva_config)
+            
+            with st.spinner("Creando backup..."):
+                contenido, nombre, metricas = crear_backup(nivel)
+                
+                if contenido:
+                    btn = st.download_button(
+                        label="📥 Descargar Backup",
+                        data=contenido,
+                        file_name=nombre,
+                        mime="application/gzip",
+                        use_container_width=True
+                    )
+                    st.success(f"✅ Backup creado: {nombre}")
+                    st.caption(
+                        f"📦 {metricas['original'] / 1048576:.1f} MB → {metricas['comprimido'] / 1048576:.1f} MB "
+                        f"({metricas['comprimido'] / max(metricas['original'], 1):.0%}) · "
+                        f"compresión {metricas['segundos_compresion']:.2f} s a {metricas['mb_s']:.0f} MB/s · "
+                        f"{metricas['bloques']} bloques en {metricas['hilos']} hilos · nivel {metricas['nivel']}"
+                    )
+                else:
+                    st.error("❌ Error al crear backup")
+    
+    with col2:
+        st.subheader("🔄 Restaurar Backup")
+        st.write("Restaura una copia de seguridad existente")
+        
+        archivo = st.file_uploader(
+            "Seleccionar archivo de backup",
+            type=['db', 'gz'],
+            help="Archivos .db o .gz"
+        )
+        
+        if archivo is not None:
+            if st.button("Restaurar", use_container_width=True, type="primary"):
+                with st.spinner("Restaurando backup..."):
+                    if restaurar_backup(archivo):
+                        st.success("✅ Backup restaurado correctamente")
+                        st.info("🔄 La aplicación se reiniciará")
+                        st.rerun()
+                    else:
+                        st.error("❌ Error al restaurar backup")
+    
+    st.divider()
+    seccion_fusionar_backup()
+
+def seccion_fusionar_backup():
+    """Fusiona los registros de un backup de otra tienda sin reemplazar la base local"""
+    st.subheader("🔀 Fusionar backup de otra tienda")
+    st.write("Agrega los registros nuevos de otra tienda; los repetidos se omiten y los distintos se reportan como conflicto")
+    
+    archivo = st.file_uploader("Backup a fusionar", type=['db', 'gz'], key="archivo_fusion")
+    if archivo is None:
+        st.session_state.pop("fusion_previa", None)
+        return
+    
+    firma = (archivo.name, archivo.size)
+    previa = st.session_state.get("fusion_previa")
+    if previa is None or previa["firma"] != firma:
+        if st.button("🔍 Analizar backup", use_container_width=True):
+            with st.spinner("Analizando backup..."):
+                archivo.seek(0)
+                informe = fusionar_backup(archivo, simular=True)
+            if informe:
+                st.session_state.fusion_previa = {"firma": firma, "informe": informe}
+                st.rerun()
+        return
+    
+    informe = previa["informe"]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Nuevas", informe["insertadas"])
+    with col2:
+        st.metric("Omitidas (ya existen)", informe["omitidas"])
+    with col3:
+        st.metric("En conflicto", informe["conflictos"])
+    with col4:
+        st.metric("Sin empleado", informe["sin_empleado"])
+    
+    # Empleados sin equivalente local: crear, asociar a uno local o descartar sus filas
+    mapa = {}
+    if informe["empleados_creados"]:
+        st.write("Empleados que no existen en esta tienda:")
+        crear, descartar = "➕ Crear", "🚫 Descartar filas"
+        editado = st.data_editor(
+            pd.DataFrame({
+                "empleado": informe["empleados_creados"],
+                "asociar_a": [crear] * len(informe["empleados_creados"])
+            }),
+            column_config={
+                "empleado": st.column_config.TextColumn("Empleado en el backup", disabled=True),
+                "asociar_a": st.column_config.SelectboxColumn(
+                    "Asociar a",
+                    options=[crear, descartar, *(cargar_empleados_db() or ())],
+                    required=True
+                )
+            },
+            hide_index=True,
+            use_container_width=True,
+            key="fusion_mapa"
+        )
+        for empleado, destino in zip(editado["empleado"], editado["asociar_a"]):
+            if destino != crear:
+                mapa[empleado] = None if destino == descartar else destino
+        if mapa:
+            st.caption("Los cambios de asociación se aplican al confirmar; las cifras de arriba suponen crear todos")
+    
+    if informe["conflictos"]:
+        with st.expander(f"⚠️ Filas en conflicto (muestra de {len(informe['muestra_conflictos'])})"):
+            st.dataframe(pd.DataFrame(informe["muestra_conflictos"]), use_container_width=True, hide_index=True)
+    
+    if st.button("Confirmar fusión", type="primary", use_container_width=True):
+        with st.spinner("Fusionando backup..."):
+            archivo.seek(0)
+            resultado = fusionar_backup(archivo, mapa_empleados=mapa)
+        if resultado:
+            st.session_state.pop("fusion_previa", None)
+            st.success(
+                f"✅ {resultado['insertadas']} registros agregados, {resultado['omitidas']} omitidos, "
+                f"{resultado['conflictos']} en conflicto, {resultado['sin_empleado']} descartados"
+            )
+
+def pagina_sistema():
+    """Información del sistema"""
+    if not verificar_permiso("Administrador"):
+        st.error("❌ No tienes permisos para acceder a esta página")
+        return
+    
+    st.title("🖥️ Información del Sistema")
+    
+    # Obtener estadísticas
+    estadisticas = obtener_estadisticas()
+    totales = estadisticas.get("total", {})
+    total_ventas = totales.get("registros_ventas", 0)
+    total_empleados = totales.get("empleados_activos", 0)
+    total_usuarios = totales.get("usuarios", 0)
+    
+    # Métricas
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Versión", "2.0.0")
+        st.metric("Python", "3.9+")
+    
+    with col2:
+        st.metric("Streamlit", "1.28.1")
+        st.metric("Base de datos", "SQLite 3")
+    
+    with col3:
+        st.metric("Registros ventas", total_ventas)
+        st.metric("Empleados activos", total_empleados)
+    
+    with col4:
+        st.metric("Usuarios", total_usuarios)
+        st.metric("Usuario actual", st.session_state.usuario_actual)
+    
+    # Información de archivos
+    st.subheader("📁 Archivos del Sistema")
+    
+    col_files1, col_files2 = st.columns(2)
+    backend = repositorio.obtener_backend()
+    
+    with col_files1:
+        if backend.ruta and os.path.exists(backend.ruta):
+            size_db = os.path.getsize(backend.ruta) / 1024
+            st.metric("Base de datos", f"{size_db:.1f} KB")
+        
+        if os.path.exists("app.log"):
+            size_log = os.path.getsize("app.log") / 1024
+            st.metric("Archivo de log", f"{size_log:.1f} KB")
+    
+    with col_files2:
+        archivo_config = getattr(backend, "archivo_config", None)
+        if archivo_config and os.path.exists(archivo_config):
+            size_config = os.path.getsize(archivo_config) / 1024
+            st.metric("Configuración", f"{size_config:.1f} KB")
+        
+        backups = list(Path(".").glob("backup_*.gz"))
+        st.metric("Backups disponibles", len(backups))
+    
+    # Memoria del proceso y de las sesiones
+    st.subheader("🧠 Memoria")
+    
+    rss_mb, tipo_rss = memoria_proceso_mb()
+    tamanos_sesion = medir_estado_sesion(st.session_state.to_dict())
+    sesiones = medir_sesiones_activas()
+    
+    col_mem1, col_mem2, col_mem3 = st.columns(3)
+    with col_mem1:
+        st.metric(f"RSS del proceso ({tipo_rss})", f"{rss_mb:.1f} MB")
+    with col_mem2:
+        st.metric("Esta sesión", f"{sum(tamanos_sesion.values()) / 1024:.1f} KB")
+    with col_mem3:
+        st.metric("Sesiones activas", len(sesiones) if sesiones is not None else "N/D")
+    
+    with st.expander("📦 Detalle de memoria por sesión"):
+        if sesiones:
+            st.dataframe(sesiones, use_container_width=True, hide_index=True)
+        st.write("**Claves de esta sesión**")
+        st.dataframe(
+            sorted(
+                ({"clave": k, "bytes": v} for k, v in tamanos_sesion.items()),
+                key=lambda fila: fila["bytes"], reverse=True
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    # Costo del hash de contraseñas
+    with st.expander("🔐 Latencia de login por costo de hash"):
+        st.caption(
+            f"Costo actual: scrypt N={COSTO_SCRYPT}, r={SCRYPT_R}, p={SCRYPT_P} "
+            "(ajustable con la variable de entorno VENTAS_SCRYPT_N)"
+        )
+        if st.button("Medir latencia", use_container_width=True):
+            enviar_trabajo("trabajo_benchmark_hash", benchmark_costos_hash)
+        futuro = resultado_trabajo("trabajo_benchmark_hash")
+        if futuro is not None:
+            try:
+                st.dataframe(futuro.result(), use_container_width=True, hide_index=True)
+            except Exception as e:
+                logger.error(f"Error midiendo latencia: {e}")
+                st.error(f"❌ Error al medir: {e}")
+    
+    # Estado del sondeo de arranque
+    sondeo = obtener_sondeo_arranque()
+    col_sondeo, col_boton = st.columns([3, 1])
+    with col_boton:
+        if st.button("🔍 Verificar ahora", use_container_width=True):
+            sondeo.obtener(forzar=True)
+    with col_sondeo:
+        if sondeo.ultima_ejecucion:
+            st.caption(f"Última verificación del entorno: {sondeo.ultima_ejecucion.strftime('%d/%m/%Y %H:%M:%S')}")
+        if sondeo.issues:
+            for issue in sondeo.issues:
+                st.warning(f"⚠️ {issue}")
+        else:
+            st.success("✅ Entorno y base de datos sin problemas")
+    
+    # Contadores por departamento y mes
+    with st.expander("🔢 Contadores"):
+        col_depto, col_mes = st.columns(2)
+        with col_depto:
+            st.write("**Empleados activos por departamento**")
+            st.dataframe(
+                [{"departamento": k or "Sin departamento", "empleados": v}
+                 for k, v in estadisticas.get("departamento", {}).items()],
+                use_container_width=True,
+                hide_index=True
+            )
+        with col_mes:
+            st.write("**Registros de venta por mes**")
+            st.dataframe(
+                [{"mes": k, "registros": v} for k, v in sorted(estadisticas.get("mes", {}).items(), reverse=True)],
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        if st.button("🔁 Reconciliar contadores", use_container_width=True):
+            conn = get_connection()
+            diferencias = reconciliar_estadisticas(conn)
+            conn.close()
+            if diferencias:
+                st.warning(f"⚠️ Se corrigieron {len(diferencias)} contadores")
+                st.dataframe(diferencias, use_container_width=True, hide_index=True)
+            else:
+                st.success("✅ Los contadores coinciden con un recálculo completo")
+    
+    # Registro de cambios
+    with st.expander("📝 Registro de cambios"):
+        st.caption(f"Los cambios se conservan {RETENCION_CAMBIOS_DIAS} días (I = alta, U = modificación, D = baja)")
+        col_resumen, col_purga = st.columns(2)
+        with col_resumen:
+            # Solo bajo demanda y sobre una ventana de seq: el registro puede ser grande
+            resumir = st.button(f"📊 Resumir los últimos {VENTANA_CAMBIOS_SISTEMA:,} cambios", use_container_width=True)
+        with col_purga:
+            if st.button("🧹 Purgar cambios vencidos", use_container_width=True):
+                borrados = purgar_cambios()
+                if borrados is not None:
+                    st.success(f"✅ {borrados} cambios purgados")
+        if resumir:
+            cambios = resumir_cambios(VENTANA_CAMBIOS_SISTEMA)
+            if cambios:
+                st.dataframe(cambios, use_container_width=True, hide_index=True)
+            elif cambios is not None:
+                st.info("No hay cambios registrados")
+    
+    # Tiempos de arranque en frío
+    with st.expander("⏱️ Arranque en frío"):
+        metricas = obtener_metricas_arranque()
+        col_imp, col_hitos = st.columns(2)
+        
+        with col_imp:
+            st.write("**Importación por módulo**")
+            if metricas.importaciones:
+                st.dataframe(
+                    [{"módulo": nombre, "ms": round(ms, 1)} for nombre, ms in metricas.importaciones.items()],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.caption("Sin importaciones diferidas registradas")
+        
+        with col_hitos:
+            st.write("**Hitos desde el arranque**")
+            for hito, ms in metricas.hitos.items():
+                st.metric(hito, f"{ms:.0f} ms")
+    
+    # Ver logs
+    with st.expander("📋 Ver logs del sistema"):
+        if os.path.exists("app.log"):
+            with open("app.log", "r") as f:
+                lines = f.readlines()[-50:]  # Últimas 50 líneas
+                st.code("".join(lines), language="text")
+        else:
+            st.info("No hay logs disponibles")
+
+# -------------------- MENÚ LATERAL --------------------
+def sidebar_menu():
+    """Muestra el menú lateral"""
+    with st.sidebar:
+        # Información del usuario
+        if st.session_state.autenticado:
+            color_rol = {
+                "Administrador": "#ff4444",
+                "Supervisor": "#ffaa00",
+                "Vendedor": "#00aa00"
+            }.get(st.session_state.usuario_rol, "#666")
+            
+            st.markdown(f"""
+            <div style="
+                background: linear-gradient(135deg, {color_rol}20 0%, {color_rol}10 100%);
+                padding: 15px;
+                border-radius: 10px;
+                margin-bottom: 20px;
+                border-left: 5px solid {color_rol};
+            ">
+                <strong style="color: {color_rol};">👤 {st.session_state.usuario_actual}</strong><br>
+                <span style="color: {color_rol};">{st.session_state.usuario_rol}</span><br>
+                <small>{datetime.now().strftime('%H:%M')} - {datetime.now().strftime('%d/%m/%Y')}</small>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            st.markdown("### 📋 Menú")
+            st.markdown("---")
+            
+            # Definir menú según rol
+            if st.session_state.usuario_rol == "Vendedor":
+                menu_items = {
+                    "Registro Ventas": "📝",
+                }
+            elif st.session_state.usuario_rol == "Supervisor":
+                menu_items = {
+                    "Registro Ventas": "📝",
+                    "Dashboard": "📊",
+                    "Reportes": "📑",
+                    "Empleados": "👥"
+                }
+            else:  # Administrador
+                menu_items = {
+                    "Dashboard": "📊",
+                    "Reportes": "📑",
+                    "Empleados": "👥",
+                    "Usuarios": "👤",
+                    "Configuración": "⚙️",
+                    "Backup": "💾",
+                    "Sistema": "🖥️"
+                }
+            
+            # Botones del menú
+            for page, icon in menu_items.items():
+                if st.button(
+                    f"{icon} {page}",
+                    key=f"menu_{page}",
+                    use_container_width=True,
+                    type="primary" if st.session_state.pagina_actual == page else "secondary"
+                ):
+                    st.session_state.pagina_actual = page
+                    st.rerun()
+            
+            st.markdown("---")
+            
+            # Botón de reinicio (solo admin)
+            if st.session_state.usuario_rol == "Administrador":
+                if st.button("🔄 Reiniciar App", use_container_width=True):
+                    st.cache_data.clear()
+                    st.cache_resource.clear()
+                    st.rerun()
+            
+            # Cerrar sesión
+            if st.button("🚪 Cerrar Sesión", use_container_width=True):
+                cerrar_sesion()
+            
+            st.caption("© 2024 Locatel Restrepo")
+
+# -------------------- MAIN --------------------
+def main():
+    """Función principal de la aplicación"""
+    with medir_render("app.completa"):
+        # Verificar entorno y base de datos (una vez por proceso)
+        issues = obtener_sondeo_arranque().obtener()
+        if issues:
+            for issue in issues:
+                st.warning(f"⚠️ {issue}")
+        
+        # Inicializar estado
+        init_session_state()
+        
+        # Restaurar la sesión desde el token persistente
+        restaurar_o_revalidar_sesion()
+        
+        # Mostrar menú lateral si está autenticado; el programador de reportes
+        # (hilo y pool de procesos) arranca tras el login, no en el arranque en frío
+        if st.session_state.autenticado:
+            obtener_programador_reportes()
+            sidebar_menu()
+        
+        # Navegación
+        if not st.session_state.autenticado:
+            pagina_login()
+        else:
+            if st.session_state.pagina_actual == "Login":
+                pagina_login()
+            elif st.session_state.pagina_actual == "Registro Ventas":
+                pagina_registro_ventas()
+            elif st.session_state.pagina_actual == "Dashboard":
+                pagina_dashboard()
+            elif st.session_state.pagina_actual == "Reportes":
+                pagina_reportes()
+            elif st.session_state.pagina_actual == "Empleados":
+                pagina_empleados()
+            elif st.session_state.pagina_actual == "Usuarios":
+                pagina_usuarios()
+            elif st.session_state.pagina_actual == "Configuración":
+                pagina_config()
+            elif st.session_state.pagina_actual == "Backup":
+                pagina_backup()
+            elif st.session_state.pagina_actual == "Sistema":
+                pagina_sistema()
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""Herramienta de administración por línea de comandos, sin Streamlit.
+
+Ejemplos (desde la carpeta de ventas.db):
+
+    python admin_ventas.py backup --destino backups/
+    python admin_ventas.py restaurar backup_ventas_20240101_000000.db.gz
+    python admin_ventas.py fusionar sucursal.db.gz --mapa "ANA PEREZ=Ana Pérez" --simular
+    python admin_ventas.py exportar ventas.csv --desde 2024-01-01
+    python admin_ventas.py importar ventas.csv
+    python admin_ventas.py reconstruir
+    python admin_ventas.py vacuum
+    python admin_ventas.py archivar --antes 2023-01-01
+    python admin_ventas.py purgar-cambios --dias 7
+    python admin_ventas.py sembrar 100000 --dias 730
+    python admin_ventas.py estadisticas
+    python admin_ventas.py reportes --tipo mensual --fecha 2024-01-15
+"""
+import argparse
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+
+import reportes
+import repositorio
+
+logger = logging.getLogger("admin_ventas")
+
+# -------------------- COMANDOS --------------------
+def comando_backup(args):
+    """Guarda un backup comprimido de la base de datos"""
+    contenido, nombre, metricas = repositorio.crear_backup(args.nivel)
+    if contenido is None:
+        print("No se pudo crear el backup", file=sys.stderr)
+        return 1
+    destino = Path(args.destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    ruta = destino / nombre
+    ruta.write_bytes(contenido)
+    print(f"Backup creado: {ruta} ({len(contenido) / 1024:.1f} KB)")
+    print(
+        f"  {metricas['original'] / 1048576:.1f} MB -> {metricas['comprimido'] / 1048576:.1f} MB, "
+        f"volcado {metricas['segundos_volcado']:.2f} s, compresión {metricas['segundos_compresion']:.2f} s "
+        f"({metricas['mb_s']:.0f} MB/s, {metricas['bloques']} bloques, {metricas['hilos']} hilos, nivel {metricas['nivel']})"
+    )
+    return 0
+
+def comando_restaurar(args):
+    """Reemplaza la base de datos con un backup"""
+    repositorio.restaurar_backup(args.archivo)
+    repositorio.create_tables()
+    print(f"Backup restaurado desde {args.archivo}")
+    return 0
+
+def comando_fusionar(args):
+    """Agrega los registros nuevos de un backup de otra tienda"""
+    mapa = {}
+    for par in args.mapa:
+        externo, _, local = par.partition("=")
+        mapa[externo] = local or None
+    informe = repositorio.fusionar_backup(
+        args.archivo,
+        mapa_empleados=mapa,
+        crear_empleados=not args.sin_crear_empleados,
+        simular=args.simular
+    )
+    prefijo = "(simulación) " if args.simular else ""
+    print(
+        f"{prefijo}{informe['insertadas']} insertadas, {informe['omitidas']} omitidas, "
+        f"{informe['conflictos']} en conflicto, {informe['sin_empleado']} sin empleado"
+    )
+    if informe["empleados_creados"]:
+        print(f"Empleados creados: {', '.join(informe['empleados_creados'])}")
+    if informe["empleados_sin_mapa"]:
+        print(f"Empleados descartados: {', '.join(informe['empleados_sin_mapa'])}")
+    for fila in informe["muestra_conflictos"][:20]:
+        print(f"  conflicto: id {fila['id_origen']} {fila['fecha']} {fila['empleado']} ({fila['fecha_registro']})")
+    return 0 if not informe["conflictos"] else 2
+
+def comando_exportar(args):
+    """Exporta los registros de venta a csv o json"""
+    formato = args.formato or ("json" if args.salida.endswith(".json") else "csv")
+    if args.salida == "-":
+        total = repositorio.exportar_ventas(sys.stdout, formato, args.desde, args.hasta)
+    else:
+        with open(args.salida, "w", encoding="utf-8", newline="") as f:
+            total = repositorio.exportar_ventas(f, formato, args.desde, args.hasta)
+    print(f"{total} registros exportados", file=sys.stderr)
+    return 0
+
+def comando_importar(args):
+    """Importa registros de venta desde csv o json"""
+    importadas, rechazadas = repositorio.importar_ventas(repositorio.leer_ventas_archivo(args.archivo))
+    print(f"{importadas} registros importados, {len(rechazadas)} rechazados")
+    for numero, motivo in rechazadas[:20]:
+        print(f"  fila {numero}: {motivo}")
+    return 0 if not rechazadas else 2
+
+def comando_reconstruir(args):
+    """Recalcula rollup, contadores, índices y estadísticas del planificador"""
+    diferencias = repositorio.reconstruir_derivados()
+    print(f"Rollup e índices reconstruidos; {len(diferencias)} contadores corregidos")
+    for diferencia in diferencias:
+        print(f"  {diferencia['grupo']}/{diferencia['clave']}: {diferencia['guardado']} -> {diferencia['real']}")
+    return 0
+
+def comando_vacuum(args):
+    """Compacta la base de datos"""
+    antes, despues = repositorio.compactar_base()
+    print(f"Base compactada: {antes / 1024:.1f} KB -> {despues / 1024:.1f} KB")
+    return 0
+
+def comando_archivar(args):
+    """Mueve los registros antiguos a una base de archivo"""
+    movidos = repositorio.archivar_ventas(args.antes, args.destino)
+    print(f"{movidos} registros archivados en {args.destino}")
+    return 0
+
+def comando_purgar_cambios(args):
+    """Elimina del registro de cambios los más antiguos que la retención"""
+    borrados = repositorio.purgar_cambios(args.dias)
+    print(f"{borrados} cambios purgados (retención {args.dias} días)")
+    return 0
+
+def comando_sembrar(args):
+    """Genera registros de prueba"""
+    creados = repositorio.sembrar_ventas(args.registros, args.dias, args.semilla)
+    print(f"{creados} registros de prueba generados")
+    return 0
+
+def comando_estadisticas(args):
+    """Muestra contadores, tamaño de la base y latencia de las consultas de referencia"""
+    estadisticas = repositorio.obtener_estadisticas()
+    for grupo, valores in estadisticas.items():
+        print(f"[{grupo}]")
+        for clave, valor in valores.items():
+            print(f"  {clave or '(vacío)'}: {valor}")
+
+    conn = repositorio.get_connection()
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    tamano_pagina = conn.execute("PRAGMA page_size").fetchone()[0]
+    libres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.close()
+    print(f"\nBase de datos: {paginas * tamano_pagina / 1024:.1f} KB ({paginas} páginas, {libres} libres)")
+
+    print(f"\nConsultas de referencia (últimos {args.dias} días):")
+    for resultado in repositorio.medir_consultas(args.dias):
+        print(f"  {resultado['consulta']:<30} {resultado['ms']:>9.2f} ms  {resultado['filas']:>7} filas")
+        print(f"    {resultado['plan']}")
+    return 0
+
+def comando_reportes(args):
+    """Genera los reportes Excel pendientes, o el de un periodo concreto"""
+    if args.tipo or args.fecha:
+        referencia = date.fromisoformat(args.fecha) if args.fecha else None
+        tipos = [args.tipo] if args.tipo else reportes.TIPOS_REPORTE
+        resultados = [reportes.generar_reporte(tipo, referencia, args.forzar) for tipo in tipos]
+    else:
+        resultados = reportes.generar_pendientes()
+    for resultado in resultados:
+        detalle = f"{resultado['segundos']:.2f} s" if resultado["estado"] == "generado" else "sin cambios"
+        print(f"{resultado['estado']:<9} {reportes.CARPETA_REPORTES}/{resultado['archivo']} ({detalle})")
+    return 0
+
+def comando_benchmark_hash(args):
+    """Mide la latencia de login para cada costo de scrypt"""
+    for resultado in repositorio.benchmark_costos_hash():
+        print(
+            f"N={resultado['N']:<6} {resultado['memoria (MB)']:>5} MB  "
+            f"{resultado['latencia (ms)']:>8} ms  {resultado['actual']}"
+        )
+    return 0
+
+# -------------------- MAIN --------------------
+def crear_parser():
+    """Define los subcomandos y sus argumentos"""
+    parser = argparse.ArgumentParser(description="Administración de la base de ventas")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto ventas.db o VENTAS_DB)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra el log detallado")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("backup", help="Crea un backup comprimido")
+    p.add_argument("--destino", default=".", help="Carpeta donde guardar el backup")
+    p.add_argument("--nivel", type=int, choices=range(1, 10), metavar="1-9",
+                   help="Nivel de compresión (por defecto el de config.json)")
+    p.set_defaults(funcion=comando_backup)
+
+    p = sub.add_parser("restaurar", help="Restaura un backup (.db o .db.gz)")
+    p.add_argument("archivo")
+    p.set_defaults(funcion=comando_restaurar)
+
+    p = sub.add_parser("fusionar", help="Agrega los registros nuevos de un backup de otra tienda")
+    p.add_argument("archivo")
+    p.add_argument("--mapa", action="append", default=[], metavar="EXTERNO=LOCAL",
+                   help="Asocia un empleado del backup a uno local; sin LOCAL descarta sus filas")
+    p.add_argument("--sin-crear-empleados", action="store_true",
+                   help="Descarta las filas de empleados que no existen localmente")
+    p.add_argument("--simular", action="store_true", help="Solo muestra el informe, sin cambios")
+    p.set_defaults(funcion=comando_fusionar)
+
+    p = sub.add_parser("exportar", help="Exporta registros de venta")
+    p.add_argument("salida", help="Archivo .csv o .json, o - para la salida estándar")
+    p.add_argument("--formato", choices=["csv", "json"])
+    p.add_argument("--desde", help="Fecha inicial AAAA-MM-DD")
+    p.add_argument("--hasta", help="Fecha final AAAA-MM-DD")
+    p.set_defaults(funcion=comando_exportar)
+
+    p = sub.add_parser("importar", help="Importa registros de venta desde csv o json")
+    p.add_argument("archivo")
+    p.set_defaults(funcion=comando_importar)
+
+    p = sub.add_parser("reconstruir", help="Reconstruye rollup, contadores e índices")
+    p.set_defaults(funcion=comando_reconstruir)
+
+    p = sub.add_parser("vacuum", help="Compacta la base de datos")
+    p.set_defaults(funcion=comando_vacuum)
+
+    p = sub.add_parser("archivar", help="Mueve registros antiguos a otra base")
+    p.add_argument("--antes", required=True, help="Archiva los registros anteriores a esta fecha")
+    p.add_argument("--destino", default="ventas_archivo.db")
+    p.set_defaults(funcion=comando_archivar)
+
+    p = sub.add_parser("purgar-cambios", help="Purga el registro de cambios (change_log)")
+    p.add_argument("--dias", type=int, default=repositorio.RETENCION_CAMBIOS_DIAS,
+                   help="Días de cambios que se conservan")
+    p.set_defaults(funcion=comando_purgar_cambios)
+
+    p = sub.add_parser("sembrar", help="Genera registros de prueba para benchmarks")
+    p.add_argument("registros", type=int)
+    p.add_argument("--dias", type=int, default=365)
+    p.add_argument("--semilla", type=int)
+    p.set_defaults(funcion=comando_sembrar)
+
+    p = sub.add_parser("estadisticas", help="Muestra contadores y latencia de consultas")
+    p.add_argument("--dias", type=int, default=30)
+    p.set_defaults(funcion=comando_estadisticas)
+
+    p = sub.add_parser("reportes", help="Genera los reportes Excel cuyos datos cambiaron")
+    p.add_argument("--tipo", choices=reportes.TIPOS_REPORTE)
+    p.add_argument("--fecha", help="Fecha AAAA-MM-DD dentro del periodo (por defecto hoy)")
+    p.add_argument("--forzar", action="store_true", help="Regenera aunque los datos no hayan cambiado")
+    p.set_defaults(funcion=comando_reportes)
+
+    p = sub.add_parser("benchmark-hash", help="Mide el costo del hash de contraseñas")
+    p.set_defaults(funcion=comando_benchmark_hash)
+
+    return parser
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    if args.db:
+        repositorio.usar_backend(repositorio.BackendSQLite(args.db))
+
+    # Mismas migraciones que la aplicación, salvo al restaurar (se aplican después)
+    if args.comando != "restaurar":
+        repositorio.init_database()
+        repositorio.create_tables()
+    return args.funcion(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""API HTTP local para registrar ventas desde terminales POS y procesos por lotes.
+
+Corre aparte de Streamlit, desde la misma carpeta que ventas.db:
+
+    python api_ventas.py --host 127.0.0.1 --puerto 8502
+
+Endpoints:
+    POST /api/token   {"username": ..., "password": ...} -> {"token": ...}
+    POST /api/ventas  una venta, una lista o {"ventas": [...]} con Authorization: Bearer <token>
+                      (200 si se aceptó alguna; 400 con el motivo de cada fila si ninguna es válida)
+    GET  /api/salud
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import repositorio
+from repositorio import CATEGORIAS, get_connection
+
+logger = logging.getLogger("api_ventas")
+
+# -------------------- CONFIGURACIÓN --------------------
+MAX_CUERPO_BYTES = 1024 * 1024
+MAX_VENTAS_POR_SOLICITUD = 1000
+
+# El escritor espera hasta ESPERA_LOTE segundos para juntar solicitudes concurrentes
+ESPERA_LOTE = 0.005
+MAX_LOTE_ESCRITOR = 5000
+
+# Segundos que se reutiliza la validación de un token
+TTL_TOKENS = 60
+
+# -------------------- AUTENTICACIÓN --------------------
+class CacheTokens:
+    """Recuerda por TTL_TOKENS segundos los tokens ya validados contra la base"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def usuario(self, token):
+        """Devuelve el usuario del token (con su empleado) o None si no es válido"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._tokens.get(token)
+            if entrada and entrada[1] > ahora:
+                return entrada[0]
+
+        usuario = repositorio.validar_sesion_persistente(token, registrar_uso=True)
+        if not usuario:
+            with self._lock:
+                self._tokens.pop(token, None)
+            return None
+
+        usuario = dict(usuario)
+        usuario["empleado"] = None
+        if usuario.get("empleado_id"):
+            conn = get_connection()
+            fila = conn.execute(
+                "SELECT nombre FROM empleados WHERE id = ?", (usuario["empleado_id"],)
+            ).fetchone()
+            conn.close()
+            usuario["empleado"] = fila[0] if fila else None
+
+        with self._lock:
+            self._tokens[token] = (usuario, ahora + TTL_TOKENS)
+        return usuario
+
+# -------------------- VALIDACIÓN --------------------
+def normalizar_ventas(cuerpo, clave_solicitud=None):
+    """Acepta una venta, una lista o {"ventas": [...]} y devuelve la lista de ventas"""
+    if isinstance(cuerpo, dict) and "ventas" in cuerpo:
+        ventas = cuerpo["ventas"]
+    elif isinstance(cuerpo, list):
+        ventas = cuerpo
+    else:
+        ventas = [cuerpo]
+    if not isinstance(ventas, list):
+        return None
+
+    # La cabecera Idempotency-Key cubre las ventas que no traen clave propia
+    if clave_solicitud:
+        for indice, venta in enumerate(ventas):
+            if isinstance(venta, dict) and "clave" not in venta:
+                venta["clave"] = clave_solicitud if len(ventas) == 1 else f"{clave_solicitud}:{indice}"
+    return ventas
+
+def validar_venta(venta, usuario, empleados):
+    """Convierte la venta en (clave, fecha, empleado, categorías...) o devuelve el motivo de rechazo"""
+    if not isinstance(venta, dict):
+        return None, "La venta debe ser un objeto JSON"
+
+    try:
+        fecha = date.fromisoformat(str(venta.get("fecha") or date.today().isoformat()))
+    except ValueError:
+        return None, "Fecha inválida (use AAAA-MM-DD)"
+
+    empleado = venta.get("empleado") or usuario["empleado"]
+    if not isinstance(empleado, str):
+        return None, "Empleado inválido"
+    if empleado not in empleados:
+        return None, f"Empleado desconocido o inactivo: {empleado}"
+    if usuario["rol"] == "Vendedor" and empleado != usuario["empleado"]:
+        return None, "Un vendedor solo puede registrar sus propias ventas"
+
+    conteos = []
+    for categoria in CATEGORIAS:
+        valor = venta.get(categoria, 0)
+        if isinstance(valor, bool) or not isinstance(valor, int) or valor < 0:
+            return None, f"'{categoria}' debe ser un entero no negativo"
+        conteos.append(valor)
+    if not sum(conteos):
+        return None, "Debe registrar al menos una venta"
+
+    clave = venta.get("clave")
+    if clave is not None and (not isinstance(clave, str) or not 0 < len(clave) <= 128):
+        return None, "La clave de idempotencia debe ser texto de 1 a 128 caracteres"
+
+    return (clave, fecha.isoformat(), empleado, *conteos), None
+
+# -------------------- ESCRITOR ÚNICO --------------------
+class EscritorVentas:
+    """Único hilo que escribe en registros_ventas.
+
+    Las solicitudes concurrentes se agrupan en una sola transacción, lo que
+    evita la contención por el bloqueo de escritura de SQLite y amortiza el
+    costo del commit entre todas ellas.
+    """
+
+    def __init__(self):
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._ejecutar, name="escritor-ventas", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, username, ventas):
+        """Encola ventas validadas y espera [(estado, registro_id)] en el mismo orden"""
+        pedido = {
+            "username": username,
+            "ventas": ventas,
+            "listo": threading.Event(),
+            "resultado": None,
+            "error": None
+        }
+        self._cola.put(pedido)
+        pedido["listo"].wait()
+        if pedido["error"]:
+            raise pedido["error"]
+        return pedido["resultado"]
+
+    def _ejecutar(self):
+        """Bucle del escritor: junta pedidos y los confirma en una transacción"""
+        conn = get_connection()
+        while True:
+            pedidos = [self._cola.get()]
+            total = len(pedidos[0]["ventas"])
+            limite = time.monotonic() + ESPERA_LOTE
+            while total < MAX_LOTE_ESCRITOR:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pedido = self._cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                pedidos.append(pedido)
+                total += len(pedido["ventas"])
+
+            try:
+                self._escribir(conn, pedidos)
+            except Exception as e:
+                # Cualquier fallo se entrega a los pedidos del lote; el hilo sigue vivo
+                logger.error(f"Error escribiendo lote de ventas: {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    conn = get_connection()
+                for pedido in pedidos:
+                    pedido["error"] = e
+            finally:
+                for pedido in pedidos:
+                    pedido["listo"].set()
+
+    def _escribir(self, conn, pedidos):
+        """Inserta las ventas respetando las claves de idempotencia"""
+        c = conn.cursor()
+        for pedido in pedidos:
+            resultado = []
+            for clave, *fila in pedido["ventas"]:
+                llave = f"{pedido['username']}:{clave}" if clave is not None else None
+                if llave:
+                    existente = c.execute(
+                        "SELECT registro_id FROM idempotencia_ventas WHERE clave = ?", (llave,)
+                    ).fetchone()
+                    if existente:
+                        resultado.append(("duplicada", existente[0]))
+                        continue
+
+                c.execute("""
+                    INSERT INTO registros_ventas
+                    (fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, fila)
+                registro_id = c.lastrowid
+                if llave:
+                    c.execute(
+                        "INSERT INTO idempotencia_ventas (clave, registro_id) VALUES (?, ?)",
+                        (llave, registro_id)
+                    )
+                resultado.append(("aceptada", registro_id))
+            pedido["resultado"] = resultado
+        conn.commit()
+
+# -------------------- SERVIDOR HTTP --------------------
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Atiende las rutas de la API"""
+
+    server_version = "VentasAPI/1.0"
+
+    def log_message(self, formato, *args):
+        logger.debug(f"API {self.address_string()} - {formato % args}")
+
+    def _responder(self, estado, datos, inicio=None):
+        """Envía una respuesta JSON, con la latencia si se midió"""
+        if inicio is not None:
+            datos["latencia_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode()
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        if inicio is not None:
+            self.send_header("X-Latencia-Ms", str(datos["latencia_ms"]))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _leer_json(self):
+        """Lee el cuerpo JSON de la solicitud o devuelve None si no es válido"""
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            largo = 0
+        if not 0 < largo <= MAX_CUERPO_BYTES:
+            # El cuerpo no se lee: la conexión no puede reutilizarse
+            self.close_connection = True
+            return None
+        try:
+            return json.loads(self.rfile.read(largo))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+
+    def do_GET(self):
+        if self.path == "/api/salud":
+            self._responder(200, {"estado": "ok"})
+        else:
+            self._responder(404, {"error": "Ruta no encontrada"})
+
+    def do_POST(self):
+        inicio = time.perf_counter()
+        if self.path == "/api/token":
+            self._emitir_token(inicio)
+        elif self.path == "/api/ventas":
+            self._registrar_ventas(inicio)
+        else:
+            self._responder(404, {"error": "Ruta no encontrada"}, inicio)
+
+    def _emitir_token(self, inicio):
+        """Cambia usuario y contraseña por un token Bearer"""
+        cuerpo = self._leer_json()
+        if not isinstance(cuerpo, dict):
+            self._responder(400, {"error": "Se esperaba {\"username\", \"password\"}"}, inicio)
+            return
+
+        username = str(cuerpo.get("username") or "")
+        password = str(cuerpo.get("password") or "")
+        ip = self.client_address[0]
+        espera = repositorio.obtener_limitador_login().espera(username, ip) if username else 0
+        if espera:
+            self._responder(429, {"error": f"Demasiados intentos fallidos; reintente en {espera} s"}, inicio)
+            return
+
+        usuario = repositorio.autenticar_usuario(username, password, ip) if username and password else None
+        if not usuario:
+            self._responder(401, {"error": "Credenciales inválidas"}, inicio)
+            return
+
+        token = repositorio.crear_sesion_persistente(usuario["username"])
+        self._responder(200, {"token": token, "tipo": "Bearer"}, inicio)
+
+    def _registrar_ventas(self, inicio):
+        """Valida las ventas, las envía al escritor y resume el resultado"""
+        autorizacion = self.headers.get("Authorization", "")
+        token = autorizacion[7:] if autorizacion.startswith("Bearer ") else None
+        usuario = self.server.tokens.usuario(token) if token else None
+        if not usuario:
+            self._responder(401, {"error": "Token ausente, inválido o vencido"}, inicio)
+            return
+
+        cuerpo = self._leer_json()
+        ventas = normalizar_ventas(cuerpo, self.headers.get("Idempotency-Key")) if cuerpo is not None else None
+        if not ventas:
+            self._responder(400, {"error": "Cuerpo JSON inválido"}, inicio)
+            return
+        if len(ventas) > MAX_VENTAS_POR_SOLICITUD:
+            self._responder(413, {"error": f"Máximo {MAX_VENTAS_POR_SOLICITUD} ventas por solicitud"}, inicio)
+            return
+
+        empleados = set(repositorio.listar_empleados_activos())
+        resultados = [None] * len(ventas)
+        validas, indices = [], []
+        for indice, venta in enumerate(ventas):
+            fila, error = validar_venta(venta, usuario, empleados)
+            if error:
+                resultados[indice] = {"indice": indice, "estado": "rechazada", "error": error}
+            else:
+                validas.append(fila)
+                indices.append(indice)
+
+        if validas:
+            try:
+                escritas = self.server.escritor.enviar(usuario["username"], validas)
+            except sqlite3.Error:
+                self._responder(503, {"error": "No se pudo escribir en la base de datos"}, inicio)
+                return
+            except Exception:
+                self._responder(500, {"error": "Error interno al registrar las ventas"}, inicio)
+                return
+            for indice, (estado, registro_id) in zip(indices, escritas):
+                resultados[indice] = {"indice": indice, "estado": estado, "id": registro_id}
+
+        conteo = {estado: sum(r["estado"] == estado for r in resultados)
+                  for estado in ("aceptada", "duplicada", "rechazada")}
+        datos = {
+            "aceptadas": conteo["aceptada"],
+            "duplicadas": conteo["duplicada"],
+            "rechazadas": conteo["rechazada"],
+            "resultados": resultados
+        }
+        # Si ninguna venta es válida la solicitud completa se rechaza, con el motivo por fila
+        self._responder(200 if validas else 400, datos, inicio)
+        logger.info(
+            f"📮 API ventas ({usuario['username']}): {conteo['aceptada']} aceptadas, "
+            f"{conteo['duplicada']} duplicadas, {conteo['rechazada']} rechazadas "
+            f"en {datos['latencia_ms']:.1f} ms"
+        )
+
+def crear_servidor(host, puerto):
+    """Crea el servidor con su escritor único y caché de tokens"""
+    servidor = ThreadingHTTPServer((host, puerto), ManejadorAPI)
+    servidor.daemon_threads = True
+    servidor.escritor = EscritorVentas()
+    servidor.tokens = CacheTokens()
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de ingesta de ventas")
+    parser.add_argument("--host", default=os.environ.get("VENTAS_API_HOST", "127.0.0.1"))
+    parser.add_argument("--puerto", type=int, default=int(os.environ.get("VENTAS_API_PUERTO", 8502)))
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Mismas verificaciones y migraciones que la aplicación web
+    for issue in repositorio.preparar_base():
+        logger.warning(f"⚠️ {issue}")
+
+    servidor = crear_servidor(args.host, args.puerto)
+    logger.info(f"🚀 API de ventas escuchando en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()
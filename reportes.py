@@ -0,0 +1,346 @@
+"""Reportes Excel (diarios, semanales y mensuales) generados desde el rollup diario.
+
+Los archivos quedan en la carpeta de reportes junto con un .json que guarda la
+huella de los datos con que se construyeron; un reporte solo se vuelve a generar
+cuando esa huella cambia. Se generan desde el programador en segundo plano de la
+aplicación o desde la línea de comandos:
+
+    python admin_ventas.py reportes
+    python admin_ventas.py reportes --tipo mensual --fecha 2024-01-15 --forzar
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from repositorio import CATEGORIAS, TIPOS_PERIODO, get_connection, rango_periodo
+
+logger = logging.getLogger(__name__)
+
+# -------------------- CONFIGURACIÓN --------------------
+CARPETA_REPORTES = os.environ.get("VENTAS_REPORTES", "reportes")
+TIPOS_REPORTE = TIPOS_PERIODO
+
+# Cambiar al modificar el formato para que los reportes existentes se regeneren
+VERSION_REPORTES = "1"
+
+# Segundos entre revisiones del programador
+INTERVALO_REPORTES = 900
+
+# Segundos antes de la primera revisión, para no competir con el primer render
+RETRASO_REPORTES = 60
+
+# Los reportes de periodos más antiguos se eliminan del disco
+RETENCION_REPORTES_DIAS = 400
+
+NOMBRES_CATEGORIAS = {
+    "autoliquidable": "Autoliquidable",
+    "oferta": "Oferta",
+    "marca_propia": "Marca propia",
+    "producto_adicional": "Producto adicional"
+}
+
+# Un solo generador por proceso (programador y botones de la interfaz)
+_lock_generacion = threading.Lock()
+
+# Un lock de archivo más viejo que esto lo dejó un proceso que murió
+VENCIMIENTO_LOCK_REPORTE = 600
+ESPERA_LOCK_REPORTE = 0.2
+
+@contextmanager
+def _lock_reporte(ruta):
+    """Lock entre procesos (pool de trabajos, CLI) para generar un reporte: archivo .lock creado con O_EXCL"""
+    lock = ruta.with_suffix(".lock")
+    while True:
+        try:
+            descriptor = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > VENCIMIENTO_LOCK_REPORTE:
+                    logger.warning(f"🔓 Lock abandonado eliminado: {lock.name}")
+                    lock.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(ESPERA_LOCK_REPORTE)
+    try:
+        os.write(descriptor, str(os.getpid()).encode())
+        os.close(descriptor)
+        yield
+    finally:
+        lock.unlink(missing_ok=True)
+
+def _reemplazar_atomico(ruta, escribir, sufijo):
+    """Escribe en un temporal de la misma carpeta y lo renombra: nadie ve el archivo a medias"""
+    descriptor, temporal = tempfile.mkstemp(suffix=sufijo, dir=ruta.parent)
+    os.close(descriptor)
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    except Exception:
+        os.remove(temporal)
+        raise
+
+# -------------------- PERIODOS --------------------
+def periodos_pendientes(hoy=None):
+    """Periodo en curso y periodo anterior de cada tipo"""
+    hoy = hoy or date.today()
+    periodos = []
+    for tipo in TIPOS_REPORTE:
+        inicio, _, _ = rango_periodo(tipo, hoy)
+        periodos.append((tipo, hoy))
+        periodos.append((tipo, inicio - timedelta(days=1)))
+    return periodos
+
+# -------------------- HUELLA DE DATOS --------------------
+def huella_datos(conn, inicio, fin):
+    """Hash de las filas del rollup y de los departamentos que alimentan un reporte"""
+    huella = hashlib.sha256(VERSION_REPORTES.encode())
+    for fila in conn.execute(f"""
+        SELECT fecha, empleado, registros, {', '.join(CATEGORIAS)}
+        FROM ventas_diarias
+        WHERE fecha BETWEEN ? AND ?
+        ORDER BY fecha, empleado
+    """, (inicio.isoformat(), fin.isoformat())):
+        huella.update(repr(fila).encode())
+    for fila in conn.execute("SELECT nombre, departamento FROM empleados ORDER BY nombre"):
+        huella.update(repr(fila).encode())
+    return huella.hexdigest()
+
+# -------------------- CONSTRUCCIÓN --------------------
+def _escribir_hoja(libro, titulo, encabezados, filas, anchos):
+    """Agrega una hoja en modo write_only con encabezado en negrita"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    hoja = libro.create_sheet(titulo)
+    for indice, ancho in enumerate(anchos, start=1):
+        hoja.column_dimensions[get_column_letter(indice)].width = ancho
+    hoja.freeze_panes = "A2"
+
+    negrita = Font(bold=True)
+    encabezado = []
+    for valor in encabezados:
+        celda = WriteOnlyCell(hoja, value=valor)
+        celda.font = negrita
+        encabezado.append(celda)
+    hoja.append(encabezado)
+    for fila in filas:
+        hoja.append(fila)
+
+def construir_reporte(conn, ruta, tipo, etiqueta, inicio, fin):
+    """Escribe el .xlsx de un periodo: resumen, por empleado, por departamento y por día"""
+    from openpyxl import Workbook
+
+    parametros = (inicio.isoformat(), fin.isoformat())
+    sumas = ", ".join(f"SUM(v.{cat})" for cat in CATEGORIAS)
+    total = " + ".join(f"SUM(v.{cat})" for cat in CATEGORIAS)
+    categorias = [NOMBRES_CATEGORIAS[cat] for cat in CATEGORIAS]
+
+    por_empleado = conn.execute(f"""
+        SELECT v.empleado, COALESCE(e.departamento, '(sin departamento)'),
+               SUM(v.registros), {sumas}, {total} AS total
+        FROM ventas_diarias v
+        LEFT JOIN empleados e ON e.nombre = v.empleado
+        WHERE v.fecha BETWEEN ? AND ?
+        GROUP BY v.empleado
+        ORDER BY total DESC, v.empleado
+    """, parametros).fetchall()
+    por_departamento = conn.execute(f"""
+        SELECT COALESCE(e.departamento, '(sin departamento)') AS departamento,
+               COUNT(DISTINCT v.empleado), SUM(v.registros), {sumas}, {total} AS total
+        FROM ventas_diarias v
+        LEFT JOIN empleados e ON e.nombre = v.empleado
+        WHERE v.fecha BETWEEN ? AND ?
+        GROUP BY departamento
+        ORDER BY total DESC
+    """, parametros).fetchall()
+    por_dia = conn.execute(f"""
+        SELECT v.fecha, SUM(v.registros), {sumas}, {total}
+        FROM ventas_diarias v
+        WHERE v.fecha BETWEEN ? AND ?
+        GROUP BY v.fecha
+        ORDER BY v.fecha
+    """, parametros).fetchall()
+
+    totales = [sum(fila[i] for fila in por_dia) for i in range(1, len(CATEGORIAS) + 3)]
+    resumen = [
+        ["Periodo", f"{tipo.capitalize()} {etiqueta}"],
+        ["Desde", inicio],
+        ["Hasta", fin],
+        ["Generado", datetime.now().replace(microsecond=0)],
+        ["Registros", totales[0]],
+        *([nombre, valor] for nombre, valor in zip(categorias, totales[1:-1])),
+        ["Total productos", totales[-1]]
+    ]
+
+    libro = Workbook(write_only=True)
+    _escribir_hoja(libro, "Resumen", ["Concepto", "Valor"], resumen, [20, 24])
+    _escribir_hoja(
+        libro, "Por empleado",
+        ["Empleado", "Departamento", "Registros", *categorias, "Total"],
+        por_empleado, [30, 18, 11, *[18] * len(CATEGORIAS), 11]
+    )
+    _escribir_hoja(
+        libro, "Por departamento",
+        ["Departamento", "Empleados", "Registros", *categorias, "Total"],
+        por_departamento, [20, 11, 11, *[18] * len(CATEGORIAS), 11]
+    )
+    _escribir_hoja(
+        libro, "Por día",
+        ["Fecha", "Registros", *categorias, "Total"],
+        ([date.fromisoformat(fila[0]), *fila[1:]] for fila in por_dia),
+        [12, 11, *[18] * len(CATEGORIAS), 11]
+    )
+
+    _reemplazar_atomico(ruta, libro.save, ".xlsx")
+    return len(por_empleado)
+
+# -------------------- GENERACIÓN --------------------
+def _ruta_reporte(tipo, etiqueta):
+    """Ruta del .xlsx de un periodo"""
+    return Path(CARPETA_REPORTES) / f"reporte_{tipo}_{etiqueta}.xlsx"
+
+def _leer_metadatos(ruta):
+    """Metadatos guardados junto a un reporte, o None"""
+    try:
+        return json.loads(ruta.with_suffix(".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def generar_reporte(tipo, referencia=None, forzar=False):
+    """Genera el reporte del periodo si sus datos cambiaron; devuelve sus metadatos"""
+    referencia = referencia or date.today()
+    inicio, fin, etiqueta = rango_periodo(tipo, referencia)
+    ruta = _ruta_reporte(tipo, etiqueta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    with _lock_generacion, _lock_reporte(ruta):
+        conn = get_connection()
+        try:
+            huella = huella_datos(conn, inicio, fin)
+            metadatos = _leer_metadatos(ruta)
+            if not forzar and metadatos and metadatos.get("huella") == huella and ruta.exists():
+                return {**metadatos, "estado": "vigente"}
+
+            comienzo = time.perf_counter()
+            empleados = construir_reporte(conn, ruta, tipo, etiqueta, inicio, fin)
+        finally:
+            conn.close()
+
+        metadatos = {
+            "tipo": tipo,
+            "etiqueta": etiqueta,
+            "desde": inicio.isoformat(),
+            "hasta": fin.isoformat(),
+            "archivo": ruta.name,
+            "huella": huella,
+            "generado": datetime.now().isoformat(timespec="seconds"),
+            "empleados": empleados,
+            "bytes": ruta.stat().st_size,
+            "segundos": round(time.perf_counter() - comienzo, 3)
+        }
+        # El .json se reemplaza después del .xlsx: nunca describe un libro que aún no existe
+        _reemplazar_atomico(
+            ruta.with_suffix(".json"),
+            lambda temporal: Path(temporal).write_text(json.dumps(metadatos, indent=2), encoding="utf-8"),
+            ".json"
+        )
+    logger.info(f"📑 Reporte {tipo} {etiqueta} generado en {metadatos['segundos']:.2f} s")
+    return {**metadatos, "estado": "generado"}
+
+def purgar_reportes(retencion_dias=RETENCION_REPORTES_DIAS):
+    """Elimina los reportes de periodos terminados hace más de `retencion_dias`"""
+    limite = (date.today() - timedelta(days=retencion_dias)).isoformat()
+    eliminados = 0
+    for metadatos in listar_reportes():
+        if metadatos["hasta"] < limite:
+            ruta = Path(CARPETA_REPORTES) / metadatos["archivo"]
+            ruta.unlink(missing_ok=True)
+            ruta.with_suffix(".json").unlink(missing_ok=True)
+            eliminados += 1
+    return eliminados
+
+def generar_pendientes(hoy=None):
+    """Genera (si hace falta) el periodo en curso y el anterior de cada tipo"""
+    resultados = [generar_reporte(tipo, referencia) for tipo, referencia in periodos_pendientes(hoy)]
+    purgar_reportes()
+    return resultados
+
+def listar_reportes(tipo=None):
+    """Metadatos de los reportes en disco, del periodo más reciente al más antiguo"""
+    carpeta = Path(CARPETA_REPORTES)
+    if not carpeta.exists():
+        return []
+    reportes = []
+    for ruta in carpeta.glob("reporte_*.xlsx"):
+        metadatos = _leer_metadatos(ruta)
+        if metadatos and (tipo is None or metadatos["tipo"] == tipo):
+            reportes.append(metadatos)
+    return sorted(reportes, key=lambda m: (m["hasta"], m["tipo"]), reverse=True)
+
+def ruta_reporte(metadatos):
+    """Ruta en disco del reporte descrito por unos metadatos"""
+    return Path(CARPETA_REPORTES) / metadatos["archivo"]
+
+# -------------------- PROGRAMADOR --------------------
+class ProgramadorReportes:
+    """Hilo en segundo plano que mantiene al día los reportes pendientes.
+
+    Con una `cola` (trabajos.ColaTrabajos) la generación corre en otro proceso
+    y el hilo solo espera el resultado.
+    """
+
+    def __init__(self, intervalo=INTERVALO_REPORTES, cola=None, retraso=RETRASO_REPORTES):
+        self.intervalo = intervalo
+        self.cola = cola
+        self.retraso = retraso
+        self.ultima_ejecucion = None
+        self.ultimos_generados = 0
+        self.ultimo_error = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ciclo, name="programador-reportes", daemon=True)
+
+    def iniciar(self):
+        """Arranca el hilo; devuelve la instancia"""
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        """Pide al hilo que termine después de la ejecución en curso"""
+        self._detener.set()
+
+    def ejecutar(self):
+        """Una pasada del programador"""
+        try:
+            if self.cola is not None:
+                resultados = self.cola.enviar(generar_pendientes).result()
+            else:
+                resultados = generar_pendientes()
+            self.ultimos_generados = sum(1 for r in resultados if r["estado"] == "generado")
+            self.ultimo_error = None
+        except Exception as e:
+            self.ultimo_error = str(e)
+            logger.error(f"Error generando reportes: {e}")
+        self.ultima_ejecucion = datetime.now()
+
+    def proxima_ejecucion(self):
+        """Fecha aproximada de la siguiente pasada"""
+        if self.ultima_ejecucion is None:
+            return None
+        return self.ultima_ejecucion + timedelta(seconds=self.intervalo)
+
+    def _ciclo(self):
+        if self._detener.wait(self.retraso):
+            return
+        while not self._detener.is_set():
+            self.ejecutar()
+            self._detener.wait(self.intervalo)
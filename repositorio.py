@@ -0,0 +1,2472 @@
+"""Capa de datos de ventas sin dependencias de Streamlit.
+
+La usan la aplicación web (Ventas.py), la API de ingesta y la herramienta
+de administración por línea de comandos. Los datos viven en un backend
+intercambiable (archivo SQLite o SQLite en memoria) y la interfaz se entera
+de errores y escrituras mediante callbacks registrados.
+"""
+import base64
+import csv
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import secrets
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from functools import wraps
+from pathlib import Path
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+# -------------------- BACKENDS --------------------
+# Ruta de la base de datos; VENTAS_DB permite apuntar a otra copia (":memory:" usa BackendMemoria)
+RUTA_DB = os.environ.get("VENTAS_DB", "ventas.db")
+ARCHIVO_CONFIG = "config.json"
+
+def _volcar_sqlite(conn):
+    """Copia consistente de una base abierta, como bytes de un archivo SQLite"""
+    fd, temporal = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        destino = sqlite3.connect(temporal)
+        conn.backup(destino)
+        destino.close()
+        with open(temporal, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(temporal)
+
+class BackendSQLite:
+    """Datos en un archivo SQLite y configuración en un archivo JSON"""
+
+    def __init__(self, ruta=None, archivo_config=None):
+        self._ruta = ruta
+        self._archivo_config = archivo_config
+
+    @property
+    def ruta(self):
+        return self._ruta or RUTA_DB
+
+    @property
+    def archivo_config(self):
+        return self._archivo_config or ARCHIVO_CONFIG
+
+    def conectar(self):
+        """Nueva conexión a la base de datos"""
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def volcar(self):
+        """Bytes de una copia consistente de la base de datos (API de backup de SQLite)"""
+        if not os.path.exists(self.ruta):
+            return None
+        conn = self.conectar()
+        try:
+            return _volcar_sqlite(conn)
+        finally:
+            conn.close()
+
+    def cargar(self, datos):
+        """Reemplaza la base de datos con el contenido de un archivo SQLite"""
+        with open(self.ruta, "wb") as f:
+            f.write(datos)
+
+    def leer_config(self):
+        """Configuración guardada o None si no existe"""
+        if not os.path.exists(self.archivo_config):
+            return None
+        with open(self.archivo_config, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def escribir_config(self, config):
+        """Guarda la configuración de forma atómica (temporal + os.replace)"""
+        directorio = os.path.dirname(os.path.abspath(self.archivo_config))
+        fd, temporal = tempfile.mkstemp(prefix=".config_", suffix=".tmp", dir=directorio)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.archivo_config)
+        except Exception:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def firma_config(self):
+        """Identifica la versión del archivo de configuración por mtime y tamaño"""
+        try:
+            info = os.stat(self.archivo_config)
+            return (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            return None
+
+class BackendMemoria:
+    """Base SQLite en memoria compartida por las conexiones del proceso.
+
+    Ejecuta el mismo esquema, triggers y consultas que el archivo, sin tocar
+    el disco: sirve para pruebas y benchmarks reproducibles.
+    """
+
+    ruta = None
+
+    def __init__(self, nombre=None):
+        self.uri = f"file:ventas_{nombre or secrets.token_hex(4)}?mode=memory&cache=shared"
+        # La base en memoria existe mientras quede una conexión abierta
+        self._ancla = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        self._config = None
+        self._version_config = 0
+
+    def conectar(self):
+        """Nueva conexión a la base compartida"""
+        return sqlite3.connect(self.uri, uri=True, timeout=30)
+
+    def volcar(self):
+        """Bytes de una copia consistente de la base en memoria"""
+        conn = self.conectar()
+        try:
+            return _volcar_sqlite(conn)
+        finally:
+            conn.close()
+
+    def cargar(self, datos):
+        """Reemplaza la base en memoria con el contenido de un archivo SQLite"""
+        fd, temporal = tempfile.mkstemp(suffix=".db")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(datos)
+            origen = sqlite3.connect(temporal)
+            origen.backup(self._ancla)
+            origen.close()
+        finally:
+            os.remove(temporal)
+
+    def leer_config(self):
+        """Copia de la configuración en memoria"""
+        return json.loads(json.dumps(self._config)) if self._config is not None else None
+
+    def escribir_config(self, config):
+        """Guarda una copia de la configuración"""
+        self._config = json.loads(json.dumps(config))
+        self._version_config += 1
+
+    def firma_config(self):
+        return self._version_config
+
+_backend = BackendMemoria("default") if RUTA_DB == ":memory:" else BackendSQLite()
+
+def usar_backend(backend):
+    """Cambia el backend de datos del proceso y descarta el estado derivado del anterior"""
+    global _backend
+    _backend = backend
+    with _lock_singletons:
+        _singletons.clear()
+    logger.info(f"🔌 Backend de datos: {type(backend).__name__}")
+
+def obtener_backend():
+    """Backend de datos vigente"""
+    return _backend
+
+# Instancias únicas por proceso (limitador, cachés, configuración, secreto)
+_singletons = {}
+_lock_singletons = threading.Lock()
+
+def _singleton(nombre, crear):
+    """Devuelve la instancia única `nombre`, creándola la primera vez"""
+    instancia = _singletons.get(nombre)
+    if instancia is None:
+        with _lock_singletons:
+            instancia = _singletons.get(nombre)
+            if instancia is None:
+                instancia = _singletons[nombre] = crear()
+    return instancia
+
+# -------------------- CALLBACKS --------------------
+# Ganchos de la interfaz: "error" recibe un mensaje y "cambio" la entidad escrita
+_CALLBACKS = {"error": {}, "cambio": {}}
+
+def registrar_callback(evento, nombre, funcion):
+    """Registra (o reemplaza, por nombre) un callback para un evento"""
+    _CALLBACKS[evento][nombre] = funcion
+
+def _notificar(evento, *args):
+    """Llama a los callbacks de un evento sin dejar que sus fallos se propaguen"""
+    for funcion in list(_CALLBACKS[evento].values()):
+        try:
+            funcion(*args)
+        except Exception as e:
+            logger.error(f"Error en callback de {evento}: {e}")
+
+def operacion_segura(func):
+    """Decorador para operaciones seguras de base de datos"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.Error as e:
+            logger.error(f"Error de base de datos: {e}")
+            _notificar("error", f"❌ Error de base de datos: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Error inesperado: {e}")
+            _notificar("error", f"❌ Error inesperado: {str(e)}")
+            return None
+    return wrapper
+
+# -------------------- FUNCIONES DE SEGURIDAD --------------------
+# Costo de scrypt (N, potencia de 2); ajustable con VENTAS_SCRYPT_N
+COSTO_SCRYPT = int(os.environ.get("VENTAS_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+def _derivar_scrypt(password, sal, n, r, p):
+    """Deriva la clave scrypt con memoria suficiente para el costo pedido"""
+    return hashlib.scrypt(
+        password.encode(), salt=sal, n=n, r=r, p=p,
+        maxmem=256 * r * n + 1024 * 1024, dklen=32
+    )
+
+def hash_password(password, costo=None):
+    """Hashea la contraseña con scrypt y sal aleatoria"""
+    n = costo or COSTO_SCRYPT
+    sal = os.urandom(16)
+    derivada = _derivar_scrypt(password, sal, n, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${sal.hex()}${derivada.hex()}"
+
+def check_password(password, hashed):
+    """Verifica la contraseña de manera segura (scrypt o SHA-256 heredado)"""
+    if hashed.startswith("scrypt$"):
+        _, n, r, p, sal, esperado = hashed.split("$")
+        derivada = _derivar_scrypt(password, bytes.fromhex(sal), int(n), int(r), int(p))
+        return hmac.compare_digest(derivada.hex(), esperado)
+    
+    # Formato anterior: SHA-256 sin sal
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), hashed)
+
+def necesita_rehash(hashed):
+    """Indica si el hash es heredado o usa un costo distinto al actual"""
+    if not hashed.startswith("scrypt$"):
+        return True
+    _, n, r, p, _, _ = hashed.split("$")
+    return (int(n), int(r), int(p)) != (COSTO_SCRYPT, SCRYPT_R, SCRYPT_P)
+
+def benchmark_costos_hash(costos=(2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15, 2 ** 16), repeticiones=3):
+    """Mide la latencia de verificar una contraseña con cada costo de scrypt"""
+    resultados = []
+    for n in costos:
+        hashed = hash_password("benchmark", costo=n)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            check_password("benchmark", hashed)
+        ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+        resultados.append({
+            "N": n,
+            "memoria (MB)": round(128 * SCRYPT_R * n / (1024 * 1024), 1),
+            "latencia (ms)": round(ms, 1),
+            "logins/s por núcleo": round(1000 / ms, 1) if ms else None,
+            "actual": "✅" if n == COSTO_SCRYPT else ""
+        })
+    return resultados
+
+# Intentos fallidos permitidos por ventana antes de bloquear
+MAX_FALLOS_USUARIO = 5
+MAX_FALLOS_IP = 20
+VENTANA_FALLOS = 300
+
+class LimitadorLogin:
+    """Cuenta intentos fallidos por usuario e IP en memoria del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fallos = {}
+
+    def _vigentes(self, clave, ahora):
+        """Fallos dentro de la ventana para una clave"""
+        fallos = [t for t in self._fallos.get(clave, ()) if ahora - t < VENTANA_FALLOS]
+        if fallos:
+            self._fallos[clave] = fallos
+        else:
+            self._fallos.pop(clave, None)
+        return fallos
+
+    def espera(self, username, ip=None):
+        """Segundos que faltan para poder intentar de nuevo (0 si está permitido)"""
+        ahora = time.monotonic()
+        espera = 0
+        with self._lock:
+            for clave, limite in ((("u", username), MAX_FALLOS_USUARIO), (("ip", ip), MAX_FALLOS_IP)):
+                if clave[1] is None:
+                    continue
+                fallos = self._vigentes(clave, ahora)
+                if len(fallos) >= limite:
+                    espera = max(espera, VENTANA_FALLOS - (ahora - fallos[-limite]))
+        return int(espera) + 1 if espera else 0
+
+    def registrar_fallo(self, username, ip=None):
+        """Anota un intento fallido"""
+        ahora = time.monotonic()
+        with self._lock:
+            self._fallos.setdefault(("u", username), []).append(ahora)
+            if ip:
+                self._fallos.setdefault(("ip", ip), []).append(ahora)
+
+    def registrar_exito(self, username):
+        """Un login correcto limpia los fallos del usuario"""
+        with self._lock:
+            self._fallos.pop(("u", username), None)
+
+class CacheVerificaciones:
+    """Recuerda por unos minutos las verificaciones correctas de contraseña.
+
+    La llave es un HMAC con una clave aleatoria del proceso, así que la
+    contraseña nunca queda en memoria; basta con que el hash guardado no
+    haya cambiado para evitar repetir scrypt en cambios de turno.
+    """
+
+    def __init__(self, ttl=600, max_entradas=1000):
+        self._lock = threading.Lock()
+        self._clave = os.urandom(32)
+        self._entradas = OrderedDict()
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+
+    def _llave(self, username, password):
+        return hmac.new(self._clave, f"{username}\0{password}".encode(), hashlib.sha256).digest()
+
+    def verificada(self, username, password, hashed):
+        """True si esta combinación ya se verificó contra el mismo hash"""
+        llave = self._llave(username, password)
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if not entrada:
+                return False
+            guardado, vence = entrada
+            if vence < time.monotonic() or not hmac.compare_digest(guardado, hashed):
+                del self._entradas[llave]
+                return False
+            return True
+
+    def guardar(self, username, password, hashed):
+        """Registra una verificación correcta"""
+        llave = self._llave(username, password)
+        with self._lock:
+            self._entradas[llave] = (hashed, time.monotonic() + self.ttl)
+            self._entradas.move_to_end(llave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+def obtener_limitador_login():
+    """Instancia única del limitador de intentos"""
+    return _singleton("limitador_login", LimitadorLogin)
+
+def obtener_cache_verificaciones():
+    """Instancia única del caché de verificaciones"""
+    return _singleton("cache_verificaciones", CacheVerificaciones)
+
+# -------------------- VERIFICACIÓN DE ENTORNO --------------------
+# Versión del esquema registrada en PRAGMA user_version
+ESQUEMA_VERSION = 8
+
+# Espacio libre mínimo en disco antes de advertir
+ESPACIO_MINIMO_MB = 100
+
+def check_environment():
+    """Verifica el entorno de ejecución"""
+    issues = []
+    
+    # Verificar permisos de escritura
+    try:
+        test_file = 'test_write.tmp'
+        with open(test_file, 'w') as f:
+            f.write('test')
+        os.remove(test_file)
+        logger.info("✅ Permisos de escritura OK")
+    except Exception as e:
+        issues.append(f"Sin permisos de escritura: {e}")
+        logger.error(f"Error de permisos: {e}")
+    
+    # Verificar espacio en disco
+    try:
+        libre_mb = shutil.disk_usage(".").free / (1024 * 1024)
+        if libre_mb < ESPACIO_MINIMO_MB:
+            issues.append(f"Poco espacio en disco: {libre_mb:.0f} MB libres")
+            logger.warning(f"⚠️ Poco espacio en disco: {libre_mb:.0f} MB")
+    except Exception as e:
+        logger.error(f"Error verificando espacio en disco: {e}")
+    
+    return issues
+
+def verificar_base_datos():
+    """Verifica integridad y versión de esquema de la base de datos"""
+    issues = []
+    conn = None
+    try:
+        conn = get_connection()
+        resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if resultado != "ok":
+            issues.append(f"Integridad de la base de datos comprometida: {resultado}")
+            logger.error(f"❌ quick_check: {resultado}")
+        
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > ESQUEMA_VERSION:
+            issues.append(
+                f"La base de datos usa el esquema v{version}, más nuevo que el de la aplicación (v{ESQUEMA_VERSION})"
+            )
+        elif version < ESQUEMA_VERSION:
+            issues.append(f"Esquema desactualizado: v{version}, se esperaba v{ESQUEMA_VERSION}")
+    except sqlite3.Error as e:
+        issues.append(f"No se pudo verificar la base de datos: {e}")
+        logger.error(f"Error verificando base de datos: {e}")
+    finally:
+        if conn:
+            conn.close()
+    
+    return issues
+
+# -------------------- INICIALIZACIÓN DE BASE DE DATOS --------------------
+def init_database():
+    """Inicializa la base de datos con manejo de errores"""
+    db_path = _backend.ruta
+    
+    # Verificar si la base de datos existe y no está corrupta
+    try:
+        conn = get_connection()
+        conn.execute("SELECT COUNT(*) FROM sqlite_master")
+        conn.close()
+        logger.info("✅ Base de datos verificada correctamente")
+    except Exception as e:
+        logger.error(f"Error con base de datos: {e}")
+        # Si está corrupta, crear backup y nueva base
+        if db_path and os.path.exists(db_path):
+            backup_name = f"ventas_corrupta_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+            os.rename(db_path, backup_name)
+            logger.info(f"Backup de BD corrupta creado: {backup_name}")
+            return False
+    
+    return True
+
+def preparar_base():
+    """Verificaciones y migraciones de arranque para procesos sin interfaz; devuelve los problemas"""
+    issues = check_environment()
+    init_database()
+    create_tables()
+    issues += verificar_base_datos()
+    purgar_sesiones_vencidas()
+    purgar_cambios()
+    purgar_idempotencia()
+    return issues
+
+# -------------------- FUNCIONES DE BASE DE DATOS --------------------
+CATEGORIAS = ["autoliquidable", "oferta", "marca_propia", "producto_adicional"]
+
+def get_connection():
+    """Obtiene conexión a la base de datos"""
+    return _backend.conectar()
+
+def create_tables():
+    """Crea las tablas con mejor manejo de errores"""
+    conn = None
+    try:
+        conn = get_connection()
+        c = conn.cursor()
+        
+        # Tabla de ventas
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS registros_ventas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha DATE,
+                empleado TEXT,
+                autoliquidable INTEGER DEFAULT 0,
+                oferta INTEGER DEFAULT 0,
+                marca_propia INTEGER DEFAULT 0,
+                producto_adicional INTEGER DEFAULT 0,
+                fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Tabla de empleados
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS empleados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE,
+                activo INTEGER DEFAULT 1,
+                departamento TEXT DEFAULT 'Droguería',
+                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Tabla de usuarios con contraseñas hasheadas
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE,
+                password_hash TEXT,
+                rol TEXT,
+                empleado_id INTEGER,
+                activo INTEGER DEFAULT 1,
+                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ultimo_acceso TIMESTAMP,
+                FOREIGN KEY (empleado_id) REFERENCES empleados (id)
+            )
+        """)
+        
+        # Sesiones persistentes (token firmado en la URL)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS sesiones (
+                token_hash TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                creada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expira TIMESTAMP NOT NULL,
+                revocada INTEGER DEFAULT 0,
+                ultimo_uso TIMESTAMP
+            )
+        """)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_sesiones_username ON sesiones (username)")
+        
+        # Valores internos de la aplicación (p. ej. el secreto de firma)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS metadatos (
+                clave TEXT PRIMARY KEY,
+                valor TEXT
+            )
+        """)
+        
+        # Claves de idempotencia de la API de ingesta (usuario:clave -> registro)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS idempotencia_ventas (
+                clave TEXT PRIMARY KEY,
+                registro_id INTEGER NOT NULL,
+                creada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Índices para filtros y paginación por (fecha, id)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_registros_fecha_id ON registros_ventas (fecha, id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_registros_empleado_fecha_id ON registros_ventas (empleado, fecha, id)")
+        
+        # Rollup diario por empleado, mantenido por triggers
+        crear_rollup_diario(c)
+        
+        # Registro de cambios (CDC) de ventas, empleados y usuarios
+        crear_registro_cambios(c)
+        
+        # Contadores para la página de sistema, mantenidos por triggers
+        crear_estadisticas(c)
+        
+        # Rankings materializados por periodo, invalidados por triggers
+        crear_rankings(c)
+        
+        # Metas por empleado o departamento y su avance, mantenido por triggers
+        crear_metas(c)
+        
+        c.execute(f"PRAGMA user_version = {ESQUEMA_VERSION}")
+        conn.commit()
+        logger.info("✅ Tablas creadas/verificadas correctamente")
+        
+        # Poblar el rollup si la base viene de una versión sin él
+        if (c.execute("SELECT 1 FROM registros_ventas LIMIT 1").fetchone()
+                and not c.execute("SELECT 1 FROM ventas_diarias LIMIT 1").fetchone()):
+            reconstruir_rollup_diario(conn)
+        if not c.execute("SELECT 1 FROM estadisticas LIMIT 1").fetchone():
+            reconciliar_estadisticas(conn)
+        if (c.execute("SELECT 1 FROM metas LIMIT 1").fetchone()
+                and not c.execute("SELECT 1 FROM metas_progreso LIMIT 1").fetchone()):
+            reconstruir_metas_progreso(conn)
+        
+        # Insertar datos iniciales
+        insertar_datos_iniciales(conn)
+        
+    except sqlite3.Error as e:
+        logger.error(f"Error creando tablas: {e}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+    
+    return True
+
+def insertar_datos_iniciales(conn):
+    """Inserta datos iniciales con manejo de errores"""
+    c = conn.cursor()
+    
+    # Empleados por defecto
+    empleados_default = [
+        ("Angel Bonilla", "Droguería"),
+        ("Claudia Parada", "Droguería"),
+        ("Cristina Gomez", "Equipos Médicos"),
+        ("Daniela Velasco", "Tienda"),
+        ("Darcy Tovar", "Cajas"),
+        ("Erika Salazar", "Droguería"),
+        ("Estheiry Cardozo", "Equipos Médicos"),
+        ("Janeth Jimenez", "Tienda"),
+        ("Jessica Sanabria", "Cajas"),
+        ("Johanna Cuervo", "Droguería"),
+        ("Leonardo Vera", "Equipos Médicos"),
+        ("Lucia Guerrero", "Tienda"),
+        ("Luna Galindez", "Cajas"),
+        ("Mariana Mejia", "Droguería"),
+        ("Niyireth Silva", "Equipos Médicos"),
+        ("Ruth Avila", "Tienda"),
+        ("Valeria Delgado", "Cajas")
+    ]
+    
+    for emp, depto in empleados_default:
+        try:
+            c.execute(
+                "INSERT OR IGNORE INTO empleados (nombre, departamento) VALUES (?, ?)", 
+                (emp, depto)
+            )
+        except Exception as e:
+            logger.warning(f"Error insertando empleado {emp}: {e}")
+    
+    # Solo se calcula el hash (costoso) de los usuarios que faltan
+    existentes = {
+        fila[0] for fila in
+        c.execute("SELECT username FROM usuarios WHERE username IN ('admin', 'supervisor')")
+    }
+    
+    # Usuario admin con contraseña hasheada
+    if "admin" not in existentes:
+        admin_hash = hash_password("admin123")
+        try:
+            c.execute(
+                "INSERT OR IGNORE INTO usuarios (username, password_hash, rol, activo) VALUES (?, ?, ?, ?)",
+                ("admin", admin_hash, "Administrador", 1)
+            )
+        except Exception as e:
+            logger.warning(f"Error insertando admin: {e}")
+    
+    # Usuario supervisor con contraseña hasheada
+    if "supervisor" not in existentes:
+        sup_hash = hash_password("super123")
+        try:
+            c.execute(
+                "INSERT OR IGNORE INTO usuarios (username, password_hash, rol, activo) VALUES (?, ?, ?, ?)",
+                ("supervisor", sup_hash, "Supervisor", 1)
+            )
+        except Exception as e:
+            logger.warning(f"Error insertando supervisor: {e}")
+    
+    conn.commit()
+    logger.info("✅ Datos iniciales insertados")
+
+# -------------------- ROLLUP DIARIO --------------------
+def crear_rollup_diario(c):
+    """Crea la tabla ventas_diarias y los triggers que la mantienen al día"""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            fecha DATE NOT NULL,
+            empleado TEXT NOT NULL,
+            registros INTEGER DEFAULT 0,
+            autoliquidable INTEGER DEFAULT 0,
+            oferta INTEGER DEFAULT 0,
+            marca_propia INTEGER DEFAULT 0,
+            producto_adicional INTEGER DEFAULT 0,
+            PRIMARY KEY (fecha, empleado)
+        ) WITHOUT ROWID
+    """)
+    
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ventas_diarias_insert
+        AFTER INSERT ON registros_ventas
+        WHEN NEW.fecha IS NOT NULL AND NEW.empleado IS NOT NULL
+        BEGIN
+            INSERT INTO ventas_diarias
+            (fecha, empleado, registros, autoliquidable, oferta, marca_propia, producto_adicional)
+            VALUES (
+                NEW.fecha, NEW.empleado, 1,
+                COALESCE(NEW.autoliquidable, 0), COALESCE(NEW.oferta, 0),
+                COALESCE(NEW.marca_propia, 0), COALESCE(NEW.producto_adicional, 0)
+            )
+            ON CONFLICT (fecha, empleado) DO UPDATE SET
+                registros = registros + 1,
+                autoliquidable = autoliquidable + excluded.autoliquidable,
+                oferta = oferta + excluded.oferta,
+                marca_propia = marca_propia + excluded.marca_propia,
+                producto_adicional = producto_adicional + excluded.producto_adicional;
+        END
+    """)
+    
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ventas_diarias_delete
+        AFTER DELETE ON registros_ventas
+        WHEN OLD.fecha IS NOT NULL AND OLD.empleado IS NOT NULL
+        BEGIN
+            UPDATE ventas_diarias SET
+                registros = registros - 1,
+                autoliquidable = autoliquidable - COALESCE(OLD.autoliquidable, 0),
+                oferta = oferta - COALESCE(OLD.oferta, 0),
+                marca_propia = marca_propia - COALESCE(OLD.marca_propia, 0),
+                producto_adicional = producto_adicional - COALESCE(OLD.producto_adicional, 0)
+            WHERE fecha = OLD.fecha AND empleado = OLD.empleado;
+            DELETE FROM ventas_diarias
+            WHERE fecha = OLD.fecha AND empleado = OLD.empleado AND registros <= 0;
+        END
+    """)
+    
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_ventas_diarias_update
+        AFTER UPDATE OF fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional
+        ON registros_ventas
+        BEGIN
+            UPDATE ventas_diarias SET
+                registros = registros - 1,
+                autoliquidable = autoliquidable - COALESCE(OLD.autoliquidable, 0),
+                oferta = oferta - COALESCE(OLD.oferta, 0),
+                marca_propia = marca_propia - COALESCE(OLD.marca_propia, 0),
+                producto_adicional = producto_adicional - COALESCE(OLD.producto_adicional, 0)
+            WHERE fecha = OLD.fecha AND empleado = OLD.empleado;
+            DELETE FROM ventas_diarias
+            WHERE fecha = OLD.fecha AND empleado = OLD.empleado AND registros <= 0;
+            INSERT INTO ventas_diarias
+            (fecha, empleado, registros, autoliquidable, oferta, marca_propia, producto_adicional)
+            SELECT
+                NEW.fecha, NEW.empleado, 1,
+                COALESCE(NEW.autoliquidable, 0), COALESCE(NEW.oferta, 0),
+                COALESCE(NEW.marca_propia, 0), COALESCE(NEW.producto_adicional, 0)
+            WHERE NEW.fecha IS NOT NULL AND NEW.empleado IS NOT NULL
+            ON CONFLICT (fecha, empleado) DO UPDATE SET
+                registros = registros + 1,
+                autoliquidable = autoliquidable + excluded.autoliquidable,
+                oferta = oferta + excluded.oferta,
+                marca_propia = marca_propia + excluded.marca_propia,
+                producto_adicional = producto_adicional + excluded.producto_adicional;
+        END
+    """)
+
+def reconstruir_rollup_diario(conn):
+    """Recalcula ventas_diarias desde registros_ventas"""
+    c = conn.cursor()
+    c.execute("DELETE FROM ventas_diarias")
+    c.execute("""
+        INSERT INTO ventas_diarias
+        (fecha, empleado, registros, autoliquidable, oferta, marca_propia, producto_adicional)
+        SELECT
+            fecha, empleado, COUNT(*),
+            SUM(COALESCE(autoliquidable, 0)), SUM(COALESCE(oferta, 0)),
+            SUM(COALESCE(marca_propia, 0)), SUM(COALESCE(producto_adicional, 0))
+        FROM registros_ventas
+        WHERE fecha IS NOT NULL AND empleado IS NOT NULL
+        GROUP BY fecha, empleado
+    """)
+    conn.commit()
+    logger.info(f"✅ Rollup diario reconstruido: {c.rowcount} filas")
+
+# -------------------- REGISTRO DE CAMBIOS (CDC) --------------------
+# Tablas cuyas altas, bajas y modificaciones quedan en change_log
+TABLAS_CDC = {
+    "registros_ventas": None,
+    "empleados": None,
+    # ultimo_acceso cambia en cada login y no le interesa a ningún consumidor
+    "usuarios": "username, password_hash, rol, empleado_id, activo"
+}
+
+# Días que se conservan los cambios antes de purgarlos
+RETENCION_CAMBIOS_DIAS = 30
+
+def crear_registro_cambios(c):
+    """Crea change_log y los triggers que anotan cada cambio"""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabla TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_id INTEGER,
+            ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    for tabla, columnas in TABLAS_CDC.items():
+        for evento, op, fila in (("INSERT", "I", "NEW"), ("UPDATE", "U", "NEW"), ("DELETE", "D", "OLD")):
+            if evento == "UPDATE" and columnas:
+                evento = f"UPDATE OF {columnas}"
+            c.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_cdc_{tabla}_{op.lower()}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    INSERT INTO change_log (tabla, op, row_id) VALUES ('{tabla}', '{op}', {fila}.id);
+                END
+            """)
+
+def leer_cambios(desde_seq=0, tablas=None, limite=1000):
+    """Devuelve hasta `limite` cambios (seq, tabla, op, row_id, ts) posteriores a desde_seq"""
+    conn = get_connection()
+    c = conn.cursor()
+    if tablas:
+        marcadores = ", ".join("?" * len(tablas))
+        c.execute(f"""
+            SELECT seq, tabla, op, row_id, ts FROM change_log
+            WHERE seq > ? AND tabla IN ({marcadores})
+            ORDER BY seq
+            LIMIT ?
+        """, (desde_seq, *tablas, limite))
+    else:
+        c.execute("""
+            SELECT seq, tabla, op, row_id, ts FROM change_log
+            WHERE seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (desde_seq, limite))
+    cambios = c.fetchall()
+    conn.close()
+    return cambios
+
+def iterar_cambios(desde_seq=0, tablas=None, lote=1000):
+    """Recorre los cambios posteriores a desde_seq en lotes"""
+    while True:
+        cambios = leer_cambios(desde_seq, tablas, lote)
+        if not cambios:
+            return
+        yield cambios
+        desde_seq = cambios[-1][0]
+
+def ultima_secuencia_cambios():
+    """Secuencia del cambio más reciente (0 si no hay)"""
+    conn = get_connection()
+    seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+    conn.close()
+    return seq
+
+def cursor_cambios_vigente(seq):
+    """False si la purga ya borró cambios posteriores a seq y el consumidor debe releer todo"""
+    conn = get_connection()
+    fila = conn.execute("SELECT valor FROM metadatos WHERE clave = 'cdc_purgado_hasta'").fetchone()
+    conn.close()
+    return seq >= int(fila[0]) if fila else True
+
+def resumir_cambios(ultimos=10000):
+    """Cambios por tabla y operación entre los `ultimos` registrados (rango de seq, sin recorrer todo el log)"""
+    conn = get_connection()
+    filas = conn.execute("""
+        SELECT tabla, op, COUNT(*), MIN(seq), MAX(seq), MAX(ts) FROM change_log
+        WHERE seq > (SELECT COALESCE(MAX(seq), 0) FROM change_log) - ?
+        GROUP BY tabla, op
+        ORDER BY tabla, op
+    """, (int(ultimos),)).fetchall()
+    conn.close()
+    columnas = ("tabla", "op", "cambios", "desde", "hasta", "ultimo")
+    return [dict(zip(columnas, fila)) for fila in filas]
+
+def purgar_cambios(retencion_dias=RETENCION_CAMBIOS_DIAS):
+    """Elimina los cambios más antiguos que la retención"""
+    conn = get_connection()
+    c = conn.cursor()
+    hasta = c.execute(
+        "SELECT MAX(seq) FROM change_log WHERE ts < datetime('now', ?)",
+        (f"-{int(retencion_dias)} days",)
+    ).fetchone()[0]
+    if hasta is None:
+        conn.close()
+        return 0
+    
+    c.execute("DELETE FROM change_log WHERE seq <= ?", (hasta,))
+    borrados = c.rowcount
+    c.execute(
+        "INSERT OR REPLACE INTO metadatos (clave, valor) VALUES ('cdc_purgado_hasta', ?)",
+        (str(hasta),)
+    )
+    conn.commit()
+    conn.close()
+    logger.info(f"🧹 Registro de cambios purgado: {borrados} cambios")
+    return borrados
+
+# -------------------- ESTADÍSTICAS --------------------
+def _sql_sumar(grupo, clave, delta, condicion="1"):
+    """Sentencia de trigger que suma delta al contador (grupo, clave) si se cumple la condición"""
+    return f"""
+        INSERT INTO estadisticas (grupo, clave, valor)
+        SELECT '{grupo}', {clave}, {delta}
+        WHERE {condicion}
+        ON CONFLICT (grupo, clave) DO UPDATE SET valor = valor + excluded.valor;
+    """
+
+def crear_estadisticas(c):
+    """Crea la tabla estadisticas y los triggers que mantienen los contadores"""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS estadisticas (
+            grupo TEXT NOT NULL,
+            clave TEXT NOT NULL,
+            valor INTEGER DEFAULT 0,
+            PRIMARY KEY (grupo, clave)
+        ) WITHOUT ROWID
+    """)
+    
+    mes_nuevo = "strftime('%Y-%m', NEW.fecha)"
+    mes_viejo = "strftime('%Y-%m', OLD.fecha)"
+    triggers = {
+        "trg_estadisticas_ventas_insert": ("AFTER INSERT ON registros_ventas", [
+            _sql_sumar("total", "'registros_ventas'", 1),
+            _sql_sumar("mes", mes_nuevo, 1, f"{mes_nuevo} IS NOT NULL"),
+        ]),
+        "trg_estadisticas_ventas_delete": ("AFTER DELETE ON registros_ventas", [
+            _sql_sumar("total", "'registros_ventas'", -1),
+            _sql_sumar("mes", mes_viejo, -1, f"{mes_viejo} IS NOT NULL"),
+        ]),
+        "trg_estadisticas_ventas_update": ("AFTER UPDATE OF fecha ON registros_ventas", [
+            _sql_sumar("mes", mes_viejo, -1, f"{mes_viejo} IS NOT NULL"),
+            _sql_sumar("mes", mes_nuevo, 1, f"{mes_nuevo} IS NOT NULL"),
+        ]),
+        "trg_estadisticas_empleados_insert": ("AFTER INSERT ON empleados", [
+            _sql_sumar("total", "'empleados_activos'", 1, "NEW.activo = 1"),
+            _sql_sumar("departamento", "COALESCE(NEW.departamento, '')", 1, "NEW.activo = 1"),
+        ]),
+        "trg_estadisticas_empleados_delete": ("AFTER DELETE ON empleados", [
+            _sql_sumar("total", "'empleados_activos'", -1, "OLD.activo = 1"),
+            _sql_sumar("departamento", "COALESCE(OLD.departamento, '')", -1, "OLD.activo = 1"),
+        ]),
+        "trg_estadisticas_empleados_update": ("AFTER UPDATE OF activo, departamento ON empleados", [
+            _sql_sumar("total", "'empleados_activos'", -1, "OLD.activo = 1"),
+            _sql_sumar("departamento", "COALESCE(OLD.departamento, '')", -1, "OLD.activo = 1"),
+            _sql_sumar("total", "'empleados_activos'", 1, "NEW.activo = 1"),
+            _sql_sumar("departamento", "COALESCE(NEW.departamento, '')", 1, "NEW.activo = 1"),
+        ]),
+        "trg_estadisticas_usuarios_insert": ("AFTER INSERT ON usuarios", [
+            _sql_sumar("total", "'usuarios'", 1),
+        ]),
+        "trg_estadisticas_usuarios_delete": ("AFTER DELETE ON usuarios", [
+            _sql_sumar("total", "'usuarios'", -1),
+        ]),
+    }
+    for nombre, (evento, sentencias) in triggers.items():
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {nombre}
+            {evento}
+            BEGIN
+                {"".join(sentencias)}
+            END
+        """)
+
+def calcular_estadisticas(conn):
+    """Calcula los contadores desde cero con consultas completas"""
+    c = conn.cursor()
+    estadisticas = {
+        ("total", "registros_ventas"): c.execute("SELECT COUNT(*) FROM registros_ventas").fetchone()[0],
+        ("total", "empleados_activos"): c.execute("SELECT COUNT(*) FROM empleados WHERE activo = 1").fetchone()[0],
+        ("total", "usuarios"): c.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0],
+    }
+    c.execute("""
+        SELECT strftime('%Y-%m', fecha), COUNT(*) FROM registros_ventas
+        WHERE strftime('%Y-%m', fecha) IS NOT NULL
+        GROUP BY 1
+    """)
+    estadisticas.update({("mes", mes): n for mes, n in c.fetchall()})
+    c.execute("""
+        SELECT COALESCE(departamento, ''), COUNT(*) FROM empleados
+        WHERE activo = 1
+        GROUP BY 1
+    """)
+    estadisticas.update({("departamento", depto): n for depto, n in c.fetchall()})
+    return estadisticas
+
+def reconciliar_estadisticas(conn, corregir=True):
+    """Compara los contadores con un recálculo completo y los corrige; devuelve las diferencias"""
+    c = conn.cursor()
+    esperadas = calcular_estadisticas(conn)
+    actuales = {(g, k): v for g, k, v in c.execute("SELECT grupo, clave, valor FROM estadisticas")}
+    
+    diferencias = []
+    for llave in sorted(set(esperadas) | set(actuales)):
+        esperado, actual = esperadas.get(llave, 0), actuales.get(llave, 0)
+        if esperado != actual:
+            diferencias.append({"grupo": llave[0], "clave": llave[1], "guardado": actual, "real": esperado})
+    
+    if corregir:
+        c.execute("DELETE FROM estadisticas")
+        c.executemany(
+            "INSERT INTO estadisticas (grupo, clave, valor) VALUES (?, ?, ?)",
+            [(g, k, v) for (g, k), v in esperadas.items()]
+        )
+        conn.commit()
+        logger.info(f"✅ Estadísticas reconciliadas: {len(diferencias)} diferencias")
+    return diferencias
+
+def obtener_estadisticas():
+    """Lee todos los contadores en una sola consulta: {grupo: {clave: valor}}"""
+    conn = get_connection()
+    estadisticas = {}
+    for grupo, clave, valor in conn.execute(
+        "SELECT grupo, clave, valor FROM estadisticas WHERE valor != 0 OR grupo = 'total' ORDER BY grupo, clave"
+    ):
+        estadisticas.setdefault(grupo, {})[clave] = valor
+    conn.close()
+    return estadisticas
+
+# -------------------- PERIODOS --------------------
+TIPOS_PERIODO = ("diario", "semanal", "mensual")
+
+def rango_periodo(tipo, referencia):
+    """(inicio, fin, etiqueta) del periodo de un tipo que contiene la fecha de referencia"""
+    if tipo == "diario":
+        return referencia, referencia, referencia.isoformat()
+    if tipo == "semanal":
+        inicio = referencia - timedelta(days=referencia.weekday())
+        anio, semana, _ = inicio.isocalendar()
+        return inicio, inicio + timedelta(days=6), f"{anio}-S{semana:02d}"
+    if tipo == "mensual":
+        inicio = referencia.replace(day=1)
+        siguiente = (inicio + timedelta(days=32)).replace(day=1)
+        return inicio, siguiente - timedelta(days=1), inicio.strftime("%Y-%m")
+    raise ValueError(f"Tipo de periodo desconocido: {tipo}")
+
+# -------------------- RANKINGS --------------------
+METRICAS_RANKING = ("total", *CATEGORIAS)
+
+# Inicio del periodo (diario, semanal, mensual) que contiene una fecha, en SQL
+_INICIO_PERIODO_SQL = {
+    "diario": "{f}",
+    "semanal": "date({f}, 'weekday 0', '-6 days')",
+    "mensual": "strftime('%Y-%m-01', {f})"
+}
+_SIGUIENTE_PERIODO_SQL = {
+    "diario": "date({f}, '+1 day')",
+    "semanal": "date({f}, 'weekday 0', '+1 day')",
+    "mensual": "date({f}, 'start of month', '+1 month')"
+}
+
+def _sql_invalidar_rankings(fila):
+    """DELETE que marca como pendientes los periodos afectados por una fecha del rollup.
+
+    Se invalida el periodo de la fecha y el siguiente, cuyo cambio de puesto
+    se mide contra este.
+    """
+    fecha = f"{fila}.fecha"
+    periodos = ", ".join(
+        f"('{tipo}', {_INICIO_PERIODO_SQL[tipo].format(f=fecha)}), "
+        f"('{tipo}', {_SIGUIENTE_PERIODO_SQL[tipo].format(f=fecha)})"
+        for tipo in TIPOS_PERIODO
+    )
+    return f"DELETE FROM rankings_periodos WHERE (tipo, inicio) IN (VALUES {periodos});"
+
+def crear_rankings(c):
+    """Crea las tablas de rankings materializados y los triggers que los invalidan"""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS rankings_periodos (
+            tipo TEXT NOT NULL,
+            inicio DATE NOT NULL,
+            calculado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (tipo, inicio)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS rankings (
+            tipo TEXT NOT NULL,
+            inicio DATE NOT NULL,
+            metrica TEXT NOT NULL,
+            empleado TEXT NOT NULL,
+            departamento TEXT,
+            valor INTEGER NOT NULL,
+            puesto INTEGER NOT NULL,
+            puesto_departamento INTEGER NOT NULL,
+            puesto_anterior INTEGER,
+            PRIMARY KEY (tipo, inicio, metrica, empleado)
+        ) WITHOUT ROWID
+    """)
+    
+    for evento, fila in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_rankings_{evento.lower()}
+            AFTER {evento} ON ventas_diarias
+            BEGIN
+                {_sql_invalidar_rankings(fila)}
+            END
+        """)
+    # Si un empleado cambia de departamento, ningún ranking guardado es válido
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_rankings_departamento
+        AFTER UPDATE OF departamento ON empleados
+        WHEN OLD.departamento IS NOT NEW.departamento
+        BEGIN
+            DELETE FROM rankings_periodos;
+        END
+    """)
+
+def _sql_por_empleado():
+    """SELECT de totales por empleado en un rango (fecha_inicio, fecha_fin) del rollup"""
+    sumas = ", ".join(f"SUM(v.{cat}) AS {cat}" for cat in CATEGORIAS)
+    total = " + ".join(f"SUM(v.{cat})" for cat in CATEGORIAS)
+    return f"""
+        SELECT v.empleado, COALESCE(e.departamento, '(sin departamento)') AS departamento,
+               {sumas}, {total} AS total
+        FROM ventas_diarias v
+        LEFT JOIN empleados e ON e.nombre = v.empleado
+        WHERE v.fecha BETWEEN ? AND ?
+        GROUP BY v.empleado
+    """
+
+def _sql_por_metrica(tabla):
+    """Despliega los totales por empleado en una fila por métrica"""
+    return " UNION ALL ".join(
+        f"SELECT '{metrica}' AS metrica, empleado, departamento, {metrica} AS valor FROM {tabla}"
+        for metrica in METRICAS_RANKING
+    )
+
+def calcular_ranking(conn, tipo, inicio):
+    """Materializa el ranking de un periodo con funciones de ventana sobre el rollup"""
+    _, fin, _ = rango_periodo(tipo, inicio)
+    inicio_anterior, fin_anterior, _ = rango_periodo(tipo, inicio - timedelta(days=1))
+    
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute("DELETE FROM rankings WHERE tipo = ? AND inicio = ?", (tipo, inicio.isoformat()))
+        c.execute(f"""
+            INSERT INTO rankings
+            (tipo, inicio, metrica, empleado, departamento, valor, puesto, puesto_departamento, puesto_anterior)
+            WITH empleados_actual AS ({_sql_por_empleado()}),
+                 empleados_anterior AS ({_sql_por_empleado()}),
+                 actual AS ({_sql_por_metrica("empleados_actual")}),
+                 puestos_anteriores AS (
+                     SELECT metrica, empleado,
+                            RANK() OVER (PARTITION BY metrica ORDER BY valor DESC) AS puesto
+                     FROM ({_sql_por_metrica("empleados_anterior")})
+                 )
+            SELECT ?, ?, a.metrica, a.empleado, a.departamento, a.valor,
+                   RANK() OVER (PARTITION BY a.metrica ORDER BY a.valor DESC),
+                   RANK() OVER (PARTITION BY a.metrica, a.departamento ORDER BY a.valor DESC),
+                   p.puesto
+            FROM actual a
+            LEFT JOIN puestos_anteriores p ON p.metrica = a.metrica AND p.empleado = a.empleado
+        """, (
+            inicio.isoformat(), fin.isoformat(),
+            inicio_anterior.isoformat(), fin_anterior.isoformat(),
+            tipo, inicio.isoformat()
+        ))
+        c.execute(
+            "INSERT OR REPLACE INTO rankings_periodos (tipo, inicio, calculado) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (tipo, inicio.isoformat())
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def _asegurar_ranking(conn, tipo, referencia):
+    """Inicio del periodo, recalculando su ranking solo si un trigger lo invalidó"""
+    inicio, _, _ = rango_periodo(tipo, referencia or date.today())
+    vigente = conn.execute(
+        "SELECT 1 FROM rankings_periodos WHERE tipo = ? AND inicio = ?",
+        (tipo, inicio.isoformat())
+    ).fetchone()
+    if not vigente:
+        calcular_ranking(conn, tipo, inicio)
+    return inicio.isoformat()
+
+def obtener_ranking(tipo, referencia=None, metrica="total", limite=None):
+    """Ranking del periodo que contiene `referencia` (hoy por defecto)"""
+    columnas = ("empleado", "departamento", "valor", "puesto", "puesto_departamento", "puesto_anterior")
+    conn = get_connection()
+    try:
+        inicio = _asegurar_ranking(conn, tipo, referencia)
+        filas = conn.execute(f"""
+            SELECT {', '.join(columnas)} FROM rankings
+            WHERE tipo = ? AND inicio = ? AND metrica = ?
+            ORDER BY puesto, empleado
+            LIMIT ?
+        """, (tipo, inicio, metrica, -1 if limite is None else limite)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(columnas, fila)) for fila in filas]
+
+def obtener_puesto(empleado, tipo, referencia=None, metrica="total"):
+    """Puesto de un empleado y total de participantes (None si no vendió en el periodo)"""
+    columnas = ("valor", "puesto", "puesto_departamento", "puesto_anterior", "participantes")
+    conn = get_connection()
+    try:
+        inicio = _asegurar_ranking(conn, tipo, referencia)
+        fila = conn.execute("""
+            SELECT valor, puesto, puesto_departamento, puesto_anterior,
+                   (SELECT COUNT(*) FROM rankings r
+                    WHERE r.tipo = ? AND r.inicio = ? AND r.metrica = ?)
+            FROM rankings
+            WHERE tipo = ? AND inicio = ? AND metrica = ? AND empleado = ?
+        """, (tipo, inicio, metrica, tipo, inicio, metrica, empleado)).fetchone()
+    finally:
+        conn.close()
+    return dict(zip(columnas, fila)) if fila else None
+
+# -------------------- COMPARACIÓN DE PERIODOS --------------------
+COMPARACIONES = ("anterior", "anio_anterior")
+
+def periodos_comparacion(tipo, referencia, contra="anterior"):
+    """Periodo estándar que contiene la referencia y el periodo contra el que se compara"""
+    actual = rango_periodo(tipo, referencia)
+    if contra == "anterior":
+        return actual, rango_periodo(tipo, actual[0] - timedelta(days=1))
+    if contra == "anio_anterior":
+        # Días y semanas se alinean 52 semanas atrás para comparar el mismo día de la semana
+        if tipo == "mensual":
+            return actual, rango_periodo(tipo, actual[0].replace(year=actual[0].year - 1))
+        return actual, rango_periodo(tipo, actual[0] - timedelta(weeks=52))
+    raise ValueError(f"Comparación desconocida: {contra}")
+
+def _variacion(fila):
+    """Agrega la diferencia absoluta y porcentual entre el periodo a y el b"""
+    fila["delta"] = fila["a"] - fila["b"]
+    fila["pct"] = round(fila["delta"] * 100 / fila["b"], 1) if fila["b"] else None
+    return fila
+
+@operacion_segura
+def comparar_periodos(inicio_a, fin_a, inicio_b, fin_b, empleado=None):
+    """Totales de dos periodos y su variación por empleado, departamento y categoría, desde el rollup"""
+    # Una sola pasada: ambos rangos se leen por la clave primaria (fecha, empleado)
+    sumas = ", ".join(
+        f"SUM(CASE WHEN v.fecha BETWEEN :ia AND :fa THEN v.{cat} ELSE 0 END), "
+        f"SUM(CASE WHEN v.fecha BETWEEN :ib AND :fb THEN v.{cat} ELSE 0 END)"
+        for cat in CATEGORIAS
+    )
+    filtro_empleado = "AND v.empleado = :empleado" if empleado else ""
+    conn = get_connection()
+    filas = conn.execute(f"""
+        SELECT v.empleado, COALESCE(e.departamento, '(sin departamento)'), {sumas}
+        FROM ventas_diarias v
+        LEFT JOIN empleados e ON e.nombre = v.empleado
+        WHERE (v.fecha BETWEEN :ia AND :fa OR v.fecha BETWEEN :ib AND :fb) {filtro_empleado}
+        GROUP BY v.empleado
+    """, {
+        "ia": str(inicio_a), "fa": str(fin_a), "ib": str(inicio_b), "fb": str(fin_b),
+        "empleado": empleado
+    }).fetchall()
+    conn.close()
+    
+    por_empleado, por_departamento = [], {}
+    por_categoria = {cat: {"categoria": cat, "a": 0, "b": 0} for cat in CATEGORIAS}
+    for nombre, departamento, *valores in filas:
+        a, b = sum(valores[0::2]), sum(valores[1::2])
+        por_empleado.append(_variacion({"empleado": nombre, "departamento": departamento, "a": a, "b": b}))
+        depto = por_departamento.setdefault(departamento, {"departamento": departamento, "a": 0, "b": 0})
+        depto["a"] += a
+        depto["b"] += b
+        for indice, cat in enumerate(CATEGORIAS):
+            por_categoria[cat]["a"] += valores[2 * indice]
+            por_categoria[cat]["b"] += valores[2 * indice + 1]
+    
+    total = {"categoria": "total", "a": sum(fila["a"] for fila in por_empleado),
+             "b": sum(fila["b"] for fila in por_empleado)}
+    return {
+        "por_empleado": sorted(por_empleado, key=lambda fila: -fila["delta"]),
+        "por_departamento": sorted((_variacion(fila) for fila in por_departamento.values()),
+                                   key=lambda fila: fila["departamento"]),
+        "por_categoria": [_variacion(total), *(_variacion(fila) for fila in por_categoria.values())]
+    }
+
+# -------------------- METAS --------------------
+ALCANCES_META = ("empleado", "departamento")
+
+def _sql_inicio_periodo(tipo, fecha):
+    """CASE SQL con el inicio del periodo de tipo `tipo` (expresión) que contiene `fecha`"""
+    ramas = " ".join(
+        f"WHEN '{nombre}' THEN {_INICIO_PERIODO_SQL[nombre].format(f=fecha)}"
+        for nombre in TIPOS_PERIODO
+    )
+    return f"CASE {tipo} {ramas} END"
+
+def _sql_valor_metrica(metrica, fila):
+    """CASE SQL con el valor de la métrica `metrica` (expresión) para una fila de ventas"""
+    # Las filas crudas (p. ej. copiadas por fusionar_backup) pueden traer categorías NULL
+    ramas = " ".join(f"WHEN '{cat}' THEN COALESCE({fila}.{cat}, 0)" for cat in CATEGORIAS)
+    total = " + ".join(f"COALESCE({fila}.{cat}, 0)" for cat in CATEGORIAS)
+    return f"CASE {metrica} WHEN 'total' THEN {total} {ramas} END"
+
+def _sql_avanzar_metas(fila, signo):
+    """Sentencia de trigger que suma (o resta) una venta al avance de las metas que la incluyen"""
+    return f"""
+        INSERT INTO metas_progreso (meta_id, inicio, avance)
+        SELECT m.id, {_sql_inicio_periodo("m.tipo", f"{fila}.fecha")},
+               {signo} {_sql_valor_metrica("m.metrica", fila)}
+        FROM metas m
+        WHERE {fila}.fecha IS NOT NULL AND (
+            (m.alcance = 'empleado' AND m.objetivo = {fila}.empleado)
+            OR (m.alcance = 'departamento' AND m.objetivo = (
+                SELECT departamento FROM empleados WHERE nombre = {fila}.empleado
+            ))
+        )
+        ON CONFLICT (meta_id, inicio) DO UPDATE SET avance = avance + excluded.avance;
+    """
+
+def crear_metas(c):
+    """Crea las tablas de metas y de avance, y los triggers que acumulan el avance"""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS metas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alcance TEXT NOT NULL CHECK (alcance IN ('empleado', 'departamento')),
+            objetivo TEXT NOT NULL,
+            metrica TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            meta INTEGER NOT NULL CHECK (meta > 0),
+            creada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (alcance, objetivo, metrica, tipo)
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS metas_progreso (
+            meta_id INTEGER NOT NULL,
+            inicio DATE NOT NULL,
+            avance INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (meta_id, inicio)
+        ) WITHOUT ROWID
+    """)
+    
+    triggers = {
+        "trg_metas_ventas_insert": ("AFTER INSERT ON registros_ventas", [
+            _sql_avanzar_metas("NEW", "+"),
+        ]),
+        "trg_metas_ventas_delete": ("AFTER DELETE ON registros_ventas", [
+            _sql_avanzar_metas("OLD", "-"),
+        ]),
+        "trg_metas_ventas_update": ("AFTER UPDATE ON registros_ventas", [
+            _sql_avanzar_metas("OLD", "-"),
+            _sql_avanzar_metas("NEW", "+"),
+        ]),
+        # Un cambio de departamento mueve todo el histórico del empleado entre metas
+        "trg_metas_departamento": (
+            "AFTER UPDATE OF departamento ON empleados WHEN OLD.departamento IS NOT NEW.departamento",
+            _sql_recalcular_avance(
+                "m.alcance = 'departamento' AND m.objetivo IN (OLD.departamento, NEW.departamento)"
+            )
+        ),
+    }
+    for nombre, (evento, sentencias) in triggers.items():
+        # Se recrean siempre para que las bases existentes reciban la definición vigente
+        c.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        c.execute(f"""
+            CREATE TRIGGER {nombre}
+            {evento}
+            BEGIN
+                {"".join(sentencias)}
+            END
+        """)
+
+def _sql_recalcular_avance(condicion):
+    """Sentencias que recalculan desde el rollup el avance de las metas que cumplen la condición"""
+    return [
+        f"DELETE FROM metas_progreso WHERE meta_id IN (SELECT m.id FROM metas m WHERE {condicion});",
+        f"""
+        INSERT INTO metas_progreso (meta_id, inicio, avance)
+        SELECT m.id, {_sql_inicio_periodo("m.tipo", "v.fecha")} AS inicio,
+               SUM({_sql_valor_metrica("m.metrica", "v")})
+        FROM metas m
+        JOIN empleados e ON (m.alcance = 'departamento' AND e.departamento = m.objetivo)
+                         OR (m.alcance = 'empleado' AND e.nombre = m.objetivo)
+        JOIN ventas_diarias v ON v.empleado = e.nombre
+        WHERE {condicion}
+        GROUP BY m.id, inicio;
+        """,
+    ]
+
+def _recalcular_avance(conn, condicion="1", parametros=()):
+    """Recalcula desde el rollup el avance de las metas que cumplen la condición"""
+    for sentencia in _sql_recalcular_avance(condicion):
+        conn.execute(sentencia, parametros)
+
+def reconstruir_metas_progreso(conn):
+    """Recalcula el avance de todas las metas desde el rollup diario"""
+    _recalcular_avance(conn)
+    conn.commit()
+
+@operacion_segura
+def guardar_meta(alcance, objetivo, metrica, tipo, meta):
+    """Crea o actualiza una meta; al crearla calcula su avance desde el rollup"""
+    if alcance not in ALCANCES_META or metrica not in METRICAS_RANKING or tipo not in TIPOS_PERIODO:
+        raise ValueError("Meta inválida")
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO metas (alcance, objetivo, metrica, tipo, meta) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (alcance, objetivo, metrica, tipo) DO UPDATE SET meta = excluded.meta
+    """, (alcance, objetivo, metrica, tipo, int(meta)))
+    meta_id = c.execute(
+        "SELECT id FROM metas WHERE alcance = ? AND objetivo = ? AND metrica = ? AND tipo = ?",
+        (alcance, objetivo, metrica, tipo)
+    ).fetchone()[0]
+    if not c.execute("SELECT 1 FROM metas_progreso WHERE meta_id = ? LIMIT 1", (meta_id,)).fetchone():
+        _recalcular_avance(conn, "m.id = ?", (meta_id,))
+    conn.commit()
+    conn.close()
+    _notificar("cambio", "metas")
+    return meta_id
+
+@operacion_segura
+def eliminar_meta(meta_id):
+    """Elimina una meta y su avance"""
+    conn = get_connection()
+    conn.execute("DELETE FROM metas_progreso WHERE meta_id = ?", (meta_id,))
+    conn.execute("DELETE FROM metas WHERE id = ?", (meta_id,))
+    conn.commit()
+    conn.close()
+    _notificar("cambio", "metas")
+    return True
+
+_COLUMNAS_METAS = ("id", "alcance", "objetivo", "metrica", "tipo", "meta", "avance")
+
+def _sql_metas_con_avance(condicion):
+    """SELECT de metas con el avance del periodo que contiene la fecha :hoy"""
+    return f"""
+        SELECT m.id, m.alcance, m.objetivo, m.metrica, m.tipo, m.meta, COALESCE(p.avance, 0)
+        FROM metas m
+        LEFT JOIN metas_progreso p
+               ON p.meta_id = m.id AND p.inicio = {_sql_inicio_periodo("m.tipo", ":hoy")}
+        WHERE {condicion}
+        ORDER BY m.alcance, m.objetivo, m.tipo, m.metrica
+    """
+
+@operacion_segura
+def listar_metas(hoy=None):
+    """Todas las metas con su avance en el periodo en curso"""
+    conn = get_connection()
+    filas = conn.execute(_sql_metas_con_avance("1"), {"hoy": (hoy or date.today()).isoformat()}).fetchall()
+    conn.close()
+    return [dict(zip(_COLUMNAS_METAS, fila)) for fila in filas]
+
+@operacion_segura
+def metas_empleado(empleado, hoy=None):
+    """Metas propias y de su departamento con su avance actual, en una sola consulta indexada"""
+    conn = get_connection()
+    filas = conn.execute(_sql_metas_con_avance("""
+        (m.alcance = 'empleado' AND m.objetivo = :empleado)
+        OR (m.alcance = 'departamento'
+            AND m.objetivo = (SELECT departamento FROM empleados WHERE nombre = :empleado))
+    """), {"hoy": (hoy or date.today()).isoformat(), "empleado": empleado}).fetchall()
+    conn.close()
+    return [dict(zip(_COLUMNAS_METAS, fila)) for fila in filas]
+
+# -------------------- AUTENTICACIÓN --------------------
+@operacion_segura
+def autenticar_usuario(username, password, ip=None):
+    """Verifica las credenciales usando hash"""
+    conn = get_connection()
+    c = conn.cursor()
+    
+    c.execute("""
+        SELECT username, rol, empleado_id, activo, password_hash
+        FROM usuarios 
+        WHERE username = ? AND activo = 1
+    """, (username,))
+    
+    usuario = c.fetchone()
+    
+    cache = obtener_cache_verificaciones()
+    valido = False
+    if usuario and usuario[4]:
+        hashed = usuario[4]
+        valido = cache.verificada(username, password, hashed) or check_password(password, hashed)
+        
+        # Migrar hashes heredados o con otro costo al formato actual
+        if valido and necesita_rehash(hashed):
+            hashed = hash_password(password)
+            c.execute("UPDATE usuarios SET password_hash = ? WHERE username = ?", (hashed, username))
+            conn.commit()
+            logger.info(f"🔐 Hash de contraseña actualizado: {username}")
+        if valido:
+            cache.guardar(username, password, hashed)
+    conn.close()
+    
+    limitador = obtener_limitador_login()
+    if valido:
+        limitador.registrar_exito(username)
+        logger.info(f"✅ Usuario autenticado: {username}")
+        return {
+            'username': usuario[0],
+            'rol': usuario[1],
+            'empleado_id': usuario[2],
+            'activo': usuario[3]
+        }
+    
+    limitador.registrar_fallo(username, ip)
+    logger.warning(f"❌ Intento fallido de login: {username}")
+    return None
+
+@operacion_segura
+def crear_usuario_db(username, password, rol):
+    """Crea usuario con contraseña hasheada"""
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        password_hash = hash_password(password)
+        c.execute(
+            "INSERT INTO usuarios (username, password_hash, rol, activo) VALUES (?, ?, ?, 1)",
+            (username, password_hash, rol)
+        )
+        conn.commit()
+        logger.info(f"✅ Usuario creado: {username}")
+        return True
+    except sqlite3.IntegrityError:
+        logger.warning(f"⚠️ Usuario ya existe: {username}")
+        return False
+    finally:
+        conn.close()
+
+@operacion_segura
+def actualizar_ultimo_acceso(username):
+    """Actualiza la fecha de último acceso"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE usuarios SET ultimo_acceso = ? WHERE username = ?",
+        (datetime.now(), username)
+    )
+    conn.commit()
+    conn.close()
+
+# -------------------- SESIONES PERSISTENTES --------------------
+# Duración de un token de sesión (un turno largo)
+DURACION_SESION = timedelta(hours=12)
+
+def _leer_secreto_sesiones():
+    """Secreto HMAC desde la variable de entorno o los metadatos de la BD"""
+    secreto = os.environ.get("VENTAS_SECRETO_SESION")
+    if secreto:
+        return secreto.encode()
+    
+    conn = get_connection()
+    try:
+        conn.execute(
+            "INSERT OR IGNORE INTO metadatos (clave, valor) VALUES ('secreto_sesiones', ?)",
+            (secrets.token_hex(32),)
+        )
+        conn.commit()
+        valor = conn.execute("SELECT valor FROM metadatos WHERE clave = 'secreto_sesiones'").fetchone()[0]
+    finally:
+        conn.close()
+    return valor.encode()
+
+def obtener_secreto_sesiones():
+    """Secreto HMAC para firmar tokens, leído una vez por proceso"""
+    return _singleton("secreto_sesiones", _leer_secreto_sesiones)
+
+def _firmar_token(carga):
+    """Firma HMAC-SHA256 (base64 url) de la carga del token"""
+    firma = hmac.new(obtener_secreto_sesiones(), carga.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(firma).decode().rstrip("=")
+
+def _hash_token(identificador):
+    """Hash con el que se guarda el token en la base de datos"""
+    return hashlib.sha256(identificador.encode()).hexdigest()
+
+@operacion_segura
+def crear_sesion_persistente(username):
+    """Emite un token firmado y con vencimiento para el usuario"""
+    identificador = secrets.token_urlsafe(24)
+    expira = datetime.now() + DURACION_SESION
+    carga = f"{identificador}.{int(expira.timestamp())}"
+    
+    conn = get_connection()
+    conn.execute(
+        "INSERT INTO sesiones (token_hash, username, expira) VALUES (?, ?, ?)",
+        (_hash_token(identificador), username, expira)
+    )
+    conn.commit()
+    conn.close()
+    return f"{carga}.{_firmar_token(carga)}"
+
+@operacion_segura
+def validar_sesion_persistente(token, registrar_uso=False):
+    """Verifica firma y vencimiento y resuelve el usuario con una sola consulta"""
+    try:
+        identificador, vence, firma = token.split(".")
+        vence = int(vence)
+    except (AttributeError, ValueError):
+        return None
+    
+    # Firma y vencimiento se comprueban sin tocar la base de datos; se comparan
+    # bytes porque compare_digest rechaza (TypeError) texto no ASCII
+    if not hmac.compare_digest(firma.encode(), _firmar_token(f"{identificador}.{vence}").encode()):
+        return None
+    if vence < time.time():
+        return None
+    
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("""
+        SELECT u.username, u.rol, u.empleado_id
+        FROM sesiones s
+        JOIN usuarios u ON u.username = s.username
+        WHERE s.token_hash = ? AND s.revocada = 0 AND s.expira > ? AND u.activo = 1
+    """, (_hash_token(identificador), datetime.now()))
+    fila = c.fetchone()
+    if fila and registrar_uso:
+        c.execute(
+            "UPDATE sesiones SET ultimo_uso = ? WHERE token_hash = ?",
+            (datetime.now(), _hash_token(identificador))
+        )
+        conn.commit()
+    conn.close()
+    
+    if not fila:
+        return None
+    return {'username': fila[0], 'rol': fila[1], 'empleado_id': fila[2]}
+
+@operacion_segura
+def revocar_sesion(token=None, token_hash=None):
+    """Revoca una sesión por token o por su hash"""
+    if token:
+        token_hash = _hash_token(token.split(".")[0])
+    conn = get_connection()
+    conn.execute("UPDATE sesiones SET revocada = 1 WHERE token_hash = ?", (token_hash,))
+    conn.commit()
+    conn.close()
+
+@operacion_segura
+def revocar_sesiones_usuario(username):
+    """Revoca todas las sesiones activas de un usuario"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("UPDATE sesiones SET revocada = 1 WHERE username = ? AND revocada = 0", (username,))
+    conn.commit()
+    conn.close()
+    logger.info(f"🔒 {c.rowcount} sesiones revocadas para {username}")
+    return c.rowcount
+
+@operacion_segura
+def purgar_sesiones_vencidas():
+    """Elimina sesiones vencidas o revocadas"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM sesiones WHERE expira <= ? OR revocada = 1", (datetime.now(),))
+    conn.commit()
+    conn.close()
+    return c.rowcount
+
+# -------------------- EMPLEADOS --------------------
+def listar_empleados_activos():
+    """Nombres de empleados activos, ordenados"""
+    conn = get_connection()
+    filas = conn.execute("SELECT nombre FROM empleados WHERE activo = 1 ORDER BY nombre").fetchall()
+    conn.close()
+    return tuple(fila[0] for fila in filas)
+
+@operacion_segura
+def obtener_empleado_por_id(empleado_id):
+    """Obtiene nombre y departamento de un empleado activo"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("""
+        SELECT nombre, departamento 
+        FROM empleados 
+        WHERE id = ? AND activo = 1
+    """, (empleado_id,))
+    fila = c.fetchone()
+    conn.close()
+    return {'nombre': fila[0], 'departamento': fila[1]} if fila else None
+
+@operacion_segura
+def guardar_empleado_db(nombre, departamento):
+    """Guarda un nuevo empleado en la base de datos"""
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("SELECT activo FROM empleados WHERE nombre = ?", (nombre,))
+        resultado = c.fetchone()
+        
+        if resultado:
+            if resultado[0] == 0:
+                c.execute("UPDATE empleados SET activo = 1, departamento = ? WHERE nombre = ?", (departamento, nombre))
+                conn.commit()
+                _notificar("cambio", "empleados")
+                return True
+            else:
+                return False
+        else:
+            c.execute("INSERT INTO empleados (nombre, departamento, activo) VALUES (?, ?, 1)", (nombre, departamento))
+            conn.commit()
+            _notificar("cambio", "empleados")
+            return True
+    except Exception as e:
+        logger.error(f"Error guardando empleado: {e}")
+        return False
+    finally:
+        conn.close()
+
+@operacion_segura
+def eliminar_empleado_db(nombre):
+    """Elimina (desactiva) un empleado de la base de datos"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("UPDATE empleados SET activo = 0 WHERE nombre = ?", (nombre,))
+    conn.commit()
+    conn.close()
+    _notificar("cambio", "empleados")
+
+# -------------------- USUARIOS --------------------
+@operacion_segura
+def crear_usuario_empleado(username, password, empleado_nombre):
+    """Crea un usuario asociado a un empleado existente"""
+    conn = get_connection()
+    c = conn.cursor()
+    
+    try:
+        c.execute("SELECT id FROM empleados WHERE nombre = ? AND activo = 1", (empleado_nombre,))
+        empleado = c.fetchone()
+        
+        if not empleado:
+            return False, "El empleado no existe"
+        
+        c.execute("SELECT id FROM usuarios WHERE empleado_id = ?", (empleado[0],))
+        if c.fetchone():
+            return False, "El empleado ya tiene un usuario asignado"
+        
+        password_hash = hash_password(password)
+        c.execute("""
+            INSERT INTO usuarios (username, password_hash, rol, empleado_id, activo) 
+            VALUES (?, ?, ?, ?, 1)
+        """, (username, password_hash, 'Vendedor', empleado[0]))
+        
+        conn.commit()
+        _notificar("cambio", "usuarios")
+        return True, "Usuario creado exitosamente"
+    except sqlite3.IntegrityError:
+        return False, "El nombre de usuario ya existe"
+    except Exception as e:
+        logger.error(f"Error creando usuario empleado: {e}")
+        return False, f"Error: {e}"
+    finally:
+        conn.close()
+
+@operacion_segura
+def obtener_empleados_sin_usuario():
+    """Obtiene lista de empleados que no tienen usuario asignado"""
+    conn = get_connection()
+    filas = conn.execute("""
+        SELECT e.nombre 
+        FROM empleados e 
+        WHERE e.activo = 1 
+        AND e.id NOT IN (
+            SELECT u.empleado_id 
+            FROM usuarios u 
+            WHERE u.empleado_id IS NOT NULL AND u.activo = 1
+        )
+        ORDER BY e.nombre
+    """).fetchall()
+    conn.close()
+    return [fila[0] for fila in filas]
+
+@operacion_segura
+def toggle_usuario_activo(username, activo):
+    """Activa o desactiva un usuario"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("UPDATE usuarios SET activo = ? WHERE username = ?", (activo, username))
+    if not activo:
+        c.execute("UPDATE sesiones SET revocada = 1 WHERE username = ?", (username,))
+    conn.commit()
+    conn.close()
+    _notificar("cambio", "usuarios")
+
+@operacion_segura
+def eliminar_usuario_db(username):
+    """Elimina permanentemente un usuario de la base de datos"""
+    if username == "admin":
+        return False, "No se puede eliminar el usuario admin"
+    
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("DELETE FROM usuarios WHERE username = ?", (username,))
+        c.execute("DELETE FROM sesiones WHERE username = ?", (username,))
+        conn.commit()
+        _notificar("cambio", "usuarios")
+        return True, "Usuario eliminado"
+    except Exception as e:
+        logger.error(f"Error eliminando usuario: {e}")
+        return False, f"Error: {e}"
+    finally:
+        conn.close()
+
+# -------------------- VENTAS --------------------
+@operacion_segura
+def guardar_venta(fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional):
+    """Guarda un registro de venta"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO registros_ventas
+        (fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional))
+    conn.commit()
+    conn.close()
+    _notificar("cambio", "ventas")
+
+# Días que se recuerdan las claves de idempotencia de la API
+RETENCION_IDEMPOTENCIA_DIAS = 7
+
+def purgar_idempotencia(retencion_dias=RETENCION_IDEMPOTENCIA_DIAS):
+    """Elimina las claves de idempotencia vencidas"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "DELETE FROM idempotencia_ventas WHERE creada < datetime('now', ?)",
+        (f"-{int(retencion_dias)} days",)
+    )
+    conn.commit()
+    conn.close()
+    return c.rowcount
+
+# -------------------- TIENDAS --------------------
+# Registro de tiendas: {"tiendas": [{"id": ..., "nombre": ..., "db": ruta}, ...]}
+ARCHIVO_TIENDAS = os.environ.get("VENTAS_TIENDAS", "tiendas.json")
+NOMBRE_TIENDA_LOCAL = "Equipo Locatel Restrepo"
+
+# Segundos que se espera a cada tienda antes de darla por lenta
+TIMEOUT_TIENDA = 5.0
+MAX_HILOS_TIENDAS = 8
+
+def cargar_tiendas():
+    """Registro de tiendas {id: {"nombre", "db"}}; sin archivo, solo la tienda local.
+
+    Las tiendas se identifican por id y por base de datos; el nombre es solo una
+    etiqueta y puede repetirse. Un id o una base repetidos se descartan para no
+    contar dos veces las mismas ventas.
+    """
+    if os.path.exists(ARCHIVO_TIENDAS):
+        try:
+            with open(ARCHIVO_TIENDAS, "r", encoding="utf-8") as f:
+                registro = json.load(f)
+            tiendas, bases = {}, set()
+            for t in registro.get("tiendas", []):
+                base = os.path.abspath(t["db"]) if t["db"] is not None else None
+                if t["id"] in tiendas or base in bases:
+                    logger.warning(f"⚠️ Tienda duplicada en {ARCHIVO_TIENDAS}, se ignora: {t['id']} ({t['db']})")
+                    continue
+                tiendas[t["id"]] = {"nombre": t.get("nombre", t["id"]), "db": t["db"]}
+                bases.add(base)
+            return tiendas
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error cargando registro de tiendas: {e}")
+    return {"local": {"nombre": NOMBRE_TIENDA_LOCAL, "db": _backend.ruta}}
+
+def etiquetas_tiendas(tiendas):
+    """Etiqueta visible de cada tienda: su nombre, con el id si el nombre se repite"""
+    nombres = [tienda["nombre"] for tienda in tiendas.values()]
+    return {
+        tienda_id: tienda["nombre"] if nombres.count(tienda["nombre"]) == 1 else f"{tienda['nombre']} ({tienda_id})"
+        for tienda_id, tienda in tiendas.items()
+    }
+
+def tienda_local(tiendas):
+    """Id de la tienda cuya base es la del backend actual (o None)"""
+    ruta = _backend.ruta and os.path.abspath(_backend.ruta)
+    for tienda_id, tienda in tiendas.items():
+        if tienda["db"] is None or (ruta and os.path.abspath(tienda["db"]) == ruta):
+            return tienda_id
+    return None
+
+def _conectar_tienda(tienda):
+    """Conexión de solo lectura a la base de una tienda"""
+    if tienda["db"] is None or (_backend.ruta and os.path.abspath(tienda["db"]) == os.path.abspath(_backend.ruta)):
+        return get_connection()
+    ruta = Path(tienda["db"]).resolve()
+    if not ruta.exists():
+        raise FileNotFoundError(f"No existe la base {tienda['db']}")
+    return sqlite3.connect(f"{ruta.as_uri()}?mode=ro", uri=True, timeout=5)
+
+def agregar_tienda(tienda, fecha_inicio, fecha_fin, limite):
+    """Sumas parciales de una tienda desde su rollup diario; se interrumpe al pasar `limite`"""
+    inicio = time.perf_counter()
+    conn = _conectar_tienda(tienda)
+    # SQLite abandona la consulta (OperationalError) cuando vence el plazo
+    conn.set_progress_handler(lambda: time.monotonic() > limite, 10000)
+    columnas = ", ".join(f"SUM({cat})" for cat in ("registros", *CATEGORIAS))
+    try:
+        por_empleado = {
+            fila[0]: list(fila[1:]) for fila in conn.execute(f"""
+                SELECT empleado, {columnas} FROM ventas_diarias
+                WHERE fecha BETWEEN ? AND ?
+                GROUP BY empleado
+            """, (str(fecha_inicio), str(fecha_fin)))
+        }
+        por_fecha = {
+            fila[0]: list(fila[1:]) for fila in conn.execute(f"""
+                SELECT fecha, {columnas} FROM ventas_diarias
+                WHERE fecha BETWEEN ? AND ?
+                GROUP BY fecha
+            """, (str(fecha_inicio), str(fecha_fin)))
+        }
+    finally:
+        conn.close()
+    return {
+        "por_empleado": por_empleado,
+        "por_fecha": por_fecha,
+        "ms": (time.perf_counter() - inicio) * 1000
+    }
+
+def _sumar(acumulado, valores):
+    """Suma elemento a elemento una lista de contadores parciales"""
+    if acumulado is None:
+        return list(valores)
+    return [a + b for a, b in zip(acumulado, valores)]
+
+def consultar_cadena(tienda_ids, fecha_inicio, fecha_fin, timeout=TIMEOUT_TIENDA):
+    """Consulta varias tiendas en paralelo y fusiona las sumas parciales.
+
+    Devuelve {"por_tienda", "por_empleado", "por_fecha", "tiempos", "errores"}; los
+    contadores son listas [registros, categorías...] y las tiendas van por id
+    (por_empleado usa la clave (tienda_id, empleado)). Las tiendas que no
+    responden a tiempo quedan en "errores" y no retrasan al resto.
+    """
+    tiendas = cargar_tiendas()
+    ejecutor = _singleton(
+        "ejecutor_tiendas",
+        lambda: ThreadPoolExecutor(max_workers=MAX_HILOS_TIENDAS, thread_name_prefix="tienda")
+    )
+    limite = time.monotonic() + timeout
+    futuros = {
+        ejecutor.submit(agregar_tienda, tiendas[tienda_id], fecha_inicio, fecha_fin, limite): tienda_id
+        for tienda_id in tienda_ids if tienda_id in tiendas
+    }
+    hechos, pendientes = wait(futuros, timeout=timeout)
+    
+    resultado = {"por_tienda": {}, "por_empleado": {}, "por_fecha": {}, "tiempos": {}, "errores": {}}
+    for futuro in pendientes:
+        tienda_id = futuros[futuro]
+        resultado["errores"][tienda_id] = f"Sin respuesta en {timeout:g} s"
+        logger.warning(f"⏱️ Tienda lenta: {tienda_id}")
+    for futuro in hechos:
+        tienda_id = futuros[futuro]
+        try:
+            parcial = futuro.result()
+        except Exception as e:
+            resultado["errores"][tienda_id] = str(e)
+            logger.error(f"Error consultando tienda {tienda_id}: {e}")
+            continue
+        
+        resultado["tiempos"][tienda_id] = parcial["ms"]
+        for empleado, valores in parcial["por_empleado"].items():
+            resultado["por_empleado"][(tienda_id, empleado)] = valores
+            resultado["por_tienda"][tienda_id] = _sumar(resultado["por_tienda"].get(tienda_id), valores)
+        for fecha, valores in parcial["por_fecha"].items():
+            resultado["por_fecha"][fecha] = _sumar(resultado["por_fecha"].get(fecha), valores)
+    return resultado
+
+# -------------------- FUNCIONES DE CONFIGURACIÓN --------------------
+def cargar_config():
+    """Carga la configuración desde el backend"""
+    try:
+        config = _backend.leer_config()
+        if config is not None:
+            return config
+    except Exception as e:
+        logger.error(f"Error cargando config: {e}")
+    
+    return {
+        "tema": "Claro",
+        "idioma": "Español",
+        "productos_adicionales": ["Producto 1", "Producto 2", "Producto 3", "Producto 4"],
+        "productos_seleccionados": [],
+        "nivel_compresion": NIVEL_COMPRESION
+    }
+
+def guardar_config(config):
+    """Guarda la configuración en el backend de forma atómica"""
+    try:
+        _backend.escribir_config(descongelar_config(config))
+        logger.info("✅ Configuración guardada")
+        _notificar("cambio", "config")
+        return True
+    except Exception as e:
+        logger.error(f"Error guardando config: {e}")
+        return False
+
+def congelar_config(valor):
+    """Copia inmutable de la configuración (dicts de solo lectura y tuplas)"""
+    if isinstance(valor, dict):
+        return MappingProxyType({k: congelar_config(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar_config(v) for v in valor)
+    return valor
+
+def descongelar_config(valor):
+    """Copia editable de una configuración congelada"""
+    if isinstance(valor, (dict, MappingProxyType)):
+        return {k: descongelar_config(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [descongelar_config(v) for v in valor]
+    return valor
+
+class ConfigCompartida:
+    """Configuración única por proceso, recargada solo si cambia en el backend"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None
+        self._firma = None
+
+    def obtener(self):
+        """Devuelve la configuración vigente de solo lectura"""
+        firma = _backend.firma_config()
+        if self._config is None or firma != self._firma:
+            with self._lock:
+                if self._config is None or firma != self._firma:
+                    self._config = congelar_config(cargar_config())
+                    self._firma = firma
+                    logger.info("🔄 Configuración recargada")
+        return self._config
+
+def obtener_config():
+    """Configuración vigente, compartida en el proceso y de solo lectura"""
+    return _singleton("config", ConfigCompartida).obtener()
+
+# -------------------- FUNCIONES DE BACKUP --------------------
+# Nivel de gzip por defecto (1 = rápido, 9 = más pequeño); configurable en config.json
+NIVEL_COMPRESION = 6
+
+# Tamaño de cada bloque que se comprime por separado
+BLOQUE_BACKUP = 4 * 1024 * 1024
+
+def comprimir_paralelo(datos, nivel=NIVEL_COMPRESION, bloque=BLOQUE_BACKUP, hilos=None):
+    """Comprime en bloques independientes y en paralelo; el resultado es un gzip multi-miembro.
+
+    zlib libera el GIL, así que los hilos ocupan todos los núcleos. La concatenación
+    de miembros gzip es un gzip válido: `gunzip` y gzip.decompress la leen completa.
+    """
+    bloques = [datos[i:i + bloque] for i in range(0, len(datos), bloque)] or [b""]
+    hilos = min(hilos or os.cpu_count() or 1, len(bloques))
+    if hilos == 1:
+        return b"".join(gzip.compress(b, compresslevel=nivel, mtime=0) for b in bloques), 1, len(bloques)
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="gzip") as ejecutor:
+        miembros = ejecutor.map(lambda b: gzip.compress(b, compresslevel=nivel, mtime=0), bloques)
+        return b"".join(miembros), hilos, len(bloques)
+
+def crear_backup(nivel=None):
+    """Crea backup comprimido en memoria; devuelve (contenido, nombre, métricas)"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if nivel is None:
+        nivel = cargar_config().get("nivel_compresion", NIVEL_COMPRESION)
+    
+    try:
+        inicio = time.perf_counter()
+        db_content = _backend.volcar()
+        if db_content is None:
+            return None, None, None
+        volcado = time.perf_counter()
+        
+        compressed, hilos, bloques = comprimir_paralelo(db_content, nivel)
+        fin = time.perf_counter()
+        
+        metricas = {
+            "original": len(db_content),
+            "comprimido": len(compressed),
+            "nivel": nivel,
+            "hilos": hilos,
+            "bloques": bloques,
+            "segundos_volcado": volcado - inicio,
+            "segundos_compresion": fin - volcado,
+            "mb_s": len(db_content) / (1024 * 1024) / max(fin - volcado, 1e-9)
+        }
+        logger.info(
+            f"💾 Backup: {metricas['original'] / 1024:.0f} KB -> {metricas['comprimido'] / 1024:.0f} KB "
+            f"en {metricas['segundos_compresion']:.2f} s ({metricas['mb_s']:.0f} MB/s, {hilos} hilos)"
+        )
+        return compressed, f"backup_ventas_{timestamp}.db.gz", metricas
+    except Exception as e:
+        logger.error(f"Error creando backup: {e}")
+        return None, None, None
+
+def _leer_backup(origen, comprimido=None):
+    """Bytes SQLite de un backup (ruta o archivo abierto, .db o .db.gz)"""
+    if comprimido is None:
+        comprimido = str(getattr(origen, "name", origen)).endswith(".gz")
+    
+    if isinstance(origen, (str, Path)):
+        with open(origen, "rb") as f:
+            datos = f.read()
+    else:
+        datos = origen.read()
+    if comprimido:
+        datos = gzip.decompress(datos)
+    return datos
+
+def restaurar_backup(origen, comprimido=None):
+    """Reemplaza la base de datos con un backup (ruta o archivo abierto, .db o .db.gz)"""
+    _backend.cargar(_leer_backup(origen, comprimido))
+    logger.info("✅ Backup restaurado correctamente")
+    _notificar("cambio", "backup")
+
+# -------------------- FUSIÓN DE BACKUPS --------------------
+# Máximo de filas en conflicto que se devuelven como muestra
+MUESTRA_CONFLICTOS = 50
+
+def fusionar_backup(origen, comprimido=None, mapa_empleados=None, crear_empleados=True, simular=False):
+    """Agrega a la base local los registros de venta nuevos de un backup de otra tienda.
+
+    Los empleados del backup se asocian a los locales por nombre (sin distinguir
+    mayúsculas ni espacios), o según `mapa_empleados` {nombre externo: nombre local};
+    los que no coinciden se crean si `crear_empleados`, o sus filas se descartan
+    (un valor None en el mapa también descarta las filas de ese empleado).
+    Cada fila se clasifica con una llave natural (fecha, empleado, fecha_registro):
+    idéntica a una local -> omitida; única en ambos lados pero con otras cantidades
+    -> conflicto (se editó en una de las tiendas); si no, se inserta tal cual (también
+    con fecha_registro o cantidades NULL, para que otra fusión la reconozca).
+    Todo ocurre en una sola transacción con INSERT ... SELECT;
+    con `simular` se revierte al final y solo se devuelve el informe.
+    """
+    datos = _leer_backup(origen, comprimido)
+    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
+        tmp.write(datos)
+        ruta_origen = tmp.name
+    
+    cantidades = ", ".join(CATEGORIAS)
+    # IS también empareja NULL con NULL, para que volver a fusionar el mismo backup no duplique filas
+    iguales = " AND ".join(f"l.{cat} IS f.{cat}" for cat in CATEGORIAS)
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute("ATTACH DATABASE ? AS origen", (ruta_origen,))
+        tablas = {fila[0] for fila in c.execute("SELECT name FROM origen.sqlite_master WHERE type = 'table'")}
+        if "registros_ventas" not in tablas:
+            raise ValueError("El archivo no es un backup de ventas")
+        
+        c.execute("BEGIN IMMEDIATE")
+        
+        # 1. Mapa de empleados externo -> local
+        c.execute("CREATE TEMP TABLE mapa_fusion (externo TEXT PRIMARY KEY, local TEXT)")
+        c.executemany(
+            "INSERT OR REPLACE INTO mapa_fusion VALUES (?, ?)",
+            list((mapa_empleados or {}).items())
+        )
+        fuente_empleados = "SELECT empleado FROM origen.registros_ventas"
+        if "empleados" in tablas:
+            fuente_empleados += " UNION SELECT nombre FROM origen.empleados"
+        # Primero coincidencia exacta, luego sin distinguir mayúsculas ni espacios
+        mapear_automatico = f"""
+            INSERT OR IGNORE INTO mapa_fusion (externo, local)
+            SELECT e.empleado, l.nombre
+            FROM ({fuente_empleados}) e
+            JOIN main.empleados l ON lower(trim(l.nombre)) = lower(trim(e.empleado))
+            ORDER BY e.empleado, l.nombre = e.empleado DESC, l.activo DESC, l.id
+        """
+        c.execute(mapear_automatico)
+        creados = []
+        if crear_empleados:
+            # Un empleado nuevo por nombre normalizado; las variantes se asocian a él
+            departamento = (
+                "(SELECT MAX(departamento) FROM origen.empleados WHERE lower(trim(nombre)) = lower(?1))"
+                if "empleados" in tablas else "NULL"
+            )
+            creados = [fila[0] for fila in c.execute(f"""
+                SELECT MIN(trim(e.empleado)) AS nombre FROM ({fuente_empleados}) e
+                WHERE e.empleado IS NOT NULL AND trim(e.empleado) != ''
+                  AND e.empleado NOT IN (SELECT externo FROM mapa_fusion)
+                GROUP BY lower(trim(e.empleado))
+                ORDER BY nombre
+            """)]
+            c.executemany(
+                f"INSERT INTO main.empleados (nombre, departamento) "
+                f"SELECT ?1, COALESCE({departamento}, 'Droguería')",
+                [(nombre,) for nombre in creados]
+            )
+            c.execute(mapear_automatico)
+        
+        # 2. Clasificar cada fila del backup; las copias repetidas de una fila idéntica
+        #    se comparan por multiplicidad (la n-ésima copia es nueva si la base local tiene menos de n)
+        c.execute(f"""
+            CREATE TEMP TABLE filas_fusion AS
+            SELECT f.*,
+                CASE
+                    WHEN f.empleado IS NULL THEN 'sin_empleado'
+                    WHEN f.copia <= (
+                        SELECT COUNT(*) FROM main.registros_ventas l
+                        WHERE l.empleado = f.empleado AND l.fecha = f.fecha
+                          AND l.fecha_registro IS f.fecha_registro AND {iguales}
+                    ) THEN 'omitida'
+                    WHEN f.en_llave = 1 AND (
+                        SELECT COUNT(*) FROM main.registros_ventas l
+                        WHERE l.empleado = f.empleado AND l.fecha = f.fecha
+                          AND l.fecha_registro IS f.fecha_registro
+                    ) = 1 THEN 'conflicto'
+                    ELSE 'nueva'
+                END AS estado
+            FROM (
+                SELECT r.id AS id_origen, r.fecha, m.local AS empleado, r.empleado AS empleado_origen,
+                    {", ".join(f"r.{cat}" for cat in CATEGORIAS)}, r.fecha_registro,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY r.fecha, m.local, r.fecha_registro, {", ".join(f"r.{cat}" for cat in CATEGORIAS)}
+                        ORDER BY r.id
+                    ) AS copia,
+                    COUNT(*) OVER (PARTITION BY r.fecha, m.local, r.fecha_registro) AS en_llave
+                FROM origen.registros_ventas r
+                LEFT JOIN mapa_fusion m ON m.externo = r.empleado
+            ) f
+        """)
+        
+        # 3. Inserción en bloque; los triggers mantienen rollup, contadores y change_log
+        c.execute(f"""
+            INSERT INTO main.registros_ventas (fecha, empleado, {cantidades}, fecha_registro)
+            SELECT fecha, empleado, {cantidades}, fecha_registro
+            FROM filas_fusion WHERE estado = 'nueva'
+            ORDER BY id_origen
+        """)
+        
+        conteo = dict(c.execute("SELECT estado, COUNT(*) FROM filas_fusion GROUP BY estado").fetchall())
+        conflictos = [
+            dict(zip(("id_origen", "fecha", "empleado", *CATEGORIAS, "fecha_registro"), fila))
+            for fila in c.execute(f"""
+                SELECT id_origen, fecha, empleado, {cantidades}, fecha_registro
+                FROM filas_fusion WHERE estado = 'conflicto'
+                ORDER BY id_origen LIMIT ?
+            """, (MUESTRA_CONFLICTOS,))
+        ]
+        sin_empleado = [fila[0] for fila in c.execute(
+            "SELECT DISTINCT empleado_origen FROM filas_fusion WHERE estado = 'sin_empleado'"
+        )]
+        mapa = dict(c.execute("SELECT externo, local FROM mapa_fusion ORDER BY externo").fetchall())
+        
+        if simular:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        # Las tablas temporales y el ATTACH desaparecen con la conexión
+        conn.close()
+        os.remove(ruta_origen)
+    
+    informe = {
+        "insertadas": conteo.get("nueva", 0),
+        "omitidas": conteo.get("omitida", 0),
+        "conflictos": conteo.get("conflicto", 0),
+        "sin_empleado": conteo.get("sin_empleado", 0),
+        "empleados_creados": creados,
+        "empleados_sin_mapa": sin_empleado,
+        "mapa_empleados": mapa,
+        "muestra_conflictos": conflictos,
+        "simulado": simular
+    }
+    if not simular:
+        logger.info(
+            f"🔀 Backup fusionado: {informe['insertadas']} insertadas, "
+            f"{informe['omitidas']} omitidas, {informe['conflictos']} en conflicto"
+        )
+        _notificar("cambio", "ventas")
+        if creados:
+            _notificar("cambio", "empleados")
+    return informe
+
+# -------------------- MANTENIMIENTO --------------------
+COLUMNAS_EXPORTACION = ["id", "fecha", "empleado", *CATEGORIAS, "fecha_registro"]
+
+def exportar_ventas(destino, formato="csv", fecha_inicio=None, fecha_fin=None, lote=5000):
+    """Escribe los registros de venta en un archivo abierto (csv o json) y devuelve cuántos"""
+    condiciones, parametros = [], []
+    if fecha_inicio:
+        condiciones.append("fecha >= ?")
+        parametros.append(fecha_inicio)
+    if fecha_fin:
+        condiciones.append("fecha <= ?")
+        parametros.append(fecha_fin)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(COLUMNAS_EXPORTACION)} FROM registros_ventas {where} ORDER BY id", parametros)
+    
+    total = 0
+    if formato == "csv":
+        escritor = csv.writer(destino)
+        escritor.writerow(COLUMNAS_EXPORTACION)
+        for filas in iter(lambda: c.fetchmany(lote), []):
+            escritor.writerows(filas)
+            total += len(filas)
+    else:
+        destino.write("[")
+        for filas in iter(lambda: c.fetchmany(lote), []):
+            for fila in filas:
+                registro = json.dumps(dict(zip(COLUMNAS_EXPORTACION, fila)), ensure_ascii=False)
+                destino.write(("," if total else "") + "\n" + registro)
+                total += 1
+        destino.write("\n]\n")
+    conn.close()
+    logger.info(f"📤 {total} registros exportados ({formato})")
+    return total
+
+def leer_ventas_archivo(ruta):
+    """Lee ventas de un archivo csv o json como diccionarios"""
+    with open(ruta, encoding="utf-8", newline="") as f:
+        if str(ruta).endswith(".json"):
+            yield from json.load(f)
+        else:
+            yield from csv.DictReader(f)
+
+def importar_ventas(ventas, lote=5000):
+    """Inserta ventas (dicts con fecha, empleado y categorías) en lotes; devuelve (importadas, rechazadas)"""
+    conn = get_connection()
+    c = conn.cursor()
+    empleados = {fila[0] for fila in c.execute("SELECT nombre FROM empleados")}
+    
+    importadas, rechazadas, pendientes = 0, [], []
+    for numero, venta in enumerate(ventas, start=1):
+        try:
+            fecha = date.fromisoformat(str(venta["fecha"])[:10]).isoformat()
+            if venta["empleado"] not in empleados:
+                raise ValueError(f"empleado desconocido: {venta['empleado']}")
+            conteos = [int(venta.get(cat) or 0) for cat in CATEGORIAS]
+            if min(conteos) < 0:
+                raise ValueError("cantidades negativas")
+        except (KeyError, TypeError, ValueError) as e:
+            rechazadas.append((numero, str(e)))
+            continue
+        
+        pendientes.append((fecha, venta["empleado"], *conteos))
+        if len(pendientes) >= lote:
+            c.executemany(f"""
+                INSERT INTO registros_ventas (fecha, empleado, {', '.join(CATEGORIAS)})
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, pendientes)
+            importadas += len(pendientes)
+            pendientes = []
+    
+    if pendientes:
+        c.executemany(f"""
+            INSERT INTO registros_ventas (fecha, empleado, {', '.join(CATEGORIAS)})
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, pendientes)
+        importadas += len(pendientes)
+    conn.commit()
+    conn.close()
+    logger.info(f"📥 {importadas} registros importados, {len(rechazadas)} rechazados")
+    return importadas, rechazadas
+
+def reconstruir_derivados():
+    """Recalcula el rollup diario y los contadores, reconstruye índices y estadísticas del planificador"""
+    conn = get_connection()
+    reconstruir_rollup_diario(conn)
+    diferencias = reconciliar_estadisticas(conn)
+    reconstruir_metas_progreso(conn)
+    conn.execute("REINDEX")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    logger.info("✅ Índices reconstruidos y estadísticas del planificador actualizadas")
+    return diferencias
+
+def tamano_base(conn):
+    """Tamaño de la base en bytes (páginas por tamaño de página)"""
+    paginas = conn.execute("PRAGMA page_count").fetchone()[0]
+    return paginas * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def compactar_base():
+    """Ejecuta VACUUM y PRAGMA optimize; devuelve el tamaño antes y después en bytes"""
+    conn = get_connection()
+    antes = tamano_base(conn)
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA optimize")
+    despues = tamano_base(conn)
+    conn.close()
+    logger.info(f"🧹 Base compactada: {antes / 1024:.1f} KB -> {despues / 1024:.1f} KB")
+    return antes, despues
+
+def archivar_ventas(antes_de, destino="ventas_archivo.db"):
+    """Mueve los registros anteriores a una fecha a otra base SQLite; devuelve cuántos"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("ATTACH DATABASE ? AS archivo", (str(destino),))
+    try:
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS archivo.registros_ventas (
+                id INTEGER PRIMARY KEY,
+                fecha DATE,
+                empleado TEXT,
+                autoliquidable INTEGER DEFAULT 0,
+                oferta INTEGER DEFAULT 0,
+                marca_propia INTEGER DEFAULT 0,
+                producto_adicional INTEGER DEFAULT 0,
+                fecha_registro TIMESTAMP
+            )
+        """)
+        columnas = ", ".join(COLUMNAS_EXPORTACION)
+        c.execute(f"""
+            INSERT OR IGNORE INTO archivo.registros_ventas ({columnas})
+            SELECT {columnas} FROM registros_ventas WHERE fecha < ?
+        """, (antes_de,))
+        # Los triggers descuentan el rollup y los contadores al borrar
+        c.execute("DELETE FROM registros_ventas WHERE fecha < ?", (antes_de,))
+        movidos = c.rowcount
+        conn.commit()
+    except Exception:
+        # Revertir antes de cerrar: nada se copia sin borrarse ni se borra sin copiarse
+        conn.rollback()
+        raise
+    finally:
+        # El ATTACH desaparece con la conexión; un DETACH con la transacción abierta fallaría
+        conn.close()
+    logger.info(f"📦 {movidos} registros anteriores a {antes_de} archivados en {destino}")
+    return movidos
+
+def sembrar_ventas(registros, dias=365, semilla=None, lote=10000):
+    """Genera registros de venta aleatorios para pruebas de rendimiento"""
+    generador = random.Random(semilla)
+    conn = get_connection()
+    c = conn.cursor()
+    empleados = [fila[0] for fila in c.execute("SELECT nombre FROM empleados WHERE activo = 1")]
+    if not empleados:
+        conn.close()
+        return 0
+    
+    hoy = date.today()
+    creados = 0
+    while creados < registros:
+        n = min(lote, registros - creados)
+        c.executemany(f"""
+            INSERT INTO registros_ventas (fecha, empleado, {', '.join(CATEGORIAS)})
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                (hoy - timedelta(days=generador.randrange(dias))).isoformat(),
+                generador.choice(empleados),
+                *(generador.randint(0, 5) for _ in CATEGORIAS)
+            )
+            for _ in range(n)
+        ])
+        creados += n
+    conn.commit()
+    conn.close()
+    logger.info(f"🌱 {creados} registros de prueba generados en {dias} días")
+    return creados
+
+# Consultas representativas de la aplicación para medir su costo
+CONSULTAS_REFERENCIA = {
+    "Total por empleado (rollup)": (
+        "SELECT empleado, SUM(registros) FROM ventas_diarias WHERE fecha BETWEEN ? AND ? GROUP BY empleado",
+        "rango"
+    ),
+    "Tendencia diaria (rollup)": (
+        "SELECT fecha, SUM(registros) FROM ventas_diarias WHERE fecha BETWEEN ? AND ? GROUP BY fecha",
+        "rango"
+    ),
+    "Detalle paginado": (
+        "SELECT * FROM registros_ventas WHERE fecha BETWEEN ? AND ? ORDER BY fecha DESC, id DESC LIMIT 50",
+        "rango"
+    ),
+    "Conteo completo": ("SELECT COUNT(*) FROM registros_ventas", None),
+    "Contadores": ("SELECT grupo, clave, valor FROM estadisticas", None),
+}
+
+def medir_consultas(dias=30, repeticiones=5):
+    """Mide la latencia media y el plan de las consultas de referencia"""
+    fin = date.today()
+    rango = ((fin - timedelta(days=dias)).isoformat(), fin.isoformat())
+    conn = get_connection()
+    resultados = []
+    for nombre, (sql, parametros) in CONSULTAS_REFERENCIA.items():
+        parametros = rango if parametros == "rango" else ()
+        plan = " | ".join(fila[-1] for fila in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros))
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            filas = conn.execute(sql, parametros).fetchall()
+        ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+        resultados.append({"consulta": nombre, "ms": round(ms, 2), "filas": len(filas), "plan": plan})
+    conn.close()
+    return resultados
@@ -0,0 +1,63 @@
+"""Fixtures comunes: cada prueba trabaja sobre una base SQLite temporal."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import repositorio  # noqa: E402
+
+@pytest.fixture
+def base(tmp_path):
+    """Backend apuntando a una base nueva con el esquema completo"""
+    anterior = repositorio.obtener_backend()
+    repositorio.usar_backend(repositorio.BackendSQLite(
+        str(tmp_path / "ventas.db"), str(tmp_path / "config.json")
+    ))
+    repositorio.init_database()
+    repositorio.create_tables()
+    yield repositorio.obtener_backend()
+    repositorio.usar_backend(anterior)
+
+@pytest.fixture
+def empleados(base):
+    """Dos empleados en el mismo departamento y uno en otro"""
+    repositorio.guardar_empleado_db("Ana Pérez", "Droguería")
+    repositorio.guardar_empleado_db("Luis Gómez", "Droguería")
+    repositorio.guardar_empleado_db("Marta Ruiz", "Cajas")
+    return ["Ana Pérez", "Luis Gómez", "Marta Ruiz"]
+
+@pytest.fixture
+def ventas(empleados):
+    """Ventas aleatorias reproducibles de los últimos 90 días"""
+    repositorio.sembrar_ventas(600, dias=90, semilla=7)
+    return empleados
+
+def alterar_ventas(conn):
+    """Modificaciones mixtas sobre registros_ventas: cambios de fecha, empleado y categorías, NULL y borrados"""
+    conn.execute("UPDATE registros_ventas SET oferta = oferta + 3 WHERE id % 7 = 0")
+    conn.execute("UPDATE registros_ventas SET fecha = date(fecha, '-40 days') WHERE id % 11 = 0")
+    conn.execute("UPDATE registros_ventas SET empleado = 'Marta Ruiz' WHERE id % 13 = 0")
+    conn.execute("UPDATE registros_ventas SET marca_propia = NULL WHERE id % 17 = 0")
+    conn.execute("DELETE FROM registros_ventas WHERE id % 5 = 0")
+    conn.commit()
+
+@pytest.fixture(scope="session")
+def _modulo_app(tmp_path_factory):
+    """Importa Ventas.py una sola vez, fuera del runtime de Streamlit y con su app.log en una carpeta temporal"""
+    anterior = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        import Ventas
+    finally:
+        os.chdir(anterior)
+    return Ventas
+
+@pytest.fixture
+def app(_modulo_app, base, monkeypatch):
+    """Módulo Ventas sobre la base temporal, sin los callbacks de Streamlit"""
+    for evento in ("error", "cambio"):
+        monkeypatch.delitem(repositorio._CALLBACKS[evento], "streamlit", raising=False)
+    return _modulo_app
@@ -0,0 +1,91 @@
+import json
+import sqlite3
+
+import pytest
+
+import admin_ventas
+import repositorio
+
+TOTALES = "SELECT fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional FROM registros_ventas ORDER BY id"
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    """La CLI trabaja en una carpeta temporal y deja el backend como estaba"""
+    monkeypatch.chdir(tmp_path)
+    anterior = repositorio.obtener_backend()
+    yield tmp_path
+    repositorio.usar_backend(anterior)
+
+def _filas(ruta):
+    repositorio.usar_backend(repositorio.BackendSQLite(str(ruta)))
+    conn = repositorio.get_connection()
+    filas = conn.execute(TOTALES).fetchall()
+    conn.close()
+    return filas
+
+@pytest.mark.parametrize("archivo", ["ventas.csv", "ventas.json"])
+def test_exportar_e_importar_conserva_los_registros(carpeta, archivo):
+    assert admin_ventas.main(["--db", "origen.db", "sembrar", "300", "--dias", "60", "--semilla", "3"]) == 0
+    assert admin_ventas.main(["--db", "origen.db", "exportar", archivo]) == 0
+    assert admin_ventas.main(["--db", "destino.db", "importar", archivo]) == 0
+    
+    origen = _filas(carpeta / "origen.db")
+    assert len(origen) == 300
+    assert _filas(carpeta / "destino.db") == origen
+
+def test_importar_rechaza_filas_invalidas(carpeta, capsys):
+    (carpeta / "ventas.json").write_text(json.dumps([
+        {"fecha": "2024-03-13", "empleado": "Ana Pérez", "oferta": 2},
+        {"fecha": "2024-03-13", "empleado": "Nadie", "oferta": 1},
+        {"fecha": "13/03/2024", "empleado": "Ana Pérez"},
+        {"fecha": "2024-03-13", "empleado": "Ana Pérez", "oferta": -1},
+    ]), encoding="utf-8")
+    admin_ventas.main(["--db", "ventas.db", "sembrar", "0"])
+    repositorio.guardar_empleado_db("Ana Pérez", "Droguería")
+    
+    assert admin_ventas.main(["--db", "ventas.db", "importar", "ventas.json"]) == 2
+    assert "1 registros importados, 3 rechazados" in capsys.readouterr().out
+    assert len(_filas(carpeta / "ventas.db")) == 1
+
+def test_reconstruir_no_encuentra_diferencias_en_una_base_consistente(carpeta, capsys):
+    admin_ventas.main(["--db", "ventas.db", "sembrar", "200", "--semilla", "1"])
+    capsys.readouterr()
+    assert admin_ventas.main(["--db", "ventas.db", "reconstruir"]) == 0
+    assert "0 contadores corregidos" in capsys.readouterr().out
+
+def test_purgar_cambios_desde_la_cli(carpeta, capsys):
+    admin_ventas.main(["--db", "ventas.db", "sembrar", "20", "--semilla", "1"])
+    conn = repositorio.get_connection()
+    conn.execute("UPDATE change_log SET ts = datetime('now', '-10 days')")
+    total = conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+    conn.commit()
+    conn.close()
+    capsys.readouterr()
+    
+    assert admin_ventas.main(["--db", "ventas.db", "purgar-cambios", "--dias", "7"]) == 0
+    assert f"{total} cambios purgados" in capsys.readouterr().out
+    assert repositorio.leer_cambios(0) == []
+
+def test_archivar_revierte_y_conserva_el_error_original(carpeta):
+    admin_ventas.main(["--db", "ventas.db", "sembrar", "50", "--dias", "30", "--semilla", "2"])
+    conn = repositorio.get_connection()
+    conn.execute("""
+        CREATE TRIGGER prueba_bloquear_bajas BEFORE DELETE ON registros_ventas
+        BEGIN SELECT RAISE(ABORT, 'bajas bloqueadas'); END
+    """)
+    conn.commit()
+    conn.close()
+    
+    with pytest.raises(sqlite3.IntegrityError, match="bajas bloqueadas"):
+        repositorio.archivar_ventas("2999-01-01", str(carpeta / "archivo.db"))
+    assert len(_filas(carpeta / "ventas.db")) == 50
+    archivo = sqlite3.connect(carpeta / "archivo.db")
+    assert archivo.execute("SELECT COUNT(*) FROM registros_ventas").fetchone()[0] == 0
+    archivo.close()
+
+def test_archivar_mueve_los_registros_antiguos(carpeta, capsys):
+    admin_ventas.main(["--db", "ventas.db", "sembrar", "50", "--dias", "30", "--semilla", "2"])
+    assert admin_ventas.main(["--db", "ventas.db", "archivar", "--antes", "2999-01-01"]) == 0
+    assert "50 registros archivados" in capsys.readouterr().out
+    assert _filas(carpeta / "ventas.db") == []
+    assert len(_filas(carpeta / "ventas_archivo.db")) == 50
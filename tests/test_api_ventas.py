@@ -0,0 +1,79 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import api_ventas
+import repositorio
+
+@pytest.fixture
+def servidor(empleados):
+    """API real en un puerto libre, con un supervisor y su token"""
+    repositorio.crear_usuario_db("sup", "clave-segura-1", "Supervisor")
+    servidor = api_ventas.crear_servidor("127.0.0.1", 0)
+    servidor.token = repositorio.crear_sesion_persistente("sup")
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+def _post(servidor, ruta, cuerpo=None, cabeceras=None):
+    conexion = http.client.HTTPConnection(*servidor.server_address, timeout=10)
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+    todas = {"Authorization": f"Bearer {servidor.token}", "Content-Length": str(len(datos))}
+    todas.update(cabeceras or {})
+    conexion.putrequest("POST", ruta)
+    for nombre, valor in todas.items():
+        conexion.putheader(nombre, valor)
+    conexion.endheaders(datos)
+    respuesta = conexion.getresponse()
+    estado, cuerpo = respuesta.status, json.loads(respuesta.read() or b"{}")
+    conexion.close()
+    return estado, cuerpo
+
+VENTA = {"fecha": "2024-03-13", "empleado": "Ana Pérez", "oferta": 2}
+
+def test_escritor_sobrevive_a_errores_que_no_son_de_sqlite(servidor, monkeypatch):
+    original = api_ventas.EscritorVentas._escribir
+    fallos = []
+
+    def escribir_con_fallo(self, conn, pedidos):
+        if not fallos:
+            fallos.append(True)
+            raise RuntimeError("fallo inesperado")
+        return original(self, conn, pedidos)
+
+    monkeypatch.setattr(api_ventas.EscritorVentas, "_escribir", escribir_con_fallo)
+    estado, _ = _post(servidor, "/api/ventas", VENTA)
+    assert estado == 500
+
+    estado, cuerpo = _post(servidor, "/api/ventas", VENTA)
+    assert estado == 200
+    assert cuerpo["aceptadas"] == 1
+
+@pytest.mark.parametrize("largo", ["abc", "-5", "9999999999"])
+def test_content_length_invalido_devuelve_400(servidor, largo):
+    estado, _ = _post(servidor, "/api/ventas", cabeceras={"Content-Length": largo})
+    assert estado == 400
+
+def test_clave_de_idempotencia_evita_duplicados(servidor):
+    venta = dict(VENTA, clave="pos-1")
+    assert _post(servidor, "/api/ventas", venta)[1]["aceptadas"] == 1
+    assert _post(servidor, "/api/ventas", venta)[1]["duplicadas"] == 1
+    conn = repositorio.get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM registros_ventas").fetchone()[0] == 1
+    conn.close()
+
+def test_token_no_ascii_devuelve_401(servidor):
+    estado, _ = _post(servidor, "/api/ventas", VENTA, {"Authorization": "Bearer abc.123.fïrma"})
+    assert estado == 401
+
+@pytest.mark.parametrize("empleado", [["Ana Pérez"], {"nombre": "Ana Pérez"}, 7])
+def test_empleado_que_no_es_texto_se_rechaza_por_fila(servidor, empleado):
+    estado, cuerpo = _post(servidor, "/api/ventas", [{**VENTA, "empleado": empleado}, {**VENTA, "oferta": [1]}])
+    assert estado == 400
+    assert [r["error"] for r in cuerpo["resultados"]] == [
+        "Empleado inválido", "'oferta' debe ser un entero no negativo"
+    ]
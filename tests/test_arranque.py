@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+def _ejecutar(codigo, carpeta):
+    """Corre código en un intérprete nuevo (sys.modules limpio) y devuelve su última línea como JSON"""
+    resultado = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(codigo)],
+        cwd=carpeta, capture_output=True, text=True, timeout=180,
+        env={**os.environ, "VENTAS_DB": str(carpeta / "ventas.db")}
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+def test_pagina_de_login_no_importa_pandas_ni_plotly(tmp_path):
+    datos = _ejecutar(f"""
+        import json, sys
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_file({str(RAIZ / "Ventas.py")!r}, default_timeout=120)
+        at.run()
+        print(json.dumps({{
+            "excepciones": [e.value for e in at.exception],
+            "botones": [b.label for b in at.button],
+            # plotly.graph_objects no se comprueba: Streamlit lo importa para su tema
+            "cargados": [m for m in ("pandas", "plotly.express") if m in sys.modules]
+        }}))
+    """, tmp_path)
+    assert datos == {"excepciones": [], "botones": ["Iniciar Sesión"], "cargados": []}
+
+def test_modulo_diferido_importa_en_el_primer_uso_y_mide(tmp_path):
+    datos = _ejecutar(f"""
+        import json, sys
+        sys.path.insert(0, {str(RAIZ)!r})
+        import Ventas
+        antes = "plotly.express" in sys.modules
+        Ventas.px.bar
+        print(json.dumps({{
+            "antes": antes,
+            "despues": "plotly.express" in sys.modules,
+            "medidos": list(Ventas.obtener_metricas_arranque().importaciones)
+        }}))
+    """, tmp_path)
+    assert datos == {"antes": False, "despues": True, "medidos": ["plotly.express"]}
@@ -0,0 +1,68 @@
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+import repositorio
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+@pytest.fixture
+def memoria():
+    """Backend en memoria con el esquema completo"""
+    anterior = repositorio.obtener_backend()
+    backend = repositorio.BackendMemoria()
+    repositorio.usar_backend(backend)
+    repositorio.init_database()
+    repositorio.create_tables()
+    yield backend
+    repositorio.usar_backend(anterior)
+
+def _ventas():
+    conn = repositorio.get_connection()
+    n = conn.execute("SELECT COUNT(*) FROM registros_ventas").fetchone()[0]
+    conn.close()
+    return n
+
+def test_repositorio_no_importa_streamlit():
+    resultado = subprocess.run(
+        [sys.executable, "-c", "import sys, repositorio, reportes, api_ventas, admin_ventas; "
+                               "print('streamlit' in sys.modules)"],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    assert resultado.stdout.strip() == "False"
+
+def test_backend_memoria_no_toca_el_disco(memoria, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    repositorio.guardar_empleado_db("Ana Pérez", "Droguería")
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 1, 2, 3, 4)
+    assert repositorio.guardar_config({**repositorio.cargar_config(), "tema": "Oscuro"})
+    assert repositorio.obtener_config()["tema"] == "Oscuro"
+    assert _ventas() == 1
+    assert list(tmp_path.iterdir()) == []
+
+def test_bases_en_memoria_independientes(memoria):
+    repositorio.guardar_empleado_db("Ana Pérez", "Droguería")
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 1, 0, 0, 0)
+    
+    repositorio.usar_backend(repositorio.BackendMemoria())
+    repositorio.create_tables()
+    assert _ventas() == 0
+    repositorio.usar_backend(memoria)
+    assert _ventas() == 1
+
+def test_volcar_y_cargar_entre_backends(memoria, tmp_path):
+    repositorio.sembrar_ventas(50, dias=10, semilla=1)
+    datos = memoria.volcar()
+    
+    archivo = repositorio.BackendSQLite(str(tmp_path / "copia.db"), str(tmp_path / "config.json"))
+    archivo.cargar(datos)
+    repositorio.usar_backend(archivo)
+    assert _ventas() == 50
+    
+    otra = repositorio.BackendMemoria()
+    otra.cargar(archivo.volcar())
+    repositorio.usar_backend(otra)
+    assert _ventas() == 50
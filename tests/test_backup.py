@@ -0,0 +1,50 @@
+import gzip
+import io
+import os
+import zlib
+
+import repositorio
+
+def _miembros(datos):
+    """Cuenta los miembros gzip concatenados"""
+    n = 0
+    while datos:
+        descompresor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        descompresor.decompress(datos)
+        datos = descompresor.unused_data
+        n += 1
+    return n
+
+def test_comprimir_paralelo_es_gzip_multimiembro():
+    datos = os.urandom(1000) * 300
+    comprimido, hilos, bloques = repositorio.comprimir_paralelo(datos, nivel=1, bloque=64 * 1024, hilos=4)
+    assert (hilos, bloques) == (4, 5)
+    assert _miembros(comprimido) == 5
+    assert gzip.decompress(comprimido) == datos
+
+def test_resultado_no_depende_de_los_hilos():
+    datos = b"ventas " * 100000
+    secuencial, _, _ = repositorio.comprimir_paralelo(datos, bloque=100000, hilos=1)
+    paralelo, _, _ = repositorio.comprimir_paralelo(datos, bloque=100000, hilos=3)
+    assert secuencial == paralelo
+
+def test_datos_vacios():
+    comprimido, hilos, bloques = repositorio.comprimir_paralelo(b"")
+    assert (hilos, bloques) == (1, 1)
+    assert gzip.decompress(comprimido) == b""
+
+def test_backup_y_restauracion(ventas):
+    contenido, nombre, metricas = repositorio.crear_backup(nivel=1)
+    assert nombre.endswith(".db.gz")
+    assert metricas["comprimido"] == len(contenido)
+    
+    conn = repositorio.get_connection()
+    esperadas = conn.execute("SELECT * FROM registros_ventas ORDER BY id").fetchall()
+    conn.execute("DELETE FROM registros_ventas")
+    conn.commit()
+    conn.close()
+    
+    repositorio.restaurar_backup(io.BytesIO(contenido), comprimido=True)
+    conn = repositorio.get_connection()
+    assert conn.execute("SELECT * FROM registros_ventas ORDER BY id").fetchall() == esperadas
+    conn.close()
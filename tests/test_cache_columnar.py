@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+
+import repositorio
+from conftest import alterar_ventas
+
+DESDE = date.today() - timedelta(days=45)
+HASTA = date.today()
+
+def _totales_sql(empleado=None):
+    filtro = "AND empleado = ?" if empleado else ""
+    conn = repositorio.get_connection()
+    fila = conn.execute(f"""
+        SELECT {', '.join(f'COALESCE(SUM({cat}), 0)' for cat in repositorio.CATEGORIAS)}
+        FROM registros_ventas WHERE fecha BETWEEN ? AND ? {filtro}
+    """, (DESDE.isoformat(), HASTA.isoformat(), *((empleado,) if empleado else ()))).fetchone()
+    conn.close()
+    return dict(zip(repositorio.CATEGORIAS, fila))
+
+def test_filtros_coinciden_con_sql(app, ventas):
+    cache = app.CacheVentasColumnar(lote=64)
+    assert cache.actualizar() == 600
+    assert cache.consultar(DESDE, HASTA).totales() == _totales_sql()
+    assert cache.consultar(DESDE, HASTA, "Ana Pérez").totales() == _totales_sql("Ana Pérez")
+    assert len(cache.consultar(DESDE, HASTA, "Nadie")) == 0
+    
+    por_empleado = cache.consultar(DESDE, HASTA).por_empleado().set_index("empleado")
+    assert int(por_empleado.loc["Luis Gómez", "oferta"]) == _totales_sql("Luis Gómez")["oferta"]
+
+def test_inserciones_se_agregan_sin_recargar(app, ventas):
+    cache = app.CacheVentasColumnar()
+    cache.actualizar()
+    version = cache.version
+    repositorio.guardar_venta(HASTA, "Ana Pérez", 1, 1, 1, 1)
+    assert cache.actualizar() == 1
+    assert cache.version[0] == version[0] and cache.version != version
+    assert cache.actualizar() == 0
+    assert cache.consultar(DESDE, HASTA).totales() == _totales_sql()
+
+def test_modificaciones_y_bajas_recargan(app, ventas):
+    cache = app.CacheVentasColumnar()
+    cache.actualizar()
+    generacion = cache.generacion
+    conn = repositorio.get_connection()
+    alterar_ventas(conn)
+    conn.close()
+    cache.actualizar()
+    assert cache.generacion > generacion
+    assert cache.consultar(DESDE, HASTA).totales() == _totales_sql()
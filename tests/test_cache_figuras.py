@@ -0,0 +1,32 @@
+from datetime import date
+
+import repositorio
+
+def test_lru_por_entradas(app):
+    cache = app.CacheFiguras(max_entradas=2)
+    cache.guardar("a", "{}")
+    cache.guardar("b", "{}")
+    assert cache.obtener("a") == "{}"
+    cache.guardar("c", "{}")
+    assert cache.obtener("b") is None
+    assert cache.obtener("a") == cache.obtener("c") == "{}"
+    assert cache.estadisticas() == {"entradas": 2, "bytes": 4, "aciertos": 3, "fallos": 1}
+
+def test_tope_de_memoria(app):
+    cache = app.CacheFiguras(max_bytes=10)
+    cache.guardar("grande", "x" * 11)
+    assert cache.obtener("grande") is None
+    cache.guardar("a", "x" * 6)
+    cache.guardar("a", "x" * 4)
+    cache.guardar("b", "x" * 6)
+    assert cache.estadisticas()["bytes"] == 10
+    cache.guardar("c", "x" * 5)
+    assert cache.obtener("a") is None and cache.obtener("b") is None
+    assert cache.estadisticas()["bytes"] == 5
+
+def test_version_del_dashboard_incluye_ventas_recien_guardadas(app, empleados):
+    app.obtener_cache_ventas().reiniciar()
+    antes = app.version_datos_dashboard()
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 1, 0, 0, 0)
+    # Sin actualizar el caché a mano: la versión ya debe distinguir los datos nuevos
+    assert app.version_datos_dashboard() != antes
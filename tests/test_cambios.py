@@ -0,0 +1,62 @@
+from datetime import date
+
+import repositorio
+
+def test_cambios_en_orden_y_filtrados_por_tabla(empleados):
+    desde = repositorio.ultima_secuencia_cambios()
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 1, 0, 0, 0)
+    repositorio.eliminar_empleado_db("Marta Ruiz")
+    conn = repositorio.get_connection()
+    conn.execute("DELETE FROM registros_ventas")
+    conn.commit()
+    conn.close()
+    
+    cambios = repositorio.leer_cambios(desde)
+    assert [(tabla, op) for _, tabla, op, _, _ in cambios] == [
+        ("registros_ventas", "I"), ("empleados", "U"), ("registros_ventas", "D")
+    ]
+    assert [c[0] for c in cambios] == sorted(c[0] for c in cambios)
+    assert [op for _, _, op, _, _ in repositorio.leer_cambios(desde, tablas=["empleados"])] == ["U"]
+
+def test_iterar_cambios_recorre_todo_en_lotes(empleados):
+    desde = repositorio.ultima_secuencia_cambios()
+    for dia in range(1, 8):
+        repositorio.guardar_venta(date(2024, 3, dia), "Luis Gómez", 1, 1, 1, 1)
+    lotes = list(repositorio.iterar_cambios(desde, lote=3))
+    assert [len(l) for l in lotes] == [3, 3, 1]
+
+def test_ultimo_acceso_no_genera_cambios(empleados):
+    repositorio.crear_usuario_db("caja1", "secreto-largo", "empleado")
+    desde = repositorio.ultima_secuencia_cambios()
+    conn = repositorio.get_connection()
+    conn.execute("UPDATE usuarios SET ultimo_acceso = CURRENT_TIMESTAMP WHERE username = 'caja1'")
+    conn.commit()
+    conn.close()
+    assert repositorio.leer_cambios(desde) == []
+
+def test_purga_invalida_cursores_anteriores(empleados):
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 1, 0, 0, 0)
+    conn = repositorio.get_connection()
+    conn.execute("UPDATE change_log SET ts = datetime('now', '-60 days')")
+    conn.commit()
+    conn.close()
+    purgado_hasta = repositorio.ultima_secuencia_cambios()
+    
+    assert repositorio.purgar_cambios(30) == purgado_hasta
+    assert repositorio.leer_cambios(0) == []
+    assert not repositorio.cursor_cambios_vigente(0)
+    assert repositorio.cursor_cambios_vigente(purgado_hasta)
+    assert repositorio.purgar_cambios(30) == 0
+
+def test_resumen_solo_cubre_la_ventana_pedida(empleados):
+    desde = repositorio.ultima_secuencia_cambios()
+    for dia in range(1, 6):
+        repositorio.guardar_venta(date(2024, 3, dia), "Luis Gómez", 1, 0, 0, 0)
+    repositorio.eliminar_empleado_db("Marta Ruiz")
+    
+    resumen = repositorio.resumir_cambios(3)
+    assert [(f["tabla"], f["op"], f["cambios"]) for f in resumen] == [
+        ("empleados", "U", 1), ("registros_ventas", "I", 2)
+    ]
+    assert min(f["desde"] for f in resumen) == desde + 4
+    assert sum(f["cambios"] for f in repositorio.resumir_cambios()) == desde + 6
@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+import repositorio
+from conftest import alterar_ventas
+
+def _sumas(inicio, fin):
+    conn = repositorio.get_connection()
+    filas = conn.execute(f"""
+        SELECT empleado, {', '.join(f'SUM(COALESCE({cat}, 0))' for cat in repositorio.CATEGORIAS)}
+        FROM registros_ventas WHERE fecha BETWEEN ? AND ? GROUP BY empleado
+    """, (inicio.isoformat(), fin.isoformat())).fetchall()
+    conn.close()
+    return {empleado: valores for empleado, *valores in filas}
+
+def test_periodos_comparacion():
+    miercoles = date(2024, 3, 13)
+    assert repositorio.periodos_comparacion("diario", miercoles)[1][0] == date(2024, 3, 12)
+    actual, anterior = repositorio.periodos_comparacion("semanal", miercoles)
+    assert (actual[0], anterior[0], anterior[1]) == (date(2024, 3, 11), date(2024, 3, 4), date(2024, 3, 10))
+    _, anio = repositorio.periodos_comparacion("diario", miercoles, "anio_anterior")
+    assert anio[0].weekday() == miercoles.weekday() and anio[0].year == 2023
+    _, anio = repositorio.periodos_comparacion("mensual", date(2024, 2, 29), "anio_anterior")
+    assert anio[:2] == (date(2023, 2, 1), date(2023, 2, 28))
+    with pytest.raises(ValueError):
+        repositorio.periodos_comparacion("mensual", miercoles, "otra")
+
+def test_comparacion_coincide_con_las_ventas(ventas):
+    conn = repositorio.get_connection()
+    alterar_ventas(conn)
+    conn.close()
+    hoy = date.today()
+    (inicio_a, fin_a, _), (inicio_b, fin_b, _) = repositorio.periodos_comparacion("mensual", hoy - timedelta(days=20))
+    a, b = _sumas(inicio_a, fin_a), _sumas(inicio_b, fin_b)
+    
+    resultado = repositorio.comparar_periodos(inicio_a, fin_a, inicio_b, fin_b)
+    for fila in resultado["por_empleado"]:
+        assert fila["a"] == sum(a.get(fila["empleado"], [0]))
+        assert fila["b"] == sum(b.get(fila["empleado"], [0]))
+        assert fila["delta"] == fila["a"] - fila["b"]
+    assert {f["empleado"] for f in resultado["por_empleado"]} == set(a) | set(b)
+    
+    total, *categorias = resultado["por_categoria"]
+    assert total["a"] == sum(map(sum, a.values()))
+    for indice, fila in enumerate(categorias):
+        assert fila["b"] == sum(valores[indice] for valores in b.values())
+    assert sum(f["a"] for f in resultado["por_departamento"]) == total["a"]
+
+def test_variacion_sin_base_y_filtro_por_empleado(empleados):
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 2, 0, 0, 0)
+    repositorio.guardar_venta(date(2024, 3, 12), "Luis Gómez", 1, 0, 0, 0)
+    dia = date(2024, 3, 13)
+    resultado = repositorio.comparar_periodos(dia, dia, dia - timedelta(days=1), dia - timedelta(days=1), "Ana Pérez")
+    assert resultado["por_empleado"] == [
+        {"empleado": "Ana Pérez", "departamento": "Droguería", "a": 2, "b": 0, "delta": 2, "pct": None}
+    ]
+
+def test_errores_de_la_comparacion_no_quedan_en_cache(app, empleados, monkeypatch):
+    app.st.cache_data.clear()
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 2, 0, 0, 0)
+    original = repositorio.comparar_periodos.__wrapped__
+    
+    def fallar(*args):
+        raise sqlite3.OperationalError("database is locked")
+    
+    monkeypatch.setattr(repositorio.comparar_periodos, "__wrapped__", fallar)
+    assert app.comparar_periodo_estandar("diario", date(2024, 3, 13), "anterior") is None
+    monkeypatch.setattr(repositorio.comparar_periodos, "__wrapped__", original)
+    _, _, comparacion = app.comparar_periodo_estandar("diario", date(2024, 3, 13), "anterior")
+    assert comparacion["por_categoria"][0]["a"] == 2
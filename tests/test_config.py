@@ -0,0 +1,31 @@
+import json
+import os
+
+import pytest
+
+import repositorio
+
+def test_config_congelada_no_se_puede_modificar(base):
+    config = repositorio.obtener_config()
+    with pytest.raises(TypeError):
+        config["tema"] = "Oscuro"
+    assert isinstance(config["productos_adicionales"], tuple)
+    assert repositorio.obtener_config() is config
+
+def test_guardar_config_recarga_la_instancia_compartida(base):
+    config = repositorio.descongelar_config(repositorio.obtener_config())
+    config["productos_adicionales"].append("Producto 5")
+    assert repositorio.guardar_config(config)
+    assert repositorio.obtener_config()["productos_adicionales"][-1] == "Producto 5"
+
+def test_cambio_externo_del_archivo_se_detecta(base):
+    anterior = repositorio.obtener_config()
+    with open(base.archivo_config, "w", encoding="utf-8") as f:
+        json.dump({**repositorio.descongelar_config(anterior), "tema": "Oscuro"}, f)
+    info = os.stat(base.archivo_config)
+    os.utime(base.archivo_config, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+    assert repositorio.obtener_config()["tema"] == "Oscuro"
+
+def test_guardar_config_no_deja_temporales(base, tmp_path):
+    assert repositorio.guardar_config(repositorio.obtener_config())
+    assert not list(tmp_path.glob(".config_*"))
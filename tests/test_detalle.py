@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+import pytest
+
+INICIO = (date.today() - timedelta(days=100)).isoformat()
+FIN = date.today().isoformat()
+
+def _recorrer(app, orden, empleado=None, tamano=37):
+    ids, cursor = [], None
+    while True:
+        df, cursor = app.obtener_pagina_ventas(INICIO, FIN, empleado, orden, cursor, tamano)
+        assert len(df) <= tamano
+        ids.extend(df["id"].tolist())
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize("orden", ["Fecha (recientes primero)", "Fecha (antiguas primero)", "Empleado"])
+def test_paginas_recorren_todo_sin_repetir(app, ventas, orden):
+    ids = _recorrer(app, orden)
+    assert len(ids) == len(set(ids)) == app.contar_ventas(INICIO, FIN) == 600
+
+def test_orden_de_las_paginas(app, ventas):
+    completas = []
+    cursor = None
+    while True:
+        df, cursor = app.obtener_pagina_ventas(INICIO, FIN, None, "Empleado", cursor, 50)
+        completas.extend(df[["empleado", "fecha", "id"]].itertuples(index=False, name=None))
+        if cursor is None:
+            break
+    assert completas == sorted(completas)
+
+def test_filtro_por_empleado(app, ventas):
+    ids = _recorrer(app, "Fecha (recientes primero)", "Ana Pérez")
+    assert len(ids) == app.contar_ventas(INICIO, FIN, "Ana Pérez") > 0
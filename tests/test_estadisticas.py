@@ -0,0 +1,25 @@
+import repositorio
+from conftest import alterar_ventas
+
+def test_contadores_coinciden_con_recalculo_tras_cambios(ventas):
+    repositorio.eliminar_empleado_db("Luis Gómez")
+    repositorio.guardar_empleado_db("Luis Gómez", "Cajas")
+    repositorio.eliminar_empleado_db("Marta Ruiz")
+    repositorio.crear_usuario_db("caja1", "secreto-largo", "empleado")
+    conn = repositorio.get_connection()
+    alterar_ventas(conn)
+    assert repositorio.reconciliar_estadisticas(conn, corregir=False) == []
+    conn.close()
+    assert repositorio.reconstruir_derivados() == []
+
+def test_obtener_estadisticas_refleja_los_contadores(ventas):
+    conn = repositorio.get_connection()
+    total = conn.execute("SELECT COUNT(*) FROM registros_ventas").fetchone()[0]
+    por_departamento = dict(conn.execute(
+        "SELECT departamento, COUNT(*) FROM empleados WHERE activo = 1 GROUP BY departamento"
+    ).fetchall())
+    conn.close()
+    estadisticas = repositorio.obtener_estadisticas()
+    assert estadisticas["total"]["registros_ventas"] == total
+    assert sum(estadisticas["mes"].values()) == total
+    assert estadisticas["departamento"] == por_departamento
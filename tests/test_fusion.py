@@ -0,0 +1,99 @@
+import io
+import sqlite3
+from datetime import date
+
+import pytest
+
+import repositorio
+
+@pytest.fixture
+def backup_sucursal(tmp_path):
+    """Backup comprimido de otra tienda con variantes de nombre y un empleado nuevo"""
+    anterior = repositorio.obtener_backend()
+    repositorio.usar_backend(repositorio.BackendSQLite(
+        str(tmp_path / "sucursal.db"), str(tmp_path / "sucursal.json")
+    ))
+    repositorio.init_database()
+    repositorio.create_tables()
+    for nombre in ("  ana pérez", "Pedro Sanz", "Temporal"):
+        repositorio.guardar_empleado_db(nombre, "Cajas")
+    for dia in range(1, 6):
+        for nombre in ("  ana pérez", "Pedro Sanz", "Temporal"):
+            repositorio.guardar_venta(date(2024, 3, dia), nombre, dia, 1, 0, 2)
+    contenido, _, _ = repositorio.crear_backup()
+    repositorio.usar_backend(anterior)
+    return contenido
+
+def _fusionar(contenido, **opciones):
+    return repositorio.fusionar_backup(io.BytesIO(contenido), comprimido=True, **opciones)
+
+def _ventas(empleado):
+    conn = repositorio.get_connection()
+    n = conn.execute("SELECT COUNT(*) FROM registros_ventas WHERE empleado = ?", (empleado,)).fetchone()[0]
+    conn.close()
+    return n
+
+def test_fusion_es_idempotente(empleados, backup_sucursal):
+    primera = _fusionar(backup_sucursal, mapa_empleados={"Temporal": None})
+    assert primera["insertadas"] == 10
+    assert primera["sin_empleado"] == 5
+    assert primera["empleados_creados"] == ["Pedro Sanz"]
+    assert primera["mapa_empleados"]["  ana pérez"] == "Ana Pérez"
+    assert _ventas("Ana Pérez") == 5
+    
+    segunda = _fusionar(backup_sucursal, mapa_empleados={"Temporal": None})
+    assert (segunda["insertadas"], segunda["omitidas"], segunda["conflictos"]) == (0, 10, 0)
+    assert segunda["empleados_creados"] == []
+    assert _ventas("Ana Pérez") == 5
+
+def test_fila_editada_localmente_es_conflicto(empleados, backup_sucursal):
+    _fusionar(backup_sucursal, mapa_empleados={"Temporal": None})
+    conn = repositorio.get_connection()
+    conn.execute("UPDATE registros_ventas SET oferta = 9 WHERE empleado = 'Ana Pérez' AND fecha = '2024-03-02'")
+    conn.commit()
+    conn.close()
+    
+    informe = _fusionar(backup_sucursal, mapa_empleados={"Temporal": None})
+    assert (informe["insertadas"], informe["conflictos"]) == (0, 1)
+    assert informe["muestra_conflictos"][0]["fecha"] == "2024-03-02"
+
+def test_simulacion_no_cambia_nada(empleados, backup_sucursal):
+    informe = _fusionar(backup_sucursal, simular=True)
+    assert informe["insertadas"] == 15
+    assert _ventas("Ana Pérez") == 0
+    conn = repositorio.get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM empleados WHERE nombre = 'Pedro Sanz'").fetchone()[0] == 0
+    conn.close()
+
+def test_fusion_mantiene_derivados(empleados, backup_sucursal):
+    _fusionar(backup_sucursal)
+    assert repositorio.reconstruir_derivados() == []
+
+def test_archivo_que_no_es_backup(base, tmp_path):
+    ajeno = tmp_path / "ajeno.db"
+    conn = sqlite3.connect(ajeno)
+    conn.execute("CREATE TABLE otra (x)")
+    conn.close()
+    with pytest.raises(ValueError):
+        repositorio.fusionar_backup(str(ajeno))
+
+def test_filas_con_valores_nulos_no_se_duplican(empleados, tmp_path):
+    origen = tmp_path / "antigua.db"
+    conn = sqlite3.connect(origen)
+    conn.execute("""
+        CREATE TABLE registros_ventas (id INTEGER PRIMARY KEY, fecha DATE, empleado TEXT,
+            autoliquidable INTEGER, oferta INTEGER, marca_propia INTEGER, producto_adicional INTEGER,
+            fecha_registro TIMESTAMP)
+    """)
+    conn.executemany("INSERT INTO registros_ventas VALUES (NULL, ?, 'Ana Pérez', ?, 1, 0, 0, ?)", [
+        ("2024-03-01", 1, None), ("2024-03-01", 1, None), ("2024-03-02", None, None),
+        ("2024-03-03", 2, "2024-03-03 10:00:00"),
+    ])
+    conn.commit()
+    conn.close()
+    
+    assert repositorio.fusionar_backup(str(origen))["insertadas"] == 4
+    segunda = repositorio.fusionar_backup(str(origen))
+    assert (segunda["insertadas"], segunda["omitidas"], segunda["conflictos"]) == (0, 4, 0)
+    assert _ventas("Ana Pérez") == 4
+    assert repositorio.reconstruir_derivados() == []
@@ -0,0 +1,30 @@
+import sys
+
+import repositorio
+
+def test_tamano_aproximado_recorre_contenedores_sin_contar_dos_veces(app):
+    lista = list(range(1000))
+    assert app.tamano_aproximado({"a": lista}) > sys.getsizeof(lista) + 900 * sys.getsizeof(1000)
+    assert app.tamano_aproximado([lista, lista]) < 2 * app.tamano_aproximado(lista)
+    assert app.tamano_aproximado(app.np.zeros(1000)) == 8000
+
+def test_objetos_compartidos_no_se_cuentan_en_la_sesion(app, empleados):
+    app.limpiar_caches()
+    roster = app.cargar_empleados_db()
+    assert app.cargar_empleados_db() is roster
+    assert isinstance(roster, tuple)
+
+    tamanos = app.medir_estado_sesion({"roster": roster, "config": app.obtener_config(), "propio": list(roster)})
+    assert tamanos["roster"] == tamanos["config"] == 0
+    assert tamanos["propio"] > 0
+
+def test_escrituras_renuevan_el_roster_compartido(app, empleados):
+    app.limpiar_caches()
+    assert "Pedro Sanz" not in app.cargar_empleados_db()
+    repositorio.guardar_empleado_db("Pedro Sanz", "Cajas")
+    app.limpiar_caches()
+    assert "Pedro Sanz" in app.cargar_empleados_db()
+
+def test_memoria_del_proceso(app):
+    rss, tipo = app.memoria_proceso_mb()
+    assert rss > 0 and tipo in ("actual", "pico")
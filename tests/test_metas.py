@@ -0,0 +1,65 @@
+from datetime import date
+
+import repositorio
+
+HOY = date(2024, 3, 13)
+
+def _avance(meta_id, hoy=HOY):
+    return next(m["avance"] for m in repositorio.listar_metas(hoy) if m["id"] == meta_id)
+
+def _progreso(conn):
+    return sorted(conn.execute("SELECT meta_id, inicio, avance FROM metas_progreso WHERE avance <> 0").fetchall())
+
+def test_venta_con_categoria_nula_no_aborta(empleados):
+    meta_id = repositorio.guardar_meta("empleado", "Ana Pérez", "total", "mensual", 100)
+    conn = repositorio.get_connection()
+    conn.execute(
+        "INSERT INTO registros_ventas (fecha, empleado, autoliquidable, oferta, marca_propia, producto_adicional) "
+        "VALUES (?, ?, NULL, 3, NULL, 2)",
+        (HOY.isoformat(), "Ana Pérez")
+    )
+    conn.commit()
+    conn.close()
+    assert _avance(meta_id) == 5
+
+def test_avance_incremental_coincide_con_reconstruccion(empleados):
+    por_empleado = repositorio.guardar_meta("empleado", "Ana Pérez", "oferta", "semanal", 10)
+    por_departamento = repositorio.guardar_meta("departamento", "Droguería", "total", "diario", 10)
+    for empleado in empleados:
+        repositorio.guardar_venta(HOY, empleado, 1, 2, 3, 4)
+    assert _avance(por_empleado) == 2
+    assert _avance(por_departamento) == 20
+
+    conn = repositorio.get_connection()
+    conn.execute("UPDATE registros_ventas SET oferta = 7 WHERE empleado = 'Ana Pérez'")
+    conn.execute("DELETE FROM registros_ventas WHERE empleado = 'Luis Gómez'")
+    conn.execute("UPDATE empleados SET departamento = 'Droguería' WHERE nombre = 'Marta Ruiz'")
+    conn.commit()
+    incremental = _progreso(conn)
+    repositorio.reconstruir_metas_progreso(conn)
+    assert _progreso(conn) == incremental
+    conn.close()
+    assert _avance(por_empleado) == 7
+    assert _avance(por_departamento) == 15 + 10
+
+def test_metas_empleado_incluye_las_de_su_departamento(empleados):
+    repositorio.guardar_meta("empleado", "Ana Pérez", "total", "mensual", 100)
+    repositorio.guardar_meta("departamento", "Droguería", "oferta", "semanal", 50)
+    repositorio.guardar_meta("departamento", "Cajas", "oferta", "semanal", 50)
+    metas = repositorio.metas_empleado("Ana Pérez", HOY)
+    assert {(m["alcance"], m["objetivo"]) for m in metas} == {("empleado", "Ana Pérez"), ("departamento", "Droguería")}
+
+def test_fraccion_de_avance_acotada(app, empleados):
+    meta_id = repositorio.guardar_meta("empleado", "Ana Pérez", "total", "diario", 10)
+    repositorio.guardar_venta(HOY, "Ana Pérez", 1, 1, 1, 1)
+    conn = repositorio.get_connection()
+    # Progreso negativo, como puede quedar tras correcciones sobre un periodo ya contado
+    conn.execute("UPDATE metas_progreso SET avance = -3 WHERE meta_id = ?", (meta_id,))
+    conn.commit()
+    conn.close()
+    
+    meta = next(m for m in repositorio.listar_metas(HOY) if m["id"] == meta_id)
+    assert meta["avance"] == -3
+    assert app.fraccion_meta(meta) == 0.0
+    assert app.fraccion_meta({**meta, "avance": 4}) == 0.4
+    assert app.fraccion_meta({**meta, "avance": 25}) == 1.0
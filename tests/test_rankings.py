@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import repositorio
+
+HOY = date(2024, 3, 13)
+SEMANA_ANTERIOR = date(2024, 3, 5)
+
+def _puestos(tipo="semanal", referencia=HOY, metrica="total", campo="puesto"):
+    return {fila["empleado"]: fila[campo] for fila in repositorio.obtener_ranking(tipo, referencia, metrica)}
+
+def _sembrar():
+    repositorio.guardar_venta(HOY, "Ana Pérez", 1, 2, 3, 4)
+    repositorio.guardar_venta(HOY, "Luis Gómez", 4, 3, 2, 1)
+    repositorio.guardar_venta(HOY, "Marta Ruiz", 1, 1, 1, 1)
+    repositorio.guardar_venta(SEMANA_ANTERIOR, "Marta Ruiz", 5, 5, 5, 5)
+    repositorio.guardar_venta(SEMANA_ANTERIOR, "Ana Pérez", 1, 0, 0, 0)
+
+def test_puestos_con_empates_departamento_y_periodo_anterior(empleados):
+    _sembrar()
+    ranking = repositorio.obtener_ranking("semanal", HOY)
+    assert [(f["empleado"], f["valor"], f["puesto"]) for f in ranking] == [
+        ("Ana Pérez", 10, 1), ("Luis Gómez", 10, 1), ("Marta Ruiz", 4, 3)
+    ]
+    assert _puestos(campo="puesto_departamento") == {"Ana Pérez": 1, "Luis Gómez": 1, "Marta Ruiz": 1}
+    assert _puestos(campo="puesto_anterior") == {"Ana Pérez": 2, "Luis Gómez": None, "Marta Ruiz": 1}
+    assert _puestos(metrica="autoliquidable") == {"Luis Gómez": 1, "Ana Pérez": 2, "Marta Ruiz": 2}
+    assert repositorio.obtener_puesto("Marta Ruiz", "semanal", HOY)["participantes"] == 3
+    assert repositorio.obtener_puesto("Nadie", "semanal", HOY) is None
+
+def test_ranking_coincide_con_un_calculo_directo(ventas):
+    referencia = date.today() - timedelta(days=30)
+    conn = repositorio.get_connection()
+    inicio, fin, _ = repositorio.rango_periodo("mensual", referencia)
+    totales = conn.execute("""
+        SELECT empleado, SUM(autoliquidable + oferta + marca_propia + producto_adicional)
+        FROM registros_ventas WHERE fecha BETWEEN ? AND ? GROUP BY empleado
+    """, (inicio.isoformat(), fin.isoformat())).fetchall()
+    conn.close()
+    esperado = {
+        empleado: 1 + sum(otro > valor for _, otro in totales)
+        for empleado, valor in totales
+    }
+    assert _puestos("mensual", referencia) == esperado
+
+def test_ventas_nuevas_invalidan_el_periodo_y_el_siguiente(empleados):
+    _sembrar()
+    assert _puestos()["Marta Ruiz"] == 3
+    repositorio.guardar_venta(date(2024, 3, 14), "Marta Ruiz", 9, 0, 0, 0)
+    assert _puestos()["Marta Ruiz"] == 1
+    
+    repositorio.guardar_venta(SEMANA_ANTERIOR, "Luis Gómez", 30, 0, 0, 0)
+    assert _puestos(campo="puesto_anterior")["Luis Gómez"] == 1
+
+def test_cambio_de_departamento_invalida_los_rankings(empleados):
+    _sembrar()
+    assert _puestos(campo="puesto_departamento")["Luis Gómez"] == 1
+    conn = repositorio.get_connection()
+    conn.execute("UPDATE empleados SET departamento = 'Cajas' WHERE nombre = 'Luis Gómez'")
+    conn.commit()
+    conn.close()
+    assert _puestos(campo="puesto_departamento") == {"Ana Pérez": 1, "Luis Gómez": 1, "Marta Ruiz": 2}
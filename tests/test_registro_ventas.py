@@ -0,0 +1,51 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import repositorio
+
+RUTA_APP = str(Path(__file__).resolve().parent.parent / "Ventas.py")
+
+@pytest.fixture
+def pagina(app, empleados, tmp_path, monkeypatch):
+    """Página Registro Ventas de una vendedora ya autenticada"""
+    monkeypatch.chdir(tmp_path)
+    app.st.cache_data.clear()
+    conn = repositorio.get_connection()
+    empleado_id = conn.execute("SELECT id FROM empleados WHERE nombre = 'Ana Pérez'").fetchone()[0]
+    conn.close()
+    
+    at = AppTest.from_file(RUTA_APP, default_timeout=120)
+    for clave, valor in dict(autenticado=True, usuario_actual="ana", usuario_rol="Vendedor",
+                             usuario_empleado_id=empleado_id, pagina_actual="Registro Ventas").items():
+        at.session_state[clave] = valor
+    at.run()
+    assert not at.exception
+    return at
+
+def _ventas_de_hoy():
+    conn = repositorio.get_connection()
+    fila = conn.execute(
+        "SELECT autoliquidable, oferta, marca_propia, producto_adicional FROM ventas_diarias "
+        "WHERE fecha = ? AND empleado = 'Ana Pérez'", (date.today().isoformat(),)
+    ).fetchone()
+    conn.close()
+    return fila
+
+def test_guardar_registra_la_venta_y_limpia_el_formulario(pagina):
+    pagina.number_input(key="registro_auto").set_value(3)
+    pagina.number_input(key="registro_oferta").set_value(2)
+    next(b for b in pagina.button if b.label == "💾 Guardar Registro").click().run()
+    
+    assert not pagina.exception
+    assert [s.value for s in pagina.success] == ["¡Ventas registradas exitosamente!"]
+    assert _ventas_de_hoy() == (3, 2, 0, 0)
+    assert pagina.number_input(key="registro_auto").value == 0
+    assert any("Total Día: 5</h3>" in m.value for m in pagina.markdown)
+
+def test_guardar_sin_conteos_no_escribe(pagina):
+    next(b for b in pagina.button if b.label == "💾 Guardar Registro").click().run()
+    assert [w.value for w in pagina.warning] == ["Debes registrar al menos una venta"]
+    assert _ventas_de_hoy() is None
@@ -0,0 +1,73 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from datetime import date
+
+import pytest
+from openpyxl import load_workbook
+
+import reportes
+import repositorio
+
+REFERENCIA = date(2024, 3, 13)
+
+@pytest.fixture
+def carpeta(empleados, tmp_path, monkeypatch):
+    """Carpeta de reportes temporal con algunas ventas en el periodo"""
+    monkeypatch.setattr(reportes, "CARPETA_REPORTES", str(tmp_path / "reportes"))
+    for empleado in empleados:
+        repositorio.guardar_venta(REFERENCIA, empleado, 1, 2, 3, 4)
+    return tmp_path / "reportes"
+
+def _generar_en_otro_proceso(ruta_db, archivo_config, carpeta):
+    repositorio.usar_backend(repositorio.BackendSQLite(ruta_db, archivo_config))
+    reportes.CARPETA_REPORTES = carpeta
+    reportes.generar_reporte("mensual", REFERENCIA, forzar=True)
+
+def test_sin_cambios_el_reporte_queda_vigente(carpeta):
+    assert reportes.generar_reporte("mensual", REFERENCIA)["estado"] == "generado"
+    assert reportes.generar_reporte("mensual", REFERENCIA)["estado"] == "vigente"
+    repositorio.guardar_venta(REFERENCIA, "Ana Pérez", 0, 1, 0, 0)
+    assert reportes.generar_reporte("mensual", REFERENCIA)["estado"] == "generado"
+
+def test_espera_el_lock_de_otro_proceso(carpeta):
+    carpeta.mkdir(parents=True)
+    lock = carpeta / "reporte_mensual_2024-03.lock"
+    lock.write_text("12345")
+    hilo = threading.Thread(target=reportes.generar_reporte, args=("mensual", REFERENCIA))
+    hilo.start()
+    time.sleep(3 * reportes.ESPERA_LOCK_REPORTE)
+    assert hilo.is_alive()
+    assert not (carpeta / "reporte_mensual_2024-03.xlsx").exists()
+    lock.unlink()
+    hilo.join(timeout=30)
+    assert (carpeta / "reporte_mensual_2024-03.xlsx").exists()
+    assert not lock.exists()
+
+def test_lock_abandonado_se_libera(carpeta):
+    carpeta.mkdir(parents=True)
+    lock = carpeta / "reporte_mensual_2024-03.lock"
+    lock.write_text("12345")
+    viejo = time.time() - reportes.VENCIMIENTO_LOCK_REPORTE - 1
+    os.utime(lock, (viejo, viejo))
+    assert reportes.generar_reporte("mensual", REFERENCIA)["estado"] == "generado"
+
+def test_procesos_concurrentes_dejan_libro_y_metadatos_coherentes(carpeta, base):
+    contexto = multiprocessing.get_context("spawn")
+    procesos = [
+        contexto.Process(target=_generar_en_otro_proceso, args=(base.ruta, base.archivo_config, str(carpeta)))
+        for _ in range(3)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(timeout=60)
+        assert proceso.exitcode == 0
+
+    ruta = carpeta / "reporte_mensual_2024-03.xlsx"
+    metadatos = json.loads(ruta.with_suffix(".json").read_text(encoding="utf-8"))
+    assert metadatos["bytes"] == ruta.stat().st_size
+    assert load_workbook(ruta, read_only=True).sheetnames[0] == "Resumen"
+    assert sorted(p.name for p in carpeta.iterdir()) == [ruta.with_suffix(".json").name, ruta.name]
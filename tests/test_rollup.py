@@ -0,0 +1,24 @@
+from datetime import date
+
+import repositorio
+from conftest import alterar_ventas
+
+def _rollup(conn):
+    return conn.execute("SELECT * FROM ventas_diarias WHERE registros <> 0 ORDER BY fecha, empleado").fetchall()
+
+def test_triggers_mantienen_el_rollup_igual_a_una_reconstruccion(ventas):
+    conn = repositorio.get_connection()
+    alterar_ventas(conn)
+    incremental = _rollup(conn)
+    repositorio.reconstruir_rollup_diario(conn)
+    assert _rollup(conn) == incremental
+    conn.close()
+
+def test_rollup_suma_las_ventas_del_dia(empleados):
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 1, 2, 3, 4)
+    repositorio.guardar_venta(date(2024, 3, 13), "Ana Pérez", 0, 1, 0, 0)
+    conn = repositorio.get_connection()
+    assert conn.execute(
+        "SELECT registros, autoliquidable, oferta, marca_propia, producto_adicional FROM ventas_diarias"
+    ).fetchall() == [(2, 1, 3, 3, 4)]
+    conn.close()
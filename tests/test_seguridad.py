@@ -0,0 +1,70 @@
+import hashlib
+
+import repositorio
+
+COSTO_PRUEBA = 2 ** 10
+
+def _hash_guardado(username):
+    conn = repositorio.get_connection()
+    hashed = conn.execute("SELECT password_hash FROM usuarios WHERE username = ?", (username,)).fetchone()[0]
+    conn.close()
+    return hashed
+
+def test_scrypt_verifica_solo_la_contrasena_correcta():
+    hashed = repositorio.hash_password("contraseña-ñandú", costo=COSTO_PRUEBA)
+    assert hashed.startswith(f"scrypt${COSTO_PRUEBA}$")
+    assert repositorio.check_password("contraseña-ñandú", hashed)
+    assert not repositorio.check_password("contrasena-nandu", hashed)
+    assert hashed != repositorio.hash_password("contraseña-ñandú", costo=COSTO_PRUEBA)
+
+def test_hash_heredado_se_migra_al_autenticar(base):
+    repositorio.crear_usuario_db("caja1", "secreto-largo", "empleado")
+    conn = repositorio.get_connection()
+    conn.execute(
+        "UPDATE usuarios SET password_hash = ? WHERE username = 'caja1'",
+        (hashlib.sha256(b"secreto-largo").hexdigest(),)
+    )
+    conn.commit()
+    conn.close()
+    
+    assert repositorio.autenticar_usuario("caja1", "secreto-largo")["rol"] == "empleado"
+    hashed = _hash_guardado("caja1")
+    assert hashed.startswith("scrypt$") and not repositorio.necesita_rehash(hashed)
+    assert repositorio.autenticar_usuario("caja1", "secreto-largo") is not None
+    assert repositorio.autenticar_usuario("caja1", "otra-clave") is None
+
+def test_limitador_bloquea_por_usuario_y_se_limpia_con_exito():
+    limitador = repositorio.LimitadorLogin()
+    for _ in range(repositorio.MAX_FALLOS_USUARIO - 1):
+        limitador.registrar_fallo("caja1", "10.0.0.1")
+    assert limitador.espera("caja1", "10.0.0.1") == 0
+    limitador.registrar_fallo("caja1", "10.0.0.1")
+    assert 0 < limitador.espera("caja1") <= repositorio.VENTANA_FALLOS + 1
+    assert limitador.espera("caja2") == 0
+    limitador.registrar_exito("caja1")
+    assert limitador.espera("caja1") == 0
+
+def test_limitador_bloquea_por_ip():
+    limitador = repositorio.LimitadorLogin()
+    for i in range(repositorio.MAX_FALLOS_IP):
+        limitador.registrar_fallo(f"usuario{i}", "10.0.0.1")
+    assert limitador.espera("nuevo", "10.0.0.1") > 0
+    assert limitador.espera("nuevo", "10.0.0.2") == 0
+
+def test_cache_verificaciones_depende_del_hash_guardado():
+    cache = repositorio.CacheVerificaciones(max_entradas=2)
+    cache.guardar("caja1", "secreto", "hash-a")
+    assert cache.verificada("caja1", "secreto", "hash-a")
+    assert not cache.verificada("caja1", "otro", "hash-a")
+    assert not cache.verificada("caja1", "secreto", "hash-b")
+    assert not cache.verificada("caja1", "secreto", "hash-a")
+    
+    for usuario in ("a", "b", "c"):
+        cache.guardar(usuario, "secreto", "hash")
+    assert not cache.verificada("a", "secreto", "hash")
+    assert cache.verificada("c", "secreto", "hash")
+
+def test_cache_verificaciones_vence():
+    cache = repositorio.CacheVerificaciones(ttl=-1)
+    cache.guardar("caja1", "secreto", "hash-a")
+    assert not cache.verificada("caja1", "secreto", "hash-a")
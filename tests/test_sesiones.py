@@ -0,0 +1,19 @@
+import repositorio
+
+def test_token_valido_resuelve_el_usuario(base):
+    repositorio.crear_usuario_db("sup", "clave-segura-1", "Supervisor")
+    token = repositorio.crear_sesion_persistente("sup")
+    assert repositorio.validar_sesion_persistente(token)["username"] == "sup"
+    repositorio.revocar_sesion(token)
+    assert repositorio.validar_sesion_persistente(token) is None
+
+def test_token_con_texto_no_ascii_es_invalido_sin_error(base):
+    repositorio.crear_usuario_db("sup", "clave-segura-1", "Supervisor")
+    identificador, vence, _ = repositorio.crear_sesion_persistente("sup").split(".")
+    errores = []
+    repositorio.registrar_callback("error", "prueba", errores.append)
+    try:
+        assert repositorio.validar_sesion_persistente(f"{identificador}.{vence}.firmañ") is None
+    finally:
+        repositorio.registrar_callback("error", "prueba", lambda mensaje: None)
+    assert errores == []
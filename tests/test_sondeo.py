@@ -0,0 +1,29 @@
+import repositorio
+
+def test_verificaciones_una_vez_hasta_vencer_o_invalidar(app, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sondeo = app.SondeoArranque()
+    ejecuciones = []
+    original = sondeo.ejecutar
+    monkeypatch.setattr(sondeo, "ejecutar", lambda: ejecuciones.append(1) or original())
+    
+    issues = sondeo.obtener()
+    assert sondeo.obtener() is issues
+    assert len(ejecuciones) == 1
+    sondeo.obtener(forzar=True)
+    sondeo.invalidar()
+    sondeo.obtener()
+    assert len(ejecuciones) == 3
+    assert sondeo.ultima_ejecucion is not None
+
+def test_sondeo_migra_una_base_desactualizada(app, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = repositorio.get_connection()
+    conn.execute("PRAGMA user_version = 1")
+    conn.close()
+    assert repositorio.verificar_base_datos()
+    
+    assert app.SondeoArranque().obtener() == []
+    conn = repositorio.get_connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == repositorio.ESQUEMA_VERSION
+    conn.close()
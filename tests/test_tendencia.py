@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+import repositorio
+from conftest import alterar_ventas
+
+def test_granularidad_automatica_segun_el_rango(app):
+    hoy = date(2024, 3, 13)
+    assert app.elegir_granularidad(hoy - timedelta(days=30), hoy) == "Diaria"
+    assert app.elegir_granularidad(hoy - timedelta(days=365), hoy) == "Semanal"
+    assert app.elegir_granularidad(hoy - timedelta(days=3650), hoy) == "Mensual"
+    assert app.elegir_granularidad(hoy - timedelta(days=30), hoy, "Mensual") == "Mensual"
+
+def test_eleccion_manual_respeta_el_tope_de_puntos(app):
+    hoy = date(2024, 3, 13)
+    inicio = hoy - timedelta(days=app.MAX_PUNTOS_TENDENCIA * 3)
+    granularidad = app.elegir_granularidad(inicio, hoy, "Diaria")
+    assert granularidad == "Semanal"
+    assert app.puntos_tendencia(inicio, hoy, granularidad) <= app.MAX_PUNTOS_TENDENCIA
+
+def test_tendencia_suma_lo_mismo_que_los_registros(app, ventas):
+    conn = repositorio.get_connection()
+    alterar_ventas(conn)
+    inicio, fin = date.today() - timedelta(days=150), date.today()
+    esperado = conn.execute(
+        "SELECT COALESCE(SUM(oferta), 0) FROM registros_ventas WHERE fecha BETWEEN ? AND ?",
+        (inicio.isoformat(), fin.isoformat())
+    ).fetchone()[0]
+    conn.close()
+    
+    for granularidad in app.GRANULARIDADES:
+        df = app.obtener_tendencia(inicio.isoformat(), fin.isoformat(), None, granularidad)
+        assert int(df["oferta"].sum()) == esperado
+        assert df["fecha"].is_monotonic_increasing and df["fecha"].is_unique
+    semanal = app.obtener_tendencia(inicio.isoformat(), fin.isoformat(), None, "Semanal")
+    assert all(date.fromisoformat(f).weekday() == 0 for f in semanal["fecha"])
@@ -0,0 +1,56 @@
+import json
+from datetime import date
+
+import pytest
+
+import repositorio
+
+FECHA = date(2024, 3, 13)
+
+def _crear_tienda(ruta, ventas):
+    """Base de otra tienda con `ventas` unidades de oferta de un empleado"""
+    actual = repositorio.obtener_backend()
+    repositorio.usar_backend(repositorio.BackendSQLite(str(ruta), str(ruta.with_suffix(".json"))))
+    try:
+        repositorio.init_database()
+        repositorio.create_tables()
+        repositorio.guardar_empleado_db("Ana Pérez", "Droguería")
+        repositorio.guardar_venta(FECHA, "Ana Pérez", 0, ventas, 0, 0)
+    finally:
+        repositorio.usar_backend(actual)
+
+@pytest.fixture
+def registro(base, tmp_path, monkeypatch):
+    """Dos tiendas con el mismo nombre, más una entrada con id repetido y otra con base repetida"""
+    _crear_tienda(tmp_path / "norte.db", 3)
+    _crear_tienda(tmp_path / "sur.db", 5)
+    archivo = tmp_path / "tiendas.json"
+    archivo.write_text(json.dumps({"tiendas": [
+        {"id": "norte", "nombre": "Sucursal", "db": str(tmp_path / "norte.db")},
+        {"id": "sur", "nombre": "Sucursal", "db": str(tmp_path / "sur.db")},
+        {"id": "norte", "nombre": "Otra", "db": str(tmp_path / "otra.db")},
+        {"id": "copia", "nombre": "Copia", "db": str(tmp_path / "sur.db")},
+    ]}), encoding="utf-8")
+    monkeypatch.setattr(repositorio, "ARCHIVO_TIENDAS", str(archivo))
+    return repositorio.cargar_tiendas()
+
+def test_registro_descarta_ids_y_bases_repetidos(registro):
+    assert list(registro) == ["norte", "sur"]
+
+def test_tiendas_con_el_mismo_nombre_no_se_fusionan(registro):
+    resultado = repositorio.consultar_cadena(["norte", "sur"], FECHA, FECHA)
+    oferta = 1 + repositorio.CATEGORIAS.index("oferta")
+    assert resultado["errores"] == {}
+    assert resultado["por_tienda"]["norte"][oferta] == 3
+    assert resultado["por_tienda"]["sur"][oferta] == 5
+    assert resultado["por_empleado"][("sur", "Ana Pérez")][oferta] == 5
+    assert resultado["por_fecha"][FECHA.isoformat()][oferta] == 8
+
+def test_etiquetas_distinguen_nombres_repetidos(registro):
+    assert repositorio.etiquetas_tiendas(registro) == {"norte": "Sucursal (norte)", "sur": "Sucursal (sur)"}
+
+def test_tienda_sin_base_queda_en_errores(registro, tmp_path):
+    (tmp_path / "sur.db").unlink()
+    resultado = repositorio.consultar_cadena(["norte", "sur"], FECHA, FECHA)
+    assert list(resultado["errores"]) == ["sur"]
+    assert list(resultado["por_tienda"]) == ["norte"]
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+import repositorio
+import trabajos
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+@pytest.fixture
+def cola():
+    cola = trabajos.ColaTrabajos(procesos=2)
+    yield cola
+    cola.cerrar()
+
+def test_trabajos_identicos_en_curso_se_deduplican(cola):
+    anterior = repositorio.obtener_backend()
+    repositorio.usar_backend(repositorio.BackendMemoria())
+    try:
+        primero = cola.enviar(time.sleep, 0.3)
+        assert cola.enviar(time.sleep, 0.3) is primero
+        assert cola.enviar(time.sleep, 0.2) is not primero
+        assert (cola.enviados, cola.deduplicados) == (2, 1)
+        primero.result(timeout=5)
+        time.sleep(0.3)
+        assert cola.en_curso() == 0
+    finally:
+        repositorio.usar_backend(anterior)
+
+def test_trabajador_usa_la_base_de_la_aplicacion(ventas, cola):
+    futuro = cola.enviar(repositorio.obtener_estadisticas)
+    assert futuro.result(timeout=60) == repositorio.obtener_estadisticas()
+
+def test_trabajador_no_reejecuta_el_main_del_padre(tmp_path):
+    marcas = tmp_path / "marcas.txt"
+    principal = tmp_path / "principal.py"
+    principal.write_text(textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {str(RAIZ)!r})
+        with open({str(marcas)!r}, "a") as f:
+            f.write(str(os.getpid()) + "\\n")
+
+        import repositorio
+        import trabajos
+
+        if __name__ == "__main__":
+            repositorio.usar_backend(repositorio.BackendSQLite({str(tmp_path / "ventas.db")!r}))
+            cola = trabajos.ColaTrabajos(procesos=1)
+            print(cola.enviar(os.getpid).result(timeout=60))
+            cola.cerrar()
+    """), encoding="utf-8")
+    
+    resultado = subprocess.run([sys.executable, str(principal)], capture_output=True, text=True, timeout=120)
+    assert resultado.returncode == 0, resultado.stderr
+    pid_trabajador = resultado.stdout.strip().splitlines()[-1]
+    assert pid_trabajador not in marcas.read_text().split()
+    assert len(marcas.read_text().split()) == 1
+
+def test_importar_trabajos_no_altera_multiprocessing():
+    resultado = subprocess.run(
+        [sys.executable, "-c", "from multiprocessing import spawn; original = spawn.get_preparation_data; "
+                               "import trabajos; print(spawn.get_preparation_data is original)"],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    assert resultado.stdout.strip() == "True"
@@ -0,0 +1,170 @@
+"""Cola de trabajos pesados que corren en procesos aparte.
+
+Streamlit ejecuta cada sesión en un hilo del mismo proceso; un reporte construido
+en Python puro retiene el GIL y frena los reruns de los demás usuarios. La cola
+envía esos trabajos a un pool de procesos y devuelve futuros que las páginas
+consultan. Las funciones enviadas deben estar definidas a nivel de módulo
+(reportes.generar_reporte, repositorio.benchmark_costos_hash, ...) porque los
+procesos se crean con spawn y las importan por nombre.
+
+Spawn normalmente vuelve a ejecutar el __main__ del padre en cada hijo; bajo
+Streamlit ese __main__ es Ventas.py (set_page_config, log a app.log, ...). Los
+procesos de esta cola arrancan sin él: solo importan este módulo, reportes y
+repositorio.
+"""
+import io
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import context, spawn
+
+import reportes
+import repositorio
+
+logger = logging.getLogger(__name__)
+
+# Deja al menos un núcleo libre para los reruns interactivos
+MAX_PROCESOS_TRABAJOS = max(1, min(2, (os.cpu_count() or 1) - 1))
+
+# -------------------- PROCESOS SIN __main__ --------------------
+def _datos_preparacion(nombre):
+    """Datos de arranque de spawn sin la ruta ni el nombre del __main__ del padre"""
+    datos = spawn.get_preparation_data(nombre)
+    datos.pop("init_main_from_name", None)
+    datos.pop("init_main_from_path", None)
+    return datos
+
+if sys.platform != "win32":
+    from multiprocessing import popen_spawn_posix, reduction, util
+
+    class _PopenTrabajo(popen_spawn_posix.Popen):
+        """Arranque spawn (POSIX) que solo difiere del estándar en los datos de preparación"""
+
+        def _launch(self, process_obj):
+            from multiprocessing import resource_tracker
+            tracker_fd = resource_tracker.getfd()
+            self._fds.append(tracker_fd)
+            datos = io.BytesIO()
+            context.set_spawning_popen(self)
+            try:
+                reduction.dump(_datos_preparacion(process_obj._name), datos)
+                reduction.dump(process_obj, datos)
+            finally:
+                context.set_spawning_popen(None)
+
+            parent_r = child_w = child_r = parent_w = None
+            try:
+                parent_r, child_w = os.pipe()
+                child_r, parent_w = os.pipe()
+                cmd = spawn.get_command_line(tracker_fd=tracker_fd, pipe_handle=child_r)
+                self._fds.extend([child_r, child_w])
+                self.pid = util.spawnv_passfds(spawn.get_executable(), cmd, self._fds)
+                self.sentinel = parent_r
+                with open(parent_w, "wb", closefd=False) as f:
+                    f.write(datos.getbuffer())
+            finally:
+                self.finalizer = util.Finalize(
+                    self, util.close_fds, [fd for fd in (parent_r, parent_w) if fd is not None]
+                )
+                for fd in (child_r, child_w):
+                    if fd is not None:
+                        os.close(fd)
+
+class ProcesoTrabajo(context.SpawnProcess):
+    """Proceso de spawn que no reejecuta el __main__ del padre al arrancar.
+
+    El cambio vive solo en esta clase: los demás usuarios de multiprocessing
+    del proceso conservan el arranque estándar. En Windows se usa el estándar.
+    """
+
+    @staticmethod
+    def _Popen(process_obj):
+        if sys.platform == "win32":
+            return context.SpawnProcess._Popen(process_obj)
+        return _PopenTrabajo(process_obj)
+
+class ContextoTrabajos(context.SpawnContext):
+    """Contexto spawn cuyos procesos son ProcesoTrabajo"""
+    Process = ProcesoTrabajo
+
+def _iniciar_trabajador(ruta_db, archivo_config, carpeta_reportes):
+    """Apunta el proceso trabajador a la misma base y carpetas que la aplicación"""
+    repositorio.usar_backend(repositorio.BackendSQLite(ruta_db, archivo_config))
+    reportes.CARPETA_REPORTES = carpeta_reportes
+
+class ColaTrabajos:
+    """Pool de procesos con deduplicación de trabajos idénticos en curso"""
+
+    def __init__(self, procesos=MAX_PROCESOS_TRABAJOS):
+        self.procesos = procesos
+        self.enviados = 0
+        self.deduplicados = 0
+        self._lock = threading.Lock()
+        self._en_curso = {}
+        self._ejecutor = None
+        self._backend = None
+
+    def _obtener_ejecutor(self):
+        """Crea el pool la primera vez, o de nuevo si cambió el backend"""
+        backend = repositorio.obtener_backend()
+        if self._ejecutor is not None and backend is self._backend:
+            return self._ejecutor
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown(wait=False)
+
+        if backend.ruta is None:
+            # La base en memoria no se comparte entre procesos: se usan hilos
+            self._ejecutor = ThreadPoolExecutor(max_workers=self.procesos, thread_name_prefix="trabajo")
+        else:
+            self._ejecutor = ProcessPoolExecutor(
+                max_workers=self.procesos,
+                mp_context=ContextoTrabajos(),
+                initializer=_iniciar_trabajador,
+                initargs=(
+                    os.path.abspath(backend.ruta),
+                    os.path.abspath(backend.archivo_config),
+                    os.path.abspath(reportes.CARPETA_REPORTES)
+                )
+            )
+        self._backend = backend
+        return self._ejecutor
+
+    def enviar(self, funcion, *args):
+        """Encola funcion(*args); si ya hay uno idéntico en curso devuelve su futuro"""
+        clave = (funcion.__module__, funcion.__qualname__, args)
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                self.deduplicados += 1
+                return futuro
+            try:
+                futuro = self._obtener_ejecutor().submit(funcion, *args)
+            except BrokenProcessPool:
+                # Un trabajador murió (p. ej. sin memoria): se recrea el pool
+                logger.warning("♻️ Pool de trabajos reiniciado")
+                self._backend = None
+                futuro = self._obtener_ejecutor().submit(funcion, *args)
+            self._en_curso[clave] = futuro
+            self.enviados += 1
+        futuro.add_done_callback(lambda terminado: self._liberar(clave, terminado))
+        return futuro
+
+    def _liberar(self, clave, futuro):
+        with self._lock:
+            if self._en_curso.get(clave) is futuro:
+                del self._en_curso[clave]
+
+    def en_curso(self):
+        """Cantidad de trabajos encolados o ejecutándose"""
+        with self._lock:
+            return len(self._en_curso)
+
+    def cerrar(self):
+        """Detiene el pool sin esperar a los trabajos pendientes"""
+        with self._lock:
+            if self._ejecutor is not None:
+                self._ejecutor.shutdown(wait=False, cancel_futures=True)
+                self._ejecutor = None